@@ -2,7 +2,9 @@ from django.contrib import admin
 from .models import (
     Grado, Asignatura, PeriodoAcademico, Profesor, Estudiante, 
     Apoderado, Curso, Inscripcion, EstudianteApoderado, 
-    Evaluacion, Calificacion, Asistencia
+    Evaluacion, Calificacion, Asistencia, NotaFinal, LoteProcesado,
+    ResumenEstudiante, ResumenCurso, ResumenPeriodo,
+    ResumenMensual, ResumenMensualGrado, ResumenMensualCurso
 )
 
 @admin.register(Grado)
@@ -85,3 +87,26 @@ class AsistenciaAdmin(admin.ModelAdmin):
     list_filter = ['estado', 'fecha', 'curso__grado', 'curso__asignatura']
     search_fields = ['estudiante__nombres', 'estudiante__apellidos', 'curso__asignatura__nombre']
     ordering = ['-fecha', 'curso', 'estudiante']
+
+@admin.register(NotaFinal)
+class NotaFinalAdmin(admin.ModelAdmin):
+    list_display = ['estudiante', 'curso', 'nota_final', 'peso_evaluado', 'evaluaciones_rendidas', 'fecha_calculo']
+    list_filter = ['curso__periodo_academico', 'curso__grado', 'curso__asignatura']
+    search_fields = ['estudiante__nombres', 'estudiante__apellidos', 'estudiante__ci']
+    ordering = ['curso', '-nota_final']
+
+@admin.register(LoteProcesado)
+class LoteProcesadoAdmin(admin.ModelAdmin):
+    list_display = ['clave', 'recurso', 'fecha_proceso', 'resultado']
+    list_filter = ['recurso', 'fecha_proceso']
+    search_fields = ['clave']
+    ordering = ['-fecha_proceso']
+
+@admin.register(ResumenEstudiante, ResumenCurso, ResumenPeriodo)
+class ResumenKPIAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'suma_notas', 'total_notas', 'total_asistencias', 'total_ausencias']
+
+@admin.register(ResumenMensual, ResumenMensualGrado, ResumenMensualCurso)
+class ResumenMensualAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'mes', 'suma_notas', 'total_notas', 'total_asistencias', 'total_ausentes']
+    list_filter = ['mes']
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class IndicadoresConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'indicadores'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,149 @@
+"""
+Búsqueda indexada de personas
+=============================
+Estudiantes, apoderados y profesores se buscan por nombre, apellido, CI o
+email sin recorrer sus tablas: cada persona se descompone en palabras
+normalizadas (sin acentos, en minúsculas, solo letras y dígitos) guardadas
+en TerminoBusqueda, que las señales mantienen al día en cada alta,
+modificación o baja.
+
+Cada palabra de la consulta se busca como prefijo con un rango sobre el
+índice (tipo, termino) — `termino >= 'gar' AND termino < 'gas'` — que usa
+el índice B-tree tanto en SQLite como en PostgreSQL (LIKE en SQLite no lo
+usa por ser insensible a mayúsculas). Una persona coincide si todas las
+palabras de la consulta coinciden con alguna de sus palabras; el orden
+pondera el campo (apellidos y CI pesan más que el email) y premia las
+coincidencias exactas.
+
+Las altas masivas (`bulk_create`) no disparan señales: después de usarlas
+hay que ejecutar `reindexar_busqueda`.
+"""
+
+import re
+import unicodedata
+from collections import namedtuple
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+
+from .models import Apoderado, Estudiante, Profesor, TerminoBusqueda
+
+# Una fuente: modelo indexado y peso de cada campo en el orden de resultados
+Fuente = namedtuple('Fuente', 'modelo pesos')
+
+FUENTES = {
+    'estudiante': Fuente(Estudiante, {'apellidos': 3, 'ci': 3, 'nombres': 2, 'email': 1}),
+    'apoderado': Fuente(Apoderado, {'apellidos': 3, 'ci': 3, 'nombres': 2, 'email': 1}),
+    'profesor': Fuente(Profesor, {'apellidos': 3, 'nombres': 2, 'email': 1}),
+}
+TIPOS = {fuente.modelo: tipo for tipo, fuente in FUENTES.items()}
+
+# Palabras de la consulta que se consideran (el resto se ignora)
+MAXIMO_PALABRAS = 5
+LARGO_TERMINO = TerminoBusqueda._meta.get_field('termino').max_length
+LARGO_ETIQUETA = TerminoBusqueda._meta.get_field('etiqueta').max_length
+
+_NO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+
+def normalizar(texto):
+    """Palabras de `texto` sin acentos, en minúsculas y sin signos"""
+    plano = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode('ascii')
+    return [palabra for palabra in _NO_ALFANUMERICO.split(plano.lower()) if palabra]
+
+
+def _siguiente(prefijo):
+    """Menor cadena mayor que todas las que empiezan con `prefijo`"""
+    return prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+
+
+# ============================================
+# MANTENIMIENTO DEL ÍNDICE
+# ============================================
+
+def terminos(tipo, objeto):
+    """Filas de TerminoBusqueda (sin guardar) de una persona"""
+    pesos = FUENTES[tipo].pesos
+    etiqueta = ' '.join(normalizar(f'{objeto.apellidos} {objeto.nombres}'))[:LARGO_ETIQUETA]
+    mejores = {}
+    for campo, peso in pesos.items():
+        for palabra in normalizar(getattr(objeto, campo)):
+            palabra = palabra[:LARGO_TERMINO]
+            mejores[palabra] = max(peso, mejores.get(palabra, 0))
+    return [
+        TerminoBusqueda(tipo=tipo, objeto_id=objeto.pk, termino=palabra, peso=peso, etiqueta=etiqueta)
+        for palabra, peso in mejores.items()
+    ]
+
+
+def indexar(objeto):
+    """Reemplaza los términos de una persona guardada"""
+    tipo = TIPOS[type(objeto)]
+    with transaction.atomic():
+        desindexar(objeto)
+        TerminoBusqueda.objects.bulk_create(terminos(tipo, objeto))
+
+
+def desindexar(objeto):
+    TerminoBusqueda.objects.filter(tipo=TIPOS[type(objeto)], objeto_id=objeto.pk).delete()
+
+
+def reindexar(tipos=None, tamano_lote=2000):
+    """Reconstruye el índice de los `tipos` indicados (todos por defecto); devuelve {tipo: personas}"""
+    totales = {}
+    with transaction.atomic():
+        for tipo in tipos or FUENTES:
+            modelo = FUENTES[tipo].modelo
+            TerminoBusqueda.objects.filter(tipo=tipo).delete()
+            campos = ['id', 'apellidos', 'nombres', *FUENTES[tipo].pesos]
+            filas, total = [], 0
+            for objeto in modelo.objects.order_by().only(*campos).iterator(chunk_size=tamano_lote):
+                filas.extend(terminos(tipo, objeto))
+                total += 1
+                if len(filas) >= tamano_lote:
+                    TerminoBusqueda.objects.bulk_create(filas)
+                    filas = []
+            TerminoBusqueda.objects.bulk_create(filas)
+            totales[tipo] = total
+    return totales
+
+
+# ============================================
+# CONSULTA
+# ============================================
+
+def palabras_consulta(texto):
+    """Palabras normalizadas de la consulta, sin las que son prefijo de otra"""
+    palabras = list(dict.fromkeys(normalizar(texto)))[:MAXIMO_PALABRAS]
+    return [p for p in palabras if not any(q != p and q.startswith(p) for q in palabras)]
+
+
+def coincidencias(tipo, texto):
+    """
+    QuerySet agrupado por persona (`objeto_id`, `etiqueta`) de las que
+    coinciden con todas las palabras de `texto`, anotado con `puntaje`;
+    None si `texto` no tiene palabras.
+    """
+    palabras = palabras_consulta(texto)
+    if not palabras:
+        return None
+    prefijos = [Q(termino__gte=p, termino__lt=_siguiente(p)) for p in palabras]
+    palabra = Case(*(When(q, then=Value(i)) for i, q in enumerate(prefijos)), output_field=IntegerField())
+    exacta = Case(When(termino__in=palabras, then=Value(2)), default=Value(1), output_field=IntegerField())
+    return (
+        TerminoBusqueda.objects
+        .filter(reduce(or_, prefijos), tipo=tipo)
+        .values('objeto_id', 'etiqueta')
+        .annotate(palabras=Count(palabra, distinct=True), puntaje=Sum(F('peso') * exacta))
+        .filter(palabras=len(palabras))
+    )
+
+
+def buscar(tipo, texto, limite=10):
+    """Ids de las `limite` personas que mejor coinciden con `texto` (mejor primero)"""
+    filas = coincidencias(tipo, texto)
+    if filas is None:
+        return []
+    return [fila['objeto_id'] for fila in filas.order_by('-puntaje', 'etiqueta', 'objeto_id')[:limite]]
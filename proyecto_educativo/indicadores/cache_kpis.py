@@ -0,0 +1,115 @@
+"""
+Caché versionada de KPIs
+========================
+Guarda el contexto de `dashboard_view` y las respuestas de
+`DashboardAPIViewSet` en el framework de caché de Django
+(alias `KPIS_CACHE_ALIAS`, por defecto 'default').
+
+Las claves incluyen un contador de versión global. Cada escritura en
+Calificacion, Asistencia, Inscripcion o Evaluacion (incluidas las
+operaciones masivas) incrementa el contador, lo que deja obsoletas todas
+las entradas anteriores sin necesidad de borrarlas una a una.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from rest_framework.response import Response
+
+CLAVE_VERSION = 'indicadores:kpis:version'
+
+# Parámetro que fuerza el recálculo (botón "Actualizar dashboard")
+PARAMETRO_REFRESCAR = 'refrescar'
+
+
+def _cache():
+    return caches[getattr(settings, 'KPIS_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'KPIS_CACHE_TIMEOUT', 300)
+
+
+def version_actual():
+    """Versión vigente de las claves de KPIs"""
+    cache = _cache()
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        # Se parte de una marca de tiempo para no reutilizar versiones
+        # antiguas si el contador fue desalojado de la caché
+        cache.add(CLAVE_VERSION, int(time.time() * 1000), timeout=None)
+        version = cache.get(CLAVE_VERSION)
+    return version
+
+
+def invalidar():
+    """Incrementa la versión: todas las entradas anteriores quedan obsoletas"""
+    cache = _cache()
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        version_actual()
+
+
+def invalidar_al_confirmar():
+    """
+    Invalida ahora y, si hay una transacción abierta, de nuevo al confirmarla
+    para descartar lo que otra petición haya cacheado con datos sin confirmar.
+    """
+    invalidar()
+    if connection.in_atomic_block:
+        transaction.on_commit(invalidar)
+
+
+def alcance_usuario(request):
+    """Alcance de la clave según el usuario que consulta"""
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_authenticated:
+        return f'usuario{usuario.pk}'
+    return 'anonimo'
+
+
+def clave_cache(nombre, request):
+    """Clave versionada por nombre, periodo, alcance de usuario y parámetros"""
+    parametros = sorted(
+        (k, v) for k, v in request.GET.lists() if k != PARAMETRO_REFRESCAR
+    )
+    huella = hashlib.md5(repr(parametros).encode()).hexdigest()
+    periodo = request.GET.get('periodo') or 'todos'
+    return f'indicadores:kpis:v{version_actual()}:{nombre}:{periodo}:{alcance_usuario(request)}:{huella}'
+
+
+def obtener_o_calcular(nombre, request, calcular):
+    """Devuelve el valor cacheado o lo calcula con `calcular()` y lo guarda"""
+    cache = _cache()
+    clave = clave_cache(nombre, request)
+    if PARAMETRO_REFRESCAR not in request.GET:
+        valor = cache.get(clave)
+        if valor is not None:
+            return valor
+    valor = calcular()
+    cache.set(clave, valor, _timeout())
+    return valor
+
+
+def cachear_respuesta(nombre):
+    """Decorador para acciones de DRF: cachea `response.data` de las respuestas 200"""
+    def decorador(metodo):
+        @wraps(metodo)
+        def envoltura(self, request, *args, **kwargs):
+            cache = _cache()
+            clave = clave_cache(nombre, request)
+            if PARAMETRO_REFRESCAR not in request.GET:
+                data = cache.get(clave)
+                if data is not None:
+                    return Response(data)
+            response = metodo(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(clave, response.data, _timeout())
+            return response
+        return envoltura
+    return decorador
@@ -0,0 +1,63 @@
+"""
+Exportaciones en streaming (CSV / NDJSON)
+=========================================
+Recorren el queryset filtrado con `.iterator()` (cursor del lado del
+servidor en PostgreSQL) y construyen las filas por lotes con las listas
+rápidas (ver listas_rapidas.py), de modo que la memoria usada no depende
+de la cantidad de filas exportadas.
+"""
+
+import csv
+import json
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+TAMANO_LOTE = 2000
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en lugar de guardarla"""
+
+    def write(self, valor):
+        return valor
+
+
+def filas_exportacion(queryset, lista, tamano_lote=None):
+    """Filas JSON de `lista` (ListaRapida) sobre `queryset`, construidas por lotes"""
+    tamano_lote = tamano_lote or TAMANO_LOTE
+    valores = queryset.values(*lista.campos).iterator(chunk_size=tamano_lote)
+    while True:
+        lote = list(islice(valores, tamano_lote))
+        if not lote:
+            return
+        yield from lista.construir(lote)
+
+
+def _lineas_csv(filas, columnas):
+    escritor = csv.writer(_Eco())
+    yield '\ufeff' + escritor.writerow(columnas)  # BOM para que Excel detecte UTF-8
+    for fila in filas:
+        yield escritor.writerow(['' if fila[c] is None else fila[c] for c in columnas])
+
+
+def _lineas_ndjson(filas, columnas):
+    for fila in filas:
+        if len(fila) != len(columnas):
+            fila = {columna: fila[columna] for columna in columnas}
+        yield json.dumps(fila, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def respuesta_exportacion(filas, columnas, formato, nombre):
+    """StreamingHttpResponse con las `columnas` de las filas en `formato` ('csv' o 'ndjson')"""
+    lineas = _lineas_csv(filas, columnas) if formato == 'csv' else _lineas_ndjson(filas, columnas)
+    response = StreamingHttpResponse(lineas, content_type=FORMATOS[formato])
+    archivo = f'{nombre}-{timezone.localdate():%Y%m%d}.{formato}'
+    response['Content-Disposition'] = f'attachment; filename="{archivo}"'
+    return response
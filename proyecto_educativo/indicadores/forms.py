@@ -4,8 +4,12 @@ Formularios Django para el sistema de Indicadores Educativos
 Formularios para registro y edición de datos del sistema
 """
 
+from decimal import Decimal
+
 from django import forms
 from django.core.exceptions import ValidationError
+from .lotes import planilla_calificaciones
+from .widgets import SelectRemoto
 from .models import (
     Grado, Asignatura, PeriodoAcademico, Profesor, Estudiante, 
     Apoderado, Curso, Inscripcion, EstudianteApoderado, 
@@ -13,6 +17,17 @@ from .models import (
 )
 
 
+def cursos_con_etiqueta():
+    """Cursos con las relaciones que recorre __str__ (etiqueta del select sin consultas extra)"""
+    return Curso.objects.select_related(*Curso.RELACIONES_STR)
+
+
+def evaluaciones_con_etiqueta():
+    return Evaluacion.objects.select_related(
+        'curso', *(f'curso__{relacion}' for relacion in Curso.RELACIONES_STR)
+    )
+
+
 class EstudianteForm(forms.ModelForm):
     """Formulario para crear/editar estudiantes"""
     
@@ -100,7 +115,7 @@ class CursoForm(forms.ModelForm):
         widgets = {
             'grado': forms.Select(attrs={'class': 'form-select'}),
             'asignatura': forms.Select(attrs={'class': 'form-select'}),
-            'profesor': forms.Select(attrs={'class': 'form-select'}),
+            'profesor': SelectRemoto('profesores', attrs={'class': 'form-select'}),
             'periodo_academico': forms.Select(attrs={'class': 'form-select'}),
             'seccion': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -116,11 +131,15 @@ class InscripcionForm(forms.ModelForm):
         model = Inscripcion
         fields = ['estudiante', 'curso', 'activa']
         widgets = {
-            'estudiante': forms.Select(attrs={'class': 'form-select'}),
-            'curso': forms.Select(attrs={'class': 'form-select'}),
+            'estudiante': SelectRemoto('estudiantes', attrs={'class': 'form-select'}),
+            'curso': SelectRemoto('cursos', attrs={'class': 'form-select'}),
             'activa': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['curso'].queryset = cursos_con_etiqueta()
+    
     def clean(self):
         cleaned_data = super().clean()
         estudiante = cleaned_data.get('estudiante')
@@ -148,7 +167,7 @@ class EvaluacionForm(forms.ModelForm):
         model = Evaluacion
         fields = ['curso', 'nombre', 'descripcion', 'tipo', 'fecha', 'ponderacion']
         widgets = {
-            'curso': forms.Select(attrs={'class': 'form-select'}),
+            'curso': SelectRemoto('cursos', attrs={'class': 'form-select'}),
             'nombre': forms.TextInput(attrs={
                 'class': 'form-control',
                 'placeholder': 'Nombre de la evaluación'
@@ -171,6 +190,10 @@ class EvaluacionForm(forms.ModelForm):
                 'max': '100'
             }),
         }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['curso'].queryset = cursos_con_etiqueta()
 
 
 class CalificacionForm(forms.ModelForm):
@@ -180,8 +203,8 @@ class CalificacionForm(forms.ModelForm):
         model = Calificacion
         fields = ['evaluacion', 'estudiante', 'nota', 'observaciones']
         widgets = {
-            'evaluacion': forms.Select(attrs={'class': 'form-select'}),
-            'estudiante': forms.Select(attrs={'class': 'form-select'}),
+            'evaluacion': SelectRemoto('evaluaciones', attrs={'class': 'form-select'}),
+            'estudiante': SelectRemoto('estudiantes', depende_de=['evaluacion'], attrs={'class': 'form-select'}),
             'nota': forms.NumberInput(attrs={
                 'class': 'form-control',
                 'placeholder': 'Nota (0-100)',
@@ -198,16 +221,16 @@ class CalificacionForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.fields['evaluacion'].queryset = evaluaciones_con_etiqueta()
         # Si ya se seleccionó una evaluación, filtrar solo estudiantes inscritos en ese curso
         if 'evaluacion' in self.data:
             try:
                 evaluacion_id = int(self.data.get('evaluacion'))
-                evaluacion = Evaluacion.objects.get(id=evaluacion_id)
                 self.fields['estudiante'].queryset = Estudiante.objects.filter(
-                    inscripcion__curso=evaluacion.curso,
+                    inscripcion__curso__evaluacion=evaluacion_id,
                     inscripcion__activa=True
                 ).distinct()
-            except (ValueError, TypeError, Evaluacion.DoesNotExist):
+            except (ValueError, TypeError):
                 pass
     
     def clean(self):
@@ -249,8 +272,8 @@ class AsistenciaForm(forms.ModelForm):
         model = Asistencia
         fields = ['estudiante', 'curso', 'fecha', 'estado', 'observaciones']
         widgets = {
-            'estudiante': forms.Select(attrs={'class': 'form-select'}),
-            'curso': forms.Select(attrs={'class': 'form-select'}),
+            'estudiante': SelectRemoto('estudiantes', depende_de=['curso'], attrs={'class': 'form-select'}),
+            'curso': SelectRemoto('cursos', attrs={'class': 'form-select'}),
             'fecha': forms.DateInput(attrs={
                 'class': 'form-control',
                 'type': 'date'
@@ -265,6 +288,7 @@ class AsistenciaForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.fields['curso'].queryset = cursos_con_etiqueta()
         # Si ya se seleccionó un curso, filtrar solo estudiantes inscritos
         if 'curso' in self.data:
             try:
@@ -278,11 +302,17 @@ class AsistenciaForm(forms.ModelForm):
 
 
 class AsistenciaMasivaForm(forms.Form):
-    """Formulario para registrar asistencia de múltiples estudiantes a la vez"""
+    """
+    Formulario para registrar asistencia de múltiples estudiantes a la vez
+    
+    Con `curso` crea un campo por estudiante inscrito; con `fecha` además
+    precarga el estado ya registrado ese día (una consulta para todo el
+    curso). `registros()` devuelve los ítems para `lotes.registrar_asistencia`.
+    """
     
     curso = forms.ModelChoiceField(
-        queryset=Curso.objects.all(),
-        widget=forms.Select(attrs={'class': 'form-select'}),
+        queryset=cursos_con_etiqueta(),
+        widget=SelectRemoto('cursos', attrs={'class': 'form-select'}),
         label='Curso'
     )
     fecha = forms.DateField(
@@ -293,26 +323,115 @@ class AsistenciaMasivaForm(forms.Form):
         label='Fecha'
     )
     
+    PREFIJO_ESTUDIANTE = 'estudiante_'
+    
     def __init__(self, *args, **kwargs):
         curso = kwargs.pop('curso', None)
+        fecha = kwargs.pop('fecha', None)
         super().__init__(*args, **kwargs)
+        self.estudiantes = []
+        self.registrados = 0
         
         if curso:
             # Obtener estudiantes inscritos en el curso
-            estudiantes = Estudiante.objects.filter(
+            self.estudiantes = list(Estudiante.objects.filter(
                 inscripcion__curso=curso,
                 inscripcion__activa=True
-            ).distinct().order_by('apellidos', 'nombres')
+            ).distinct().order_by('apellidos', 'nombres'))
+            
+            # Estados ya registrados en la fecha (una sola consulta)
+            registrados = {}
+            if fecha:
+                registrados = dict(Asistencia.objects.filter(
+                    curso=curso, fecha=fecha
+                ).order_by().values_list('estudiante_id', 'estado'))
             
             # Crear un campo de selección por cada estudiante
-            for estudiante in estudiantes:
-                field_name = f'estudiante_{estudiante.id}'
+            for estudiante in self.estudiantes:
+                field_name = f'{self.PREFIJO_ESTUDIANTE}{estudiante.id}'
                 self.fields[field_name] = forms.ChoiceField(
                     choices=Asistencia.ESTADO_CHOICES,
-                    initial='presente',
+                    initial=registrados.get(estudiante.id, 'presente'),
                     widget=forms.Select(attrs={'class': 'form-select form-select-sm'}),
                     label=estudiante.nombre_completo
                 )
+            self.registrados = len(registrados)
+    
+    def campos_estudiantes(self):
+        """(estudiante, campo) de cada estudiante inscrito, en orden de lista"""
+        return [(e, self[f'{self.PREFIJO_ESTUDIANTE}{e.id}']) for e in self.estudiantes]
+    
+    def registros(self):
+        """Ítems (estudiante, curso, fecha, estado) del formulario ya validado"""
+        curso, fecha = self.cleaned_data['curso'], self.cleaned_data['fecha']
+        return [
+            {
+                'estudiante': estudiante.id, 'curso': curso.id, 'fecha': fecha,
+                'estado': self.cleaned_data[f'{self.PREFIJO_ESTUDIANTE}{estudiante.id}'],
+            }
+            for estudiante in self.estudiantes
+        ]
+
+
+class PlanillaCalificacionesForm(forms.Form):
+    """
+    Planilla de notas de una evaluación: un campo por estudiante inscrito
+    
+    Con `evaluacion` carga estudiantes y notas ya registradas en una sola
+    consulta (`lotes.planilla_calificaciones`). Las notas en blanco se
+    ignoran; `registros()` devuelve los ítems para `lotes.registrar_calificaciones`.
+    """
+    
+    evaluacion = forms.ModelChoiceField(
+        queryset=evaluaciones_con_etiqueta().order_by('-fecha', 'nombre'),
+        widget=SelectRemoto('evaluaciones', attrs={'class': 'form-select'}),
+        label='Evaluación'
+    )
+    
+    PREFIJO_NOTA = 'nota_'
+    
+    def __init__(self, *args, **kwargs):
+        evaluacion = kwargs.pop('evaluacion', None)
+        super().__init__(*args, **kwargs)
+        self.filas = planilla_calificaciones(evaluacion) if evaluacion else []
+        
+        for fila in self.filas:
+            self.fields[self._nombre_campo(fila)] = forms.DecimalField(
+                required=False,
+                max_digits=4,
+                decimal_places=2,
+                min_value=Decimal('0'),
+                max_value=Decimal('100'),
+                initial=fila['nota'],
+                widget=forms.NumberInput(attrs={
+                    'class': 'form-control form-control-sm',
+                    'step': '0.01',
+                    'min': '0',
+                    'max': '100'
+                }),
+                label=f"{fila['apellidos']}, {fila['nombres']}"
+            )
+    
+    def _nombre_campo(self, fila):
+        return f"{self.PREFIJO_NOTA}{fila['id']}"
+    
+    @property
+    def registradas(self):
+        return sum(1 for fila in self.filas if fila['nota'] is not None)
+    
+    def campos_notas(self):
+        """(fila, campo) de cada estudiante inscrito, en orden de lista"""
+        return [(fila, self[self._nombre_campo(fila)]) for fila in self.filas]
+    
+    def registros(self):
+        """Ítems (evaluacion, estudiante, nota) con nota del formulario ya validado"""
+        evaluacion = self.cleaned_data['evaluacion']
+        registros = []
+        for fila in self.filas:
+            nota = self.cleaned_data.get(self._nombre_campo(fila))
+            if nota is not None:
+                registros.append({'evaluacion': evaluacion.id, 'estudiante': fila['id'], 'nota': nota})
+        return registros
 
 
 # ============================================
@@ -368,8 +487,8 @@ class EstudianteApoderadoForm(forms.ModelForm):
         model = EstudianteApoderado
         fields = ['estudiante', 'apoderado', 'es_principal', 'activa']
         widgets = {
-            'estudiante': forms.Select(attrs={'class': 'form-select'}),
-            'apoderado': forms.Select(attrs={'class': 'form-select'}),
+            'estudiante': SelectRemoto('estudiantes', attrs={'class': 'form-select'}),
+            'apoderado': SelectRemoto('apoderados', attrs={'class': 'form-select'}),
             'es_principal': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
             'activa': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
@@ -0,0 +1,213 @@
+"""
+Capa de KPIs agregados
+======================
+Consultas agrupadas para los indicadores del dashboard. Cada función
+resuelve sus datos en un número fijo de consultas, con los nombres de las
+dimensiones (grado, asignatura, profesor) obtenidos por JOIN y los
+acumulados leídos de las tablas de resumen (ver `resumenes.py`).
+"""
+
+from django.db import connection
+from django.db.models import Count, Exists, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import (
+    Profesor, Estudiante, Curso, Inscripcion, Evaluacion, Asistencia,
+    ResumenPeriodo, ResumenMensual, ResumenMensualGrado, ResumenMensualCurso
+)
+from .resumenes import NOTA_APROBACION, RANGOS_NOTAS, expresion_promedio, inicio_de_mes
+
+# Cota superior de consultas de dashboard_view sin caché (ver tests.py):
+# totales, calificaciones, resúmenes mensuales, top estudiantes, profesores
+# destacados, calificaciones recientes, estudiantes en riesgo, evaluaciones
+# próximas, promedios por curso y asistencia del día.
+DASHBOARD_MAX_CONSULTAS = 10
+
+CAMPOS_CURSO = ['id', 'grado__nombre', 'asignatura__nombre', 'seccion']
+ORDEN_CURSOS = ['grado__nombre', 'asignatura__codigo', 'seccion', 'id']
+
+
+def _cursos(periodo=None, grado=None):
+    """Cursos filtrados por periodo y/o grado (ids)"""
+    cursos = Curso.objects.all()
+    if periodo is not None:
+        cursos = cursos.filter(periodo_academico_id=periodo)
+    if grado is not None:
+        cursos = cursos.filter(grado_id=grado)
+    return cursos
+
+
+def _conteo_por_curso(queryset):
+    """Subconsulta correlacionada con las filas de `queryset` por curso (0 si no hay)"""
+    conteo = queryset.filter(
+        curso=OuterRef('pk')
+    ).order_by().values('curso').annotate(total=Count('id')).values('total')
+    return Coalesce(Subquery(conteo, output_field=IntegerField()), 0)
+
+
+def _sql_conteo(queryset):
+    """SQL y parámetros de un COUNT(*) sin GROUP BY sobre `queryset`"""
+    conteo = queryset.order_by().annotate(
+        _todo=Value(1)
+    ).values('_todo').annotate(total=Count('*')).values('total')
+    return conteo.query.sql_with_params()
+
+
+def totales_generales():
+    """Totales de estudiantes y profesores activos, cursos y evaluaciones en una consulta"""
+    consultas = {
+        'total_estudiantes': Estudiante.objects.filter(activo=True),
+        'total_profesores': Profesor.objects.filter(activo=True),
+        'total_cursos': Curso.objects.all(),
+        'total_evaluaciones': Evaluacion.objects.all(),
+    }
+    columnas, params = [], []
+    for queryset in consultas.values():
+        sql, sql_params = _sql_conteo(queryset)
+        columnas.append(f'({sql})')
+        params.extend(sql_params)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(columnas)}", params)
+        fila = cursor.fetchone()
+    return dict(zip(consultas, fila))
+
+
+def resumen_calificaciones():
+    """
+    Promedio, tasa de aprobación y distribución por rangos de todas las
+    calificaciones, sumando los acumulados de ResumenPeriodo (una fila por
+    período) en lugar de recorrer Calificacion.
+    """
+    totales = ResumenPeriodo.objects.aggregate(
+        suma=Sum('suma_notas'),
+        total=Coalesce(Sum('total_notas'), 0),
+        **{rango: Coalesce(Sum(campo), 0) for rango, (campo, _) in RANGOS_NOTAS.items()}
+    )
+    total = totales.pop('total')
+    resumen = {
+        'promedio': totales.pop('suma') / total if total else None,
+        'total': total,
+        # Aprobados: los rangos desde NOTA_APROBACION hacia arriba
+        'aprobados': sum(
+            totales[rango] for rango, (_, minimo) in RANGOS_NOTAS.items()
+            if minimo is not None and minimo >= NOTA_APROBACION
+        ),
+        **totales
+    }
+    resumen['tasa_aprobacion'] = round((resumen['aprobados'] / total * 100), 1) if total > 0 else 0
+    return resumen
+
+
+def distribucion_asistencia(fecha):
+    """Registros de asistencia por estado en `fecha`, en una sola consulta"""
+    return Asistencia.objects.filter(fecha=fecha).aggregate(
+        total=Count('id'),
+        **{estado: Count('id', filter=Q(estado=estado)) for estado, _ in Asistencia.ESTADO_CHOICES}
+    )
+
+
+def promedio_general():
+    """Promedio de todas las calificaciones, leído de ResumenPeriodo"""
+    totales = ResumenPeriodo.objects.aggregate(suma=Sum('suma_notas'), total=Sum('total_notas'))
+    if totales['total']:
+        return totales['suma'] / totales['total']
+    return None
+
+
+def promedio_por_curso(periodo=None, grado=None):
+    """
+    Queryset (values) con promedio de notas e inscritos activos por curso.
+
+    Solo incluye cursos con evaluaciones. El promedio se lee de ResumenCurso
+    y los inscritos se cuentan con una subconsulta correlacionada para
+    evitar la multiplicación de filas.
+    """
+    return _cursos(periodo, grado).filter(
+        Exists(Evaluacion.objects.filter(curso=OuterRef('pk')))
+    ).annotate(
+        promedio=expresion_promedio('resumen__'),
+        total_estudiantes=_conteo_por_curso(Inscripcion.objects.filter(activa=True))
+    ).values(
+        *CAMPOS_CURSO, 'profesor__nombres', 'profesor__apellidos',
+        'promedio', 'total_estudiantes'
+    ).order_by(*ORDEN_CURSOS)
+
+
+def anotar_estadisticas_cursos(cursos):
+    """
+    Anota inscritos activos, evaluaciones y promedio de notas por curso.
+
+    Los conteos son subconsultas correlacionadas independientes (sin JOIN
+    entre inscripciones y calificaciones que multiplique filas) y el
+    promedio se lee de ResumenCurso.
+    """
+    return cursos.annotate(
+        total_estudiantes=_conteo_por_curso(Inscripcion.objects.filter(activa=True)),
+        total_evaluaciones=_conteo_por_curso(Evaluacion.objects.all()),
+        promedio_curso=expresion_promedio('resumen__')
+    )
+
+
+def ausentismo_por_curso(periodo=None, grado=None):
+    """Queryset (values) con registros de asistencia y ausencias por curso (ResumenCurso)"""
+    return _cursos(periodo, grado).annotate(
+        total_registros=Coalesce('resumen__total_asistencias', 0),
+        ausencias=Coalesce('resumen__total_ausencias', 0)
+    ).values(*CAMPOS_CURSO, 'total_registros', 'ausencias').order_by(*ORDEN_CURSOS)
+
+
+def tendencia_mensual(desde, grado=None, curso=None):
+    """
+    Promedio de notas y ausentismo por mes desde el mes de `desde`.
+
+    Lee una fila por mes de ResumenMensual (o de la tabla por grado/curso
+    si se filtra), sin importar el volumen histórico de hechos.
+    """
+    if curso is not None:
+        meses = ResumenMensualCurso.objects.filter(curso_id=curso)
+    elif grado is not None:
+        meses = ResumenMensualGrado.objects.filter(grado_id=grado)
+    else:
+        meses = ResumenMensual.objects.all()
+
+    return [
+        {
+            'mes': resumen.mes,
+            'promedio': resumen.promedio,
+            'total_notas': resumen.total_notas,
+            'total_asistencias': resumen.total_asistencias,
+            'porcentaje_ausentes': resumen.porcentaje_ausentes,
+            'porcentaje_ausentismo': resumen.porcentaje_ausentismo,
+        }
+        for resumen in meses.filter(mes__gte=inicio_de_mes(desde)).order_by('mes')
+    ]
+
+
+def formatear_promedio_curso(fila):
+    """Convierte una fila de `promedio_por_curso` al formato de la API"""
+    promedio = fila['promedio']
+    return {
+        'curso_id': fila['id'],
+        'grado': fila['grado__nombre'],
+        'asignatura': fila['asignatura__nombre'],
+        'seccion': fila['seccion'],
+        'profesor': f"{fila['profesor__nombres']} {fila['profesor__apellidos']}",
+        'promedio': round(promedio, 2) if promedio else 0,
+        'total_estudiantes': fila['total_estudiantes']
+    }
+
+
+def formatear_ausentismo_curso(fila):
+    """Convierte una fila de `ausentismo_por_curso` al formato de la API"""
+    total_registros = fila['total_registros']
+    ausencias = fila['ausencias']
+    porcentaje_ausentismo = (ausencias / total_registros * 100) if total_registros > 0 else 0
+    return {
+        'curso_id': fila['id'],
+        'grado': fila['grado__nombre'],
+        'asignatura': fila['asignatura__nombre'],
+        'seccion': fila['seccion'],
+        'total_registros': total_registros,
+        'ausencias': ausencias,
+        'porcentaje_ausentismo': round(porcentaje_ausentismo, 2)
+    }
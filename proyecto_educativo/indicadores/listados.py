@@ -0,0 +1,92 @@
+"""
+Listados paginados de las páginas de gestión
+============================================
+Estudiantes, profesores, apoderados, cursos y evaluaciones se listan por
+páginas (?page=) con búsqueda (?q=), filtros y orden (?orden=) resueltos
+en la base de datos: cada página ejecuta un número constante de consultas
+(conteo + filas) y solo carga las filas que muestra.
+
+La búsqueda y los filtros reutilizan los de las opciones remotas
+(opciones.py); los conteos por fila (alumnos de un curso, calificaciones
+de una evaluación...) son subconsultas correlacionadas anotadas en la
+misma consulta de la página.
+"""
+
+from django.core.paginator import EmptyPage
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .paginacion import PaginadorConteoAproximado
+
+POR_PAGINA = 25
+
+
+def conteo_relacionado(queryset, campo):
+    """Filas de `queryset` cuyo `campo` apunta a la fila externa (0 si no hay)"""
+    conteo = queryset.filter(
+        **{campo: OuterRef('pk')}
+    ).order_by().values(campo).annotate(total=Count('id')).values('total')
+    return Coalesce(Subquery(conteo, output_field=IntegerField()), 0)
+
+
+def _invertir(campo):
+    return campo[1:] if campo.startswith('-') else f'-{campo}'
+
+
+class Listado:
+    """
+    Página de un listado según los parámetros GET.
+
+    `ordenes` mapea cada clave de ?orden= a los campos de order_by (deben
+    terminar en una clave única para que las páginas no se solapen); la
+    primera clave es el orden por defecto y '-clave' lo invierte. `filtrar`
+    recibe (queryset, parámetros) como los filtros de opciones.RECURSOS.
+    """
+
+    def __init__(self, request, queryset, ordenes, filtrar=None, por_pagina=POR_PAGINA):
+        parametros = request.GET
+        self.q = parametros.get('q', '').strip()
+        self.error = None
+        if filtrar is not None:
+            try:
+                queryset = filtrar(queryset, parametros)
+            except ValueError as e:
+                self.error = str(e)
+                queryset = queryset.none()
+
+        self.orden = parametros.get('orden', '')
+        clave = self.orden.lstrip('-')
+        if clave not in ordenes:
+            clave = self.orden = next(iter(ordenes))
+        campos = ordenes[clave]
+        if self.orden.startswith('-'):
+            campos = [_invertir(campo) for campo in campos]
+        queryset = queryset.order_by(*campos)
+
+        paginador = PaginadorConteoAproximado(queryset, por_pagina)
+        try:
+            self.pagina = paginador.get_page(parametros.get('page'))
+        except EmptyPage:
+            # Con conteo aproximado una página fuera de rango se detecta al leerla
+            self.pagina = paginador.page(1)
+
+        # Parámetros a conservar en los enlaces de página, de orden y en la búsqueda
+        conservados = parametros.copy()
+        conservados.pop('page', None)
+        self.prefijo_pagina = f'{conservados.urlencode()}&' if conservados else ''
+        self.enlaces_orden = {}
+        for opcion in ordenes:
+            enlace = conservados.copy()
+            enlace['orden'] = f'-{opcion}' if self.orden == opcion else opcion
+            self.enlaces_orden[opcion] = enlace.urlencode()
+        self.filtros_ocultos = [
+            (nombre, valor) for nombre, valor in conservados.items() if nombre != 'q'
+        ]
+
+    @property
+    def total(self):
+        return self.pagina.paginator.count
+
+    @property
+    def aproximado(self):
+        return self.pagina.paginator.aproximado
@@ -0,0 +1,141 @@
+"""
+Listados rápidos de solo lectura
+================================
+Construyen las filas de los listados de alto volumen (calificaciones,
+asistencia, inscripciones) directamente desde `.values()`, sin instanciar
+modelos ni recorrer los campos del serializer fila por fila.
+
+El JSON resultante es idéntico al de los serializers: los textos derivados
+(`curso_info`, `*_display`) se precalculan una vez por página y los valores
+con formato (decimales, fechas) pasan por el `to_representation` del mismo
+campo del serializer.
+"""
+
+from collections import namedtuple
+
+from .models import Curso, Evaluacion, Asistencia
+from .serializers import CalificacionSerializer, AsistenciaSerializer, InscripcionSerializer
+
+# campos: argumentos de `.values()`; construir: dicts de values -> filas JSON
+ListaRapida = namedtuple('ListaRapida', 'campos construir')
+
+
+def _representacion(serializer_class, nombre):
+    """`to_representation` del campo `nombre` del serializer (mismo formato de salida)"""
+    return serializer_class().fields[nombre].to_representation
+
+
+def etiquetas_cursos(ids):
+    """{curso_id: str(curso)} para los cursos indicados, en una consulta"""
+    if not ids:
+        return {}
+    return {
+        curso.id: str(curso)
+        for curso in Curso.objects.filter(id__in=ids).select_related(*Curso.RELACIONES_STR).order_by()
+    }
+
+
+def _nombre(fila, prefijo='estudiante__'):
+    return f"{fila[prefijo + 'nombres']} {fila[prefijo + 'apellidos']}"
+
+
+# ============================================
+# CALIFICACIONES
+# ============================================
+
+def _construir_calificaciones(filas):
+    nota = _representacion(CalificacionSerializer, 'nota')
+    fecha_registro = _representacion(CalificacionSerializer, 'fecha_registro')
+    tipos = dict(Evaluacion.TIPO_CHOICES)
+    cursos = etiquetas_cursos({fila['evaluacion__curso_id'] for fila in filas})
+    return [
+        {
+            'id': fila['id'],
+            'evaluacion': fila['evaluacion_id'],
+            'evaluacion_nombre': fila['evaluacion__nombre'],
+            'evaluacion_tipo': tipos.get(fila['evaluacion__tipo'], fila['evaluacion__tipo']),
+            'curso_info': cursos[fila['evaluacion__curso_id']],
+            'estudiante': fila['estudiante_id'],
+            'estudiante_nombre': _nombre(fila),
+            'estudiante_ci': fila['estudiante__ci'],
+            'nota': nota(fila['nota']),
+            'fecha_registro': fecha_registro(fila['fecha_registro']),
+            'observaciones': fila['observaciones'],
+        }
+        for fila in filas
+    ]
+
+
+CALIFICACIONES = ListaRapida(
+    campos=[
+        'id', 'evaluacion_id', 'evaluacion__nombre', 'evaluacion__tipo', 'evaluacion__curso_id',
+        'estudiante_id', 'estudiante__nombres', 'estudiante__apellidos', 'estudiante__ci',
+        'nota', 'fecha_registro', 'observaciones'
+    ],
+    construir=_construir_calificaciones
+)
+
+
+# ============================================
+# ASISTENCIA
+# ============================================
+
+def _construir_asistencia(filas):
+    fecha = _representacion(AsistenciaSerializer, 'fecha')
+    estados = dict(Asistencia.ESTADO_CHOICES)
+    cursos = etiquetas_cursos({fila['curso_id'] for fila in filas})
+    return [
+        {
+            'id': fila['id'],
+            'estudiante': fila['estudiante_id'],
+            'estudiante_nombre': _nombre(fila),
+            'estudiante_ci': fila['estudiante__ci'],
+            'curso': fila['curso_id'],
+            'curso_info': cursos[fila['curso_id']],
+            'fecha': fecha(fila['fecha']),
+            'estado': fila['estado'],
+            'estado_display': estados.get(fila['estado'], fila['estado']),
+            'observaciones': fila['observaciones'],
+        }
+        for fila in filas
+    ]
+
+
+ASISTENCIA = ListaRapida(
+    campos=[
+        'id', 'estudiante_id', 'estudiante__nombres', 'estudiante__apellidos', 'estudiante__ci',
+        'curso_id', 'fecha', 'estado', 'observaciones'
+    ],
+    construir=_construir_asistencia
+)
+
+
+# ============================================
+# INSCRIPCIONES
+# ============================================
+
+def _construir_inscripciones(filas):
+    fecha_inscripcion = _representacion(InscripcionSerializer, 'fecha_inscripcion')
+    cursos = etiquetas_cursos({fila['curso_id'] for fila in filas})
+    return [
+        {
+            'id': fila['id'],
+            'estudiante': fila['estudiante_id'],
+            'estudiante_nombre': _nombre(fila),
+            'estudiante_ci': fila['estudiante__ci'],
+            'curso': fila['curso_id'],
+            'curso_info': cursos[fila['curso_id']],
+            'fecha_inscripcion': fecha_inscripcion(fila['fecha_inscripcion']),
+            'activa': fila['activa'],
+        }
+        for fila in filas
+    ]
+
+
+INSCRIPCIONES = ListaRapida(
+    campos=[
+        'id', 'estudiante_id', 'estudiante__nombres', 'estudiante__apellidos', 'estudiante__ci',
+        'curso_id', 'fecha_inscripcion', 'activa'
+    ],
+    construir=_construir_inscripciones
+)
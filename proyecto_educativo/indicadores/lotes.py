@@ -0,0 +1,344 @@
+"""
+Altas en lote
+=============
+Registran muchas filas de hechos en un único POST: la validación de
+claves, inscripciones y duplicados se hace para todo el lote con consultas
+por conjuntos, la escritura con `bulk_create` y los resúmenes de KPIs se
+actualizan con `resumenes.actualizar_lote` (bulk_create no dispara señales).
+
+Si algún ítem es inválido no se escribe nada y los errores se devuelven
+por posición, {índice: {campo: [mensajes]}} solo para los ítems inválidos,
+igual que los de un ListSerializer de DRF.
+
+Los lotes que se reintentan (tablets sin conexión estable) pueden traer una
+clave de idempotencia: un lote ya procesado con la misma clave devuelve el
+resultado guardado sin volver a escribir (ver `procesar_una_vez`).
+"""
+
+import hashlib
+import json
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, FilteredRelation, Q
+
+from . import resumenes
+from .models import Asistencia, Calificacion, Estudiante, Evaluacion, Inscripcion, LoteProcesado
+
+TAMANO_MAXIMO_LOTE = 1000
+
+
+class ClaveReutilizada(Exception):
+    """La clave de idempotencia ya se usó con un lote distinto"""
+
+
+class ErrorLote(Exception):
+    """Errores por ítem de un lote ({índice: {campo: [mensajes]}})"""
+
+    def __init__(self, errores):
+        super().__init__(errores)
+        self.errores = errores
+
+
+def _agregar(errores, i, campo, mensaje):
+    errores.setdefault(i, {}).setdefault(campo, []).append(mensaje)
+
+
+# ============================================
+# CALIFICACIONES
+# ============================================
+
+def validar_calificaciones(items, actualizar=False):
+    """
+    Valida claves, inscripción y duplicados de un lote ya validado por
+    `CalificacionLoteSerializer`. Tres consultas, sea cual sea el tamaño.
+
+    Devuelve ({evaluacion_id: (curso_id, periodo_id, grado_id)},
+    {(evaluacion_id, estudiante_id): (nota, observaciones, fecha_registro)}
+    de las calificaciones ya registradas). Las ya registradas son un error
+    salvo con `actualizar`. Lanza ErrorLote si algún ítem es inválido.
+
+    Se llama dentro de una transacción: bloquea las inscripciones y las
+    calificaciones leídas hasta que se escriba el lote (como
+    `registrar_asistencia`), para que dos lotes sobre las mismas claves no
+    cuenten la misma calificación como nueva.
+    """
+    errores = {}
+    evaluaciones = {
+        fila[0]: fila[1:] for fila in Evaluacion.objects.filter(
+            id__in={item['evaluacion'] for item in items}
+        ).order_by().values_list('id', 'curso_id', 'curso__periodo_academico_id', 'curso__grado_id')
+    }
+    estudiantes = {item['estudiante'] for item in items}
+    inscritos = set(Inscripcion.objects.filter(
+        estudiante_id__in=estudiantes,
+        curso_id__in={curso for curso, _, _ in evaluaciones.values()},
+        activa=True
+    ).select_for_update().order_by('id').values_list('estudiante_id', 'curso_id'))
+    existentes = {
+        fila[:2]: fila[2:] for fila in Calificacion.objects.filter(
+            evaluacion_id__in=evaluaciones, estudiante_id__in=estudiantes
+        ).select_for_update().order_by('id').values_list(
+            'evaluacion_id', 'estudiante_id', 'nota', 'observaciones', 'fecha_registro'
+        )
+    }
+
+    vistos = set()
+    for i, item in enumerate(items):
+        par = (item['evaluacion'], item['estudiante'])
+        if item['evaluacion'] not in evaluaciones:
+            _agregar(errores, i, 'evaluacion', f"La evaluación {item['evaluacion']} no existe.")
+            continue
+        if (item['estudiante'], evaluaciones[item['evaluacion']][0]) not in inscritos:
+            _agregar(errores, i, 'estudiante',
+                     f"El estudiante {item['estudiante']} no tiene inscripción activa en el curso de la evaluación.")
+        if par in existentes and not actualizar:
+            _agregar(errores, i, 'non_field_errors', 'Ya existe una calificación para esta evaluación y estudiante.')
+        elif par in vistos:
+            _agregar(errores, i, 'non_field_errors', 'Calificación repetida dentro del lote.')
+        vistos.add(par)
+
+    if errores:
+        raise ErrorLote(errores)
+    return evaluaciones, existentes
+
+
+def _hechos_calificacion(evaluaciones, evaluacion_id, estudiante_id, fecha_registro):
+    curso_id, periodo_id, grado_id = evaluaciones[evaluacion_id]
+    return {
+        'estudiante_id': estudiante_id, 'curso_id': curso_id,
+        'periodo_id': periodo_id, 'grado_id': grado_id,
+        'mes': resumenes.inicio_de_mes(fecha_registro),
+    }
+
+
+def crear_calificaciones(items):
+    """
+    Crea las calificaciones de `items` (dicts con evaluacion, estudiante,
+    nota y observaciones) con un solo INSERT y devuelve sus ids.
+    """
+    with transaction.atomic():
+        evaluaciones, _ = validar_calificaciones(items)
+        calificaciones = Calificacion.objects.bulk_create([
+            Calificacion(
+                evaluacion_id=item['evaluacion'], estudiante_id=item['estudiante'],
+                nota=item['nota'], observaciones=item.get('observaciones', '')
+            )
+            for item in items
+        ])
+        resumenes.actualizar_lote(
+            (
+                _hechos_calificacion(evaluaciones, c.evaluacion_id, c.estudiante_id, c.fecha_registro),
+                resumenes.aporte_calificacion(c.nota)
+            )
+            for c in calificaciones
+        )
+    return [calificacion.pk for calificacion in calificaciones]
+
+
+def registrar_calificaciones(items):
+    """
+    Inserta o actualiza (nota, observaciones) de las calificaciones de
+    `items` con un INSERT ... ON CONFLICT DO UPDATE sobre (evaluacion,
+    estudiante); p. ej. la planilla de notas de una evaluación.
+
+    Igual que `registrar_asistencia`: sin 'observaciones' se conservan las
+    registradas y devuelve {'insertadas', 'actualizadas', 'sin_cambios'}.
+    """
+    with transaction.atomic():
+        evaluaciones, existentes = validar_calificaciones(items, actualizar=True)
+        escribir, anteriores = [], []
+        for item in items:
+            anterior = existentes.get((item['evaluacion'], item['estudiante']))
+            observaciones = item['observaciones'] if 'observaciones' in item else (anterior[1] if anterior else '')
+            if anterior is not None and (anterior[0], anterior[1]) == (item['nota'], observaciones):
+                continue
+            escribir.append(Calificacion(
+                evaluacion_id=item['evaluacion'], estudiante_id=item['estudiante'],
+                nota=item['nota'], observaciones=observaciones
+            ))
+            anteriores.append(anterior)
+
+        if escribir:
+            Calificacion.objects.bulk_create(
+                escribir, update_conflicts=True,
+                unique_fields=['evaluacion', 'estudiante'], update_fields=['nota', 'observaciones']
+            )
+            contribuciones = []
+            for calificacion, anterior in zip(escribir, anteriores):
+                aporte = resumenes.aporte_calificacion(calificacion.nota)
+                if anterior is not None:
+                    previo = resumenes.aporte_calificacion(anterior[0])
+                    # Cambiar de rango resta del anterior y suma al nuevo
+                    aporte = {nombre: aporte.get(nombre, 0) - previo.get(nombre, 0) for nombre in aporte.keys() | previo.keys()}
+                # La fecha de registro (y su mes) es la de la calificación original
+                fecha_registro = anterior[2] if anterior is not None else calificacion.fecha_registro
+                contribuciones.append((
+                    _hechos_calificacion(evaluaciones, calificacion.evaluacion_id, calificacion.estudiante_id, fecha_registro),
+                    aporte
+                ))
+            resumenes.actualizar_lote(contribuciones)
+    insertadas = sum(1 for anterior in anteriores if anterior is None)
+    return {
+        'insertadas': insertadas,
+        'actualizadas': len(escribir) - insertadas,
+        'sin_cambios': len(items) - len(escribir),
+    }
+
+
+def planilla_calificaciones(evaluacion):
+    """
+    Estudiantes con inscripción activa en el curso de `evaluacion` y su
+    calificación en ella, si la tienen (una consulta con LEFT JOIN).
+    """
+    return list(
+        Estudiante.objects.filter(inscripcion__curso_id=evaluacion.curso_id, inscripcion__activa=True)
+        .annotate(calificacion_evaluacion=FilteredRelation(
+            'calificacion', condition=Q(calificacion__evaluacion_id=evaluacion.id)
+        ))
+        .order_by('apellidos', 'nombres', 'id')
+        .values(
+            'id', 'nombres', 'apellidos', 'ci',
+            nota=F('calificacion_evaluacion__nota'),
+            observaciones=F('calificacion_evaluacion__observaciones'),
+        )
+    )
+
+
+# ============================================
+# ASISTENCIA (UPSERT)
+# ============================================
+
+CLAVE_ASISTENCIA = ['estudiante', 'curso', 'fecha']
+
+
+def _hechos_asistencia(clave, cursos):
+    estudiante_id, curso_id, fecha = clave
+    periodo_id, grado_id = cursos[curso_id]
+    return {
+        'estudiante_id': estudiante_id, 'curso_id': curso_id, 'periodo_id': periodo_id,
+        'grado_id': grado_id, 'mes': resumenes.inicio_de_mes(fecha),
+    }
+
+
+def registrar_asistencia(items):
+    """
+    Inserta o actualiza (estado, observaciones) de los registros de
+    asistencia de `items` con un INSERT ... ON CONFLICT DO UPDATE sobre
+    (estudiante, curso, fecha).
+
+    Los registros que ya tienen los mismos valores no se escriben; si un
+    ítem no trae 'observaciones' se conservan las del registro existente.
+    Devuelve {'insertadas', 'actualizadas', 'sin_cambios'}.
+
+    Los deltas de los resúmenes dependen de qué registros ya existían, así
+    que dos lotes concurrentes sobre las mismas claves no pueden leerlos a
+    la vez: se bloquean (SELECT ... FOR UPDATE, en orden de id) las
+    inscripciones del lote, que todo ítem válido necesita aunque su
+    registro aún no exista, y los registros existentes. El segundo lote
+    espera al primero y lee sus filas ya confirmadas.
+    """
+    errores = {}
+    with transaction.atomic():
+        estudiantes = {item['estudiante'] for item in items}
+        cursos_lote = {item['curso'] for item in items}
+        inscritos = {
+            (estudiante_id, curso_id): (periodo_id, grado_id)
+            for estudiante_id, curso_id, periodo_id, grado_id in Inscripcion.objects.filter(
+                estudiante_id__in=estudiantes, curso_id__in=cursos_lote, activa=True
+            ).select_for_update(of=('self',)).order_by('id').values_list(
+                'estudiante_id', 'curso_id', 'curso__periodo_academico_id', 'curso__grado_id'
+            )
+        }
+        existentes = {
+            fila[:3]: fila[3:] for fila in Asistencia.objects.filter(
+                estudiante_id__in=estudiantes, curso_id__in=cursos_lote,
+                fecha__in={item['fecha'] for item in items}
+            ).select_for_update().order_by('id').values_list(
+                'estudiante_id', 'curso_id', 'fecha', 'estado', 'observaciones'
+            )
+        }
+
+        vistas = set()
+        for i, item in enumerate(items):
+            clave = (item['estudiante'], item['curso'], item['fecha'])
+            if clave[:2] not in inscritos:
+                _agregar(errores, i, 'estudiante',
+                         f"El estudiante {item['estudiante']} no tiene inscripción activa en el curso {item['curso']}.")
+            if clave in vistas:
+                _agregar(errores, i, 'non_field_errors', 'Registro repetido dentro del lote (estudiante, curso, fecha).')
+            vistas.add(clave)
+        if errores:
+            raise ErrorLote(errores)
+
+        cursos = {curso_id: datos for (_, curso_id), datos in inscritos.items()}
+        escribir, contribuciones = [], []
+        insertadas = actualizadas = 0
+        for item in items:
+            clave = (item['estudiante'], item['curso'], item['fecha'])
+            anterior = existentes.get(clave)
+            # Sin 'observaciones' en el ítem se conservan las ya registradas
+            observaciones = item['observaciones'] if 'observaciones' in item else (anterior[1] if anterior else '')
+            nuevo = (item['estado'], observaciones)
+            if anterior == nuevo:
+                continue
+            aporte = resumenes.aporte_asistencia(nuevo[0])
+            if anterior is None:
+                insertadas += 1
+            else:
+                actualizadas += 1
+                previo = resumenes.aporte_asistencia(anterior[0])
+                aporte = {nombre: valor - previo[nombre] for nombre, valor in aporte.items()}
+            contribuciones.append((_hechos_asistencia(clave, cursos), aporte))
+            escribir.append(Asistencia(
+                estudiante_id=clave[0], curso_id=clave[1], fecha=clave[2],
+                estado=nuevo[0], observaciones=nuevo[1]
+            ))
+
+        if escribir:
+            Asistencia.objects.bulk_create(
+                escribir, update_conflicts=True,
+                unique_fields=CLAVE_ASISTENCIA, update_fields=['estado', 'observaciones']
+            )
+            resumenes.actualizar_lote(contribuciones)
+    return {'insertadas': insertadas, 'actualizadas': actualizadas, 'sin_cambios': len(items) - len(escribir)}
+
+
+# ============================================
+# IDEMPOTENCIA
+# ============================================
+
+def huella(contenido):
+    """SHA-256 de la representación JSON canónica de `contenido`"""
+    texto = json.dumps(contenido, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def procesar_una_vez(recurso, clave, contenido, procesar):
+    """
+    Ejecuta `procesar()` una sola vez por clave de idempotencia.
+
+    Devuelve (resultado, repetido). Un reintento con la misma clave y el
+    mismo contenido devuelve el resultado guardado con una sola consulta;
+    con otro contenido lanza ClaveReutilizada. El registro de la clave y
+    las escrituras del lote se confirman en la misma transacción.
+    """
+    firma = huella(contenido)
+
+    def previo(lote):
+        if lote.recurso != recurso or lote.huella != firma:
+            raise ClaveReutilizada(clave)
+        return lote.resultado, True
+
+    lote = LoteProcesado.objects.filter(clave=clave).first()
+    if lote is not None:
+        return previo(lote)
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                lote = LoteProcesado.objects.create(clave=clave, recurso=recurso, huella=firma)
+        except IntegrityError:
+            # Otro reintento concurrente registró la clave primero
+            return previo(LoteProcesado.objects.get(clave=clave))
+        lote.resultado = procesar()
+        lote.save(update_fields=['resultado'])
+    return lote.resultado, False
@@ -0,0 +1,51 @@
+"""
+Management command para recalcular notas finales ponderadas
+===========================================================
+Calcula en lote (pandas/NumPy) la nota final de cada estudiante × curso
+usando Evaluacion.ponderacion y reemplaza las filas de NotaFinal.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from indicadores.models import PeriodoAcademico
+from indicadores.notas_finales import FALTANTES, refrescar_notas_finales
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las notas finales ponderadas de uno o más períodos académicos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--periodo',
+            type=int,
+            action='append',
+            help='Id del período (repetible). Por defecto, los períodos activos',
+        )
+        parser.add_argument('--curso', type=int, help='Limitar a un curso')
+        parser.add_argument('--grado', type=int, help='Limitar a un grado')
+        parser.add_argument(
+            '--faltantes',
+            choices=FALTANTES,
+            default='cero',
+            help="Evaluaciones no rendidas: 'cero' cuenta 0, 'omitir' renormaliza",
+        )
+
+    def handle(self, *args, **options):
+        periodos = options['periodo'] or list(
+            PeriodoAcademico.objects.filter(activo=True).values_list('id', flat=True)
+        )
+        if not periodos:
+            raise CommandError('No hay períodos activos; indique --periodo')
+
+        for periodo in periodos:
+            inicio = time.perf_counter()
+            total = refrescar_notas_finales(
+                periodo, curso=options['curso'], grado=options['grado'],
+                faltantes=options['faltantes']
+            )
+            segundos = time.perf_counter() - inicio
+            self.stdout.write(self.style.SUCCESS(
+                f'  ✓ Período {periodo}: {total} notas finales en {segundos:.2f}s'
+            ))
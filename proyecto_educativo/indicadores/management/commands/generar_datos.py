@@ -1,20 +1,141 @@
 """
 Management command para generar datos de prueba
 ================================================
-Crea datos ficticios pero realistas para poblar el sistema
+Crea datos ficticios pero realistas para poblar el sistema, desde la demo
+(30 estudiantes) hasta un distrito completo (100.000 estudiantes y decenas
+de millones de asistencias) para reproducir la carga de producción:
+
+    python manage.py generar_datos --reset
+    python manage.py generar_datos --reset --scale distrito
+    python manage.py generar_datos --reset --students 5000 --days 60 --seed 7
+
+Los datos dependen solo de las opciones: la misma semilla (--seed) con las
+mismas cantidades genera exactamente las mismas filas. Cada fase usa su
+propio generador aleatorio, de modo que cambiar --days no altera las notas.
+
+Todas las filas se insertan con `bulk_create` por lotes (--batch) sin
+consultas por fila: los cursos de cada estudiante se resuelven en memoria.
+Como `bulk_create` no dispara señales, al terminar se reconstruyen los
+resúmenes de KPIs, el índice de búsqueda y las notas finales del período.
+Sin --reset las filas que ya existen se conservan (ignore_conflicts).
 """
 
-from django.core.management.base import BaseCommand
-from django.utils import timezone
+import random
+import time
+from collections import namedtuple
 from datetime import date, timedelta
 from decimal import Decimal
-import random
 
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection
+
+from indicadores import busqueda, cache_kpis, resumenes
 from indicadores.models import (
     Grado, Asignatura, PeriodoAcademico, Profesor, Estudiante,
     Apoderado, Curso, Inscripcion, EstudianteApoderado,
     Evaluacion, Calificacion, Asistencia
 )
+from indicadores.notas_finales import refrescar_notas_finales
+
+Escala = namedtuple('Escala', 'estudiantes dias')
+
+ESCALAS = {
+    'demo': Escala(estudiantes=30, dias=20),
+    'colegio': Escala(estudiantes=1_500, dias=60),
+    # 100.000 × 7 asignaturas × 40 días = 28 millones de asistencias
+    'distrito': Escala(estudiantes=100_000, dias=40),
+}
+
+ESTUDIANTES_POR_SECCION = 30
+CURSOS_POR_PROFESOR = 6
+EVALUACIONES_POR_CURSO = 3
+CI_ESTUDIANTES = 10_000_000
+CI_APODERADOS = 20_000_000
+INTERVALO_PROGRESO = 5
+
+GRADOS = [
+    ('1° Primaria', 'Primer año de primaria'),
+    ('2° Primaria', 'Segundo año de primaria'),
+    ('3° Primaria', 'Tercer año de primaria'),
+    ('4° Primaria', 'Cuarto año de primaria'),
+    ('5° Primaria', 'Quinto año de primaria'),
+    ('6° Primaria', 'Sexto año de primaria'),
+]
+
+ASIGNATURAS = [
+    ('MAT', 'Matemáticas', 'Cálculo y álgebra básica'),
+    ('LEN', 'Lenguaje', 'Lectura y escritura'),
+    ('CIE', 'Ciencias Naturales', 'Biología, física y química'),
+    ('SOC', 'Ciencias Sociales', 'Historia y geografía'),
+    ('EDF', 'Educación Física', 'Deportes y actividad física'),
+    ('ART', 'Artes', 'Música y artes plásticas'),
+    ('ING', 'Inglés', 'Idioma extranjero'),
+]
+
+NOMBRES_MASCULINOS = ['Juan', 'Carlos', 'Pedro', 'Luis', 'Miguel', 'José', 'Diego', 'Andrés', 'Daniel', 'Fernando']
+NOMBRES_FEMENINOS = ['María', 'Ana', 'Laura', 'Carmen', 'Isabel', 'Patricia', 'Sandra', 'Lucía', 'Elena', 'Rosa']
+APELLIDOS = [
+    'García', 'López', 'Martínez', 'González', 'Rodríguez', 'Fernández', 'Pérez', 'Sánchez',
+    'Torres', 'Ramírez', 'Flores', 'Vega', 'Silva', 'Cruz', 'Ortiz', 'Mamani', 'Quispe',
+    'Rojas', 'Vargas', 'Gutiérrez',
+]
+CALLES = ['Los Pinos', 'Las Rosas', 'El Sol', 'La Luna']
+TIPOS_EVALUACION = ['examen', 'tarea', 'proyecto', 'practica']
+PARENTESCOS = ['madre', 'padre', 'madre', 'padre', 'tutor', 'abuelo']
+
+
+def _seccion(indice):
+    """'A', 'B', ..., 'Z', 'AA', 'AB', ... (como columnas de una planilla)"""
+    letras = ''
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(ord('A') + resto) + letras
+    return letras
+
+
+def _dias_habiles(desde, hasta, cantidad):
+    """Los primeros `cantidad` días de lunes a viernes entre `desde` y `hasta`"""
+    dias, fecha = [], desde
+    while len(dias) < cantidad and fecha <= hasta:
+        if fecha.weekday() < 5:
+            dias.append(fecha)
+        fecha += timedelta(days=1)
+    return dias
+
+
+def _correo(*partes):
+    return '.'.join(''.join(busqueda.normalizar(parte)) for parte in partes)
+
+
+class Progreso:
+    """Avance de una carga por lotes (a lo sumo una línea cada INTERVALO_PROGRESO segundos)"""
+
+    def __init__(self, comando, etiqueta, total):
+        self.comando = comando
+        self.etiqueta = etiqueta
+        self.total = total
+        self.filas = 0
+        self.inicio = self.ultimo = time.perf_counter()
+
+    def avanzar(self, filas):
+        self.filas += filas
+        ahora = time.perf_counter()
+        if ahora - self.ultimo >= INTERVALO_PROGRESO:
+            self.ultimo = ahora
+            porcentaje = 100 * self.filas / self.total if self.total else 100
+            self.comando.stdout.write(
+                f'  … {self.etiqueta}: {self.filas:,}/{self.total:,} ({porcentaje:.0f}%) '
+                f'{self.filas / (ahora - self.inicio):,.0f} filas/s'
+            )
+
+    def terminar(self):
+        segundos = time.perf_counter() - self.inicio
+        self.comando.stdout.write(self.comando.style.SUCCESS(
+            f'  ✓ {self.filas:,} {self.etiqueta} en {segundos:.1f}s'
+        ))
 
 
 class Command(BaseCommand):
@@ -24,66 +145,57 @@ class Command(BaseCommand):
         parser.add_argument(
             '--reset',
             action='store_true',
-            help='Elimina todos los datos antes de generar nuevos',
+            help='Vacía (TRUNCATE) las tablas de la app antes de generar nuevos datos',
+        )
+        parser.add_argument(
+            '--scale',
+            choices=list(ESCALAS),
+            default='demo',
+            help='Tamaño predefinido: ' + ', '.join(
+                f'{nombre} ({escala.estudiantes:,} estudiantes, {escala.dias} días)'
+                for nombre, escala in ESCALAS.items()
+            ),
         )
+        parser.add_argument('--students', type=int, help='Cantidad de estudiantes (reemplaza la de --scale)')
+        parser.add_argument('--days', type=int, help='Días hábiles de asistencia (reemplaza los de --scale)')
+        parser.add_argument('--seed', type=int, default=2025, help='Semilla aleatoria (por defecto 2025)')
+        parser.add_argument('--batch', type=int, default=5000, help='Filas por bulk_create (por defecto 5000)')
 
     def handle(self, *args, **options):
+        escala = ESCALAS[options['scale']]
+        total_estudiantes = escala.estudiantes if options['students'] is None else options['students']
+        total_dias = escala.dias if options['days'] is None else options['days']
+        if total_estudiantes < 1 or total_dias < 0 or options['batch'] < 1:
+            raise CommandError('--students y --batch deben ser positivos y --days no negativo')
+        self.semilla = options['seed']
+        self.tamano_lote = options['batch']
+        inicio = time.perf_counter()
+
         if options['reset']:
-            self.stdout.write('Eliminando datos existentes...')
-            Asistencia.objects.all().delete()
-            Calificacion.objects.all().delete()
-            Evaluacion.objects.all().delete()
-            EstudianteApoderado.objects.all().delete()
-            Inscripcion.objects.all().delete()
-            Curso.objects.all().delete()
-            Apoderado.objects.all().delete()
-            Estudiante.objects.all().delete()
-            Profesor.objects.all().delete()
-            PeriodoAcademico.objects.all().delete()
-            Asignatura.objects.all().delete()
-            Grado.objects.all().delete()
+            self.stdout.write('Vaciando tablas...')
+            self.vaciar()
             self.stdout.write(self.style.SUCCESS('✓ Datos eliminados'))
 
-        self.stdout.write('Generando datos de prueba...\n')
-
-        # 1. Grados
-        self.stdout.write('Creando grados...')
-        grados_data = [
-            ('1° Primaria', 'Primer año de primaria'),
-            ('2° Primaria', 'Segundo año de primaria'),
-            ('3° Primaria', 'Tercer año de primaria'),
-            ('4° Primaria', 'Cuarto año de primaria'),
-            ('5° Primaria', 'Quinto año de primaria'),
-            ('6° Primaria', 'Sexto año de primaria'),
-        ]
-        grados = []
-        for nombre, desc in grados_data:
-            grado, _ = Grado.objects.get_or_create(nombre=nombre, defaults={'descripcion': desc})
-            grados.append(grado)
-        self.stdout.write(self.style.SUCCESS(f'  ✓ {len(grados)} grados creados'))
-
-        # 2. Asignaturas
-        self.stdout.write('Creando asignaturas...')
-        asignaturas_data = [
-            ('MAT', 'Matemáticas', 'Cálculo y álgebra básica'),
-            ('LEN', 'Lenguaje', 'Lectura y escritura'),
-            ('CIE', 'Ciencias Naturales', 'Biología, física y química'),
-            ('SOC', 'Ciencias Sociales', 'Historia y geografía'),
-            ('EDF', 'Educación Física', 'Deportes y actividad física'),
-            ('ART', 'Artes', 'Música y artes plásticas'),
-            ('ING', 'Inglés', 'Idioma extranjero'),
-        ]
-        asignaturas = []
-        for codigo, nombre, desc in asignaturas_data:
-            asig, _ = Asignatura.objects.get_or_create(
-                codigo=codigo, 
-                defaults={'nombre': nombre, 'descripcion': desc}
-            )
-            asignaturas.append(asig)
-        self.stdout.write(self.style.SUCCESS(f'  ✓ {len(asignaturas)} asignaturas creadas'))
+        self.stdout.write(
+            f'Generando {total_estudiantes:,} estudiantes y {total_dias} días de asistencia '
+            f'(semilla {self.semilla})...\n'
+        )
 
-        # 3. Periodo Académico
-        self.stdout.write('Creando periodo académico...')
+        # 1. Dimensiones fijas
+        Grado.objects.bulk_create(
+            [Grado(nombre=nombre, descripcion=desc) for nombre, desc in GRADOS],
+            ignore_conflicts=True
+        )
+        grados = dict(Grado.objects.filter(nombre__in=[g[0] for g in GRADOS]).values_list('nombre', 'id'))
+        grados = [grados[nombre] for nombre, _ in GRADOS]
+        Asignatura.objects.bulk_create(
+            [Asignatura(codigo=codigo, nombre=nombre, descripcion=desc) for codigo, nombre, desc in ASIGNATURAS],
+            ignore_conflicts=True
+        )
+        asignaturas = dict(Asignatura.objects.filter(
+            codigo__in=[a[0] for a in ASIGNATURAS]
+        ).values_list('codigo', 'id'))
+        asignaturas = [asignaturas[codigo] for codigo, _, _ in ASIGNATURAS]
         periodo, _ = PeriodoAcademico.objects.get_or_create(
             nombre='Primer Semestre 2025',
             defaults={
@@ -92,186 +204,92 @@ class Command(BaseCommand):
                 'activo': True
             }
         )
-        self.stdout.write(self.style.SUCCESS(f'  ✓ Periodo académico creado: {periodo}'))
-
-        # 4. Profesores
-        self.stdout.write('Creando profesores...')
-        profesores_data = [
-            ('Juan', 'Pérez García', 'juan.perez@colegio.edu', '77123456', 'Matemáticas'),
-            ('María', 'López Silva', 'maria.lopez@colegio.edu', '77234567', 'Lenguaje'),
-            ('Carlos', 'González Rojas', 'carlos.gonzalez@colegio.edu', '77345678', 'Ciencias'),
-            ('Ana', 'Martínez Vega', 'ana.martinez@colegio.edu', '77456789', 'Sociales'),
-            ('Pedro', 'Sánchez Torres', 'pedro.sanchez@colegio.edu', '77567890', 'Educación Física'),
-            ('Laura', 'Fernández Cruz', 'laura.fernandez@colegio.edu', '77678901', 'Artes'),
-            ('Diego', 'Rodríguez Ortiz', 'diego.rodriguez@colegio.edu', '77789012', 'Inglés'),
-        ]
-        profesores = []
-        for nombres, apellidos, email, tel, esp in profesores_data:
-            prof, _ = Profesor.objects.get_or_create(
-                email=email,
-                defaults={
-                    'nombres': nombres,
-                    'apellidos': apellidos,
-                    'telefono': tel,
-                    'especialidad': esp,
-                    'activo': True
-                }
+        dias = _dias_habiles(periodo.fecha_inicio, periodo.fecha_fin, total_dias)
+        if len(dias) < total_dias:
+            raise CommandError(f'El período {periodo} solo tiene {len(dias)} días hábiles')
+        self.stdout.write(self.style.SUCCESS(
+            f'  ✓ {len(grados)} grados, {len(asignaturas)} asignaturas, período {periodo}'
+        ))
+
+        # 2. Estudiantes: el i-ésimo va al grado i % 6, en secciones de 30
+        perfiles = self.generar_estudiantes(total_estudiantes, len(grados))
+        ids_estudiantes = dict(Estudiante.objects.filter(
+            ci__gte=str(CI_ESTUDIANTES), ci__lt=str(CI_ESTUDIANTES + total_estudiantes)
+        ).values_list('ci', 'id'))
+        ids_estudiantes = [ids_estudiantes[str(CI_ESTUDIANTES + i)] for i in range(total_estudiantes)]
+        self.generar_apoderados(ids_estudiantes)
+        # {(grado, sección): índices de sus estudiantes}
+        secciones = {}
+        for i in range(total_estudiantes):
+            g = i % len(grados)
+            secciones.setdefault((g, _seccion(i // len(grados) // ESTUDIANTES_POR_SECCION)), []).append(i)
+
+        # 3. Cursos: cada asignatura en cada sección; un profesor por cada 6 cursos de su asignatura
+        cursos_por_asignatura = len(secciones)
+        profesores_por_asignatura = -(-cursos_por_asignatura // CURSOS_POR_PROFESOR)
+        ids_profesores = self.generar_profesores(profesores_por_asignatura)
+        planes = [(a, g, seccion) for a in range(len(asignaturas)) for g, seccion in secciones]
+        self.insertar(Curso, (
+            Curso(
+                grado_id=grados[g], asignatura_id=asignaturas[a], periodo_academico=periodo, seccion=seccion,
+                profesor_id=ids_profesores[a * profesores_por_asignatura + n % cursos_por_asignatura // CURSOS_POR_PROFESOR]
             )
-            profesores.append(prof)
-        self.stdout.write(self.style.SUCCESS(f'  ✓ {len(profesores)} profesores creados'))
-
-        # 5. Estudiantes
-        self.stdout.write('Creando estudiantes...')
-        nombres_masculinos = ['Juan', 'Carlos', 'Pedro', 'Luis', 'Miguel', 'José', 'Diego', 'Andrés', 'Daniel', 'Fernando']
-        nombres_femeninos = ['María', 'Ana', 'Laura', 'Carmen', 'Isabel', 'Patricia', 'Sandra', 'Lucía', 'Elena', 'Rosa']
-        apellidos = ['García', 'López', 'Martínez', 'González', 'Rodríguez', 'Fernández', 'Pérez', 'Sánchez', 'Torres', 'Ramírez', 'Flores', 'Vega', 'Silva', 'Cruz', 'Ortiz']
-        
-        estudiantes = []
-        ci_counter = 10000000
-        for i in range(30):  # 30 estudiantes
-            nombres_list = nombres_masculinos if i % 2 == 0 else nombres_femeninos
-            nombre = random.choice(nombres_list)
-            apellido1 = random.choice(apellidos)
-            apellido2 = random.choice(apellidos)
-            
-            edad = random.randint(6, 12)
-            fecha_nac = date.today() - timedelta(days=365 * edad + random.randint(0, 365))
-            
-            est, _ = Estudiante.objects.get_or_create(
-                ci=str(ci_counter + i),
-                defaults={
-                    'nombres': nombre,
-                    'apellidos': f'{apellido1} {apellido2}',
-                    'email': f'{nombre.lower()}.{apellido1.lower()}@estudiante.edu',
-                    'telefono': f'7{random.randint(1000000, 9999999)}',
-                    'fecha_nacimiento': fecha_nac,
-                    'direccion': f'Calle {random.choice(["Los Pinos", "Las Rosas", "El Sol", "La Luna"])} #{random.randint(100, 999)}',
-                    'activo': True
-                }
+            for n, (a, g, seccion) in enumerate(planes)
+        ), len(planes), 'cursos')
+        ids_cursos = {
+            (grado, asignatura, seccion): pk
+            for pk, grado, asignatura, seccion in Curso.objects.filter(periodo_academico=periodo).values_list(
+                'id', 'grado_id', 'asignatura_id', 'seccion'
             )
-            estudiantes.append(est)
-        self.stdout.write(self.style.SUCCESS(f'  ✓ {len(estudiantes)} estudiantes creados'))
-
-        # 6. Cursos (cada asignatura para cada grado)
-        self.stdout.write('Creando cursos...')
-        cursos = []
-        for grado in grados:
-            for asignatura in asignaturas:
-                profesor = random.choice(profesores)
-                curso, _ = Curso.objects.get_or_create(
-                    grado=grado,
-                    asignatura=asignatura,
-                    periodo_academico=periodo,
-                    seccion='A',
-                    defaults={'profesor': profesor}
-                )
-                cursos.append(curso)
-        self.stdout.write(self.style.SUCCESS(f'  ✓ {len(cursos)} cursos creados'))
-
-        # 7. Inscripciones (asignar estudiantes a cursos)
-        self.stdout.write('Creando inscripciones...')
-        inscripciones_count = 0
-        estudiantes_por_grado = {}
-        for grado in grados:
-            estudiantes_grado = random.sample(estudiantes, min(5, len(estudiantes)))
-            estudiantes_por_grado[grado] = estudiantes_grado
-            
-            cursos_grado = [c for c in cursos if c.grado == grado]
-            for estudiante in estudiantes_grado:
-                for curso in cursos_grado:
-                    Inscripcion.objects.get_or_create(
-                        estudiante=estudiante,
-                        curso=curso,
-                        defaults={'activa': True}
-                    )
-                    inscripciones_count += 1
-        self.stdout.write(self.style.SUCCESS(f'  ✓ {inscripciones_count} inscripciones creadas'))
-
-        # 8. Evaluaciones
-        self.stdout.write('Creando evaluaciones...')
-        tipos_eval = ['examen', 'tarea', 'proyecto', 'practica']
-        evaluaciones = []
-        for curso in cursos:
-            # Crear 3 evaluaciones por curso
-            for j in range(3):
-                tipo = random.choice(tipos_eval)
-                nombre = f'{tipo.capitalize()} {j+1}'
-                fecha_eval = periodo.fecha_inicio + timedelta(days=30 * j + random.randint(0, 20))
-                
-                eval_obj, _ = Evaluacion.objects.get_or_create(
-                    curso=curso,
-                    nombre=nombre,
-                    defaults={
-                        'descripcion': f'Evaluación de {curso.asignatura.nombre}',
-                        'tipo': tipo,
-                        'fecha': fecha_eval,
-                        'ponderacion': Decimal('33.33')
-                    }
-                )
-                evaluaciones.append(eval_obj)
-        self.stdout.write(self.style.SUCCESS(f'  ✓ {len(evaluaciones)} evaluaciones creadas'))
-
-        # 9. Calificaciones
-        self.stdout.write('Creando calificaciones...')
-        calificaciones_count = 0
-        for evaluacion in evaluaciones:
-            # Obtener estudiantes inscritos en el curso
-            estudiantes_curso = Estudiante.objects.filter(
-                inscripcion__curso=evaluacion.curso,
-                inscripcion__activa=True
+        }
+        # [(id del curso, índices de sus estudiantes)]
+        cursos = [
+            (ids_cursos[grados[g], asignaturas[a], seccion], secciones[g, seccion])
+            for a, g, seccion in planes
+        ]
+        total_inscripciones = sum(len(roster) for _, roster in cursos)
+
+        # 4. Inscripciones, evaluaciones, calificaciones y asistencia
+        self.insertar(Inscripcion, (
+            Inscripcion(estudiante_id=ids_estudiantes[i], curso_id=curso_id, activa=True)
+            for curso_id, roster in cursos for i in roster
+        ), total_inscripciones, 'inscripciones')
+
+        evaluaciones = self.generar_evaluaciones(cursos, periodo)
+        rng = self.aleatorio('calificaciones')
+        self.insertar(Calificacion, (
+            self.calificacion(rng, evaluacion_id, ids_estudiantes[i], perfiles[i])
+            for evaluacion_id, roster in evaluaciones for i in roster
+        ), total_inscripciones * EVALUACIONES_POR_CURSO, 'calificaciones')
+
+        rng = self.aleatorio('asistencia')
+        self.insertar(Asistencia, (
+            Asistencia(
+                estudiante_id=ids_estudiantes[i], curso_id=curso_id, fecha=fecha,
+                estado=self.estado(rng, perfiles[i])
             )
-            
-            for estudiante in estudiantes_curso:
-                # Generar nota realista (con distribución normal alrededor de 70)
-                nota_base = random.gauss(70, 15)
-                nota = max(0, min(100, round(nota_base, 2)))
-                
-                Calificacion.objects.get_or_create(
-                    evaluacion=evaluacion,
-                    estudiante=estudiante,
-                    defaults={
-                        'nota': Decimal(str(nota)),
-                        'observaciones': '' if nota >= 51 else 'Requiere apoyo adicional'
-                    }
-                )
-                calificaciones_count += 1
-        self.stdout.write(self.style.SUCCESS(f'  ✓ {calificaciones_count} calificaciones creadas'))
-
-        # 10. Asistencia (últimos 30 días)
-        self.stdout.write('Creando registros de asistencia...')
-        asistencia_count = 0
-        estados = ['presente', 'presente', 'presente', 'presente', 'ausente', 'tardanza', 'justificada']
-        
-        for i in range(30):  # Últimos 30 días
-            fecha_asist = date.today() - timedelta(days=i)
-            
-            # Solo días hábiles
-            if fecha_asist.weekday() < 5:  # Lunes=0, Viernes=4
-                for curso in random.sample(cursos, min(10, len(cursos))):
-                    estudiantes_curso = Estudiante.objects.filter(
-                        inscripcion__curso=curso,
-                        inscripcion__activa=True
-                    )
-                    
-                    for estudiante in estudiantes_curso:
-                        estado = random.choice(estados)
-                        Asistencia.objects.get_or_create(
-                            estudiante=estudiante,
-                            curso=curso,
-                            fecha=fecha_asist,
-                            defaults={'estado': estado}
-                        )
-                        asistencia_count += 1
-        self.stdout.write(self.style.SUCCESS(f'  ✓ {asistencia_count} registros de asistencia creados'))
+            for fecha in dias for curso_id, roster in cursos for i in roster
+        ), total_inscripciones * len(dias), 'asistencias')
+
+        # 5. Lo que las señales mantienen al guardar fila por fila
+        self.stdout.write('Reconstruyendo resúmenes, índice de búsqueda y notas finales...')
+        resumenes.recalcular()
+        busqueda.reindexar()
+        refrescar_notas_finales(periodo.id)
+        cache_kpis.invalidar()
+        self.stdout.write(self.style.SUCCESS('  ✓ Derivados reconstruidos'))
 
         # Resumen final
         self.stdout.write('\n' + '='*50)
-        self.stdout.write(self.style.SUCCESS('DATOS DE PRUEBA GENERADOS EXITOSAMENTE'))
+        self.stdout.write(self.style.SUCCESS(
+            f'DATOS DE PRUEBA GENERADOS EN {time.perf_counter() - inicio:.1f}s'
+        ))
         self.stdout.write('='*50)
         self.stdout.write(f'  Grados: {Grado.objects.count()}')
         self.stdout.write(f'  Asignaturas: {Asignatura.objects.count()}')
         self.stdout.write(f'  Profesores: {Profesor.objects.count()}')
         self.stdout.write(f'  Estudiantes: {Estudiante.objects.count()}')
+        self.stdout.write(f'  Apoderados: {Apoderado.objects.count()}')
         self.stdout.write(f'  Cursos: {Curso.objects.count()}')
         self.stdout.write(f'  Inscripciones: {Inscripcion.objects.count()}')
         self.stdout.write(f'  Evaluaciones: {Evaluacion.objects.count()}')
@@ -279,3 +297,173 @@ class Command(BaseCommand):
         self.stdout.write(f'  Asistencias: {Asistencia.objects.count()}')
         self.stdout.write('='*50 + '\n')
         self.stdout.write(self.style.SUCCESS('✓ Ahora puedes acceder al sistema en http://127.0.0.1:8000/'))
+
+    # ============================================
+    # CARGA
+    # ============================================
+
+    def aleatorio(self, fase):
+        """Generador propio de cada fase: su secuencia no depende de las demás"""
+        return random.Random(f'{self.semilla}:{fase}')
+
+    def vaciar(self):
+        """
+        Vacía todas las tablas de la app (hechos, dimensiones, resúmenes e
+        índice) como `manage.py flush`: TRUNCATE en PostgreSQL, DELETE sin
+        cargar filas en SQLite, reiniciando las secuencias de ids.
+        """
+        tablas = [modelo._meta.db_table for modelo in apps.get_app_config('indicadores').get_models(include_auto_created=True)]
+        sql = connection.ops.sql_flush(no_style(), tablas, reset_sequences=True)
+        connection.ops.execute_sql_flush(sql)
+        cache_kpis.invalidar()
+
+    def insertar(self, modelo, filas, total, etiqueta):
+        """Inserta `filas` (iterable, se consume de a un lote) con bulk_create"""
+        progreso = Progreso(self, etiqueta, total)
+        lote = []
+        for fila in filas:
+            lote.append(fila)
+            if len(lote) >= self.tamano_lote:
+                modelo.objects.bulk_create(lote, ignore_conflicts=True)
+                progreso.avanzar(len(lote))
+                lote = []
+        if lote:
+            modelo.objects.bulk_create(lote, ignore_conflicts=True)
+            progreso.avanzar(len(lote))
+        progreso.terminar()
+
+    # ============================================
+    # FILAS
+    # ============================================
+
+    def generar_estudiantes(self, cantidad, total_grados):
+        """
+        Crea los estudiantes y devuelve su perfil (nivel, ausentismo): el
+        desvío de sus notas respecto de 70 y su probabilidad de faltar.
+        """
+        rng = self.aleatorio('estudiantes')
+        perfiles, estudiantes = [], []
+        for i in range(cantidad):
+            nombre = rng.choice(NOMBRES_MASCULINOS if i % 2 == 0 else NOMBRES_FEMENINOS)
+            apellido1, apellido2 = rng.choice(APELLIDOS), rng.choice(APELLIDOS)
+            edad = 6 + i % total_grados
+            estudiantes.append(Estudiante(
+                ci=str(CI_ESTUDIANTES + i),
+                nombres=nombre,
+                apellidos=f'{apellido1} {apellido2}',
+                email=f'{_correo(nombre, apellido1)}@estudiante.edu',
+                telefono=f'7{rng.randint(1000000, 9999999)}',
+                fecha_nacimiento=date(2025 - edad, 1, 1) - timedelta(days=rng.randint(0, 364)),
+                direccion=f'Calle {rng.choice(CALLES)} #{rng.randint(100, 999)}',
+                activo=True
+            ))
+            perfiles.append((rng.gauss(0, 8), rng.betavariate(2, 25)))
+        self.insertar(Estudiante, estudiantes, cantidad, 'estudiantes')
+        return perfiles
+
+    def generar_apoderados(self, ids_estudiantes):
+        """Un apoderado principal por estudiante, con el primer apellido de este"""
+        rng = self.aleatorio('apoderados')
+        apoderados = []
+        for i in range(len(ids_estudiantes)):
+            parentesco = rng.choice(PARENTESCOS)
+            nombre = rng.choice(NOMBRES_FEMENINOS if parentesco == 'madre' else NOMBRES_MASCULINOS)
+            apellidos = f'{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}'
+            apoderados.append(Apoderado(
+                ci=str(CI_APODERADOS + i),
+                nombres=nombre,
+                apellidos=apellidos,
+                email=f'{_correo(nombre, apellidos.split()[0])}@correo.com',
+                telefono=f'6{rng.randint(1000000, 9999999)}',
+                parentesco=parentesco
+            ))
+        self.insertar(Apoderado, apoderados, len(apoderados), 'apoderados')
+        ids = dict(Apoderado.objects.filter(
+            ci__gte=str(CI_APODERADOS), ci__lt=str(CI_APODERADOS + len(ids_estudiantes))
+        ).values_list('ci', 'id'))
+        self.insertar(EstudianteApoderado, (
+            EstudianteApoderado(
+                estudiante_id=estudiante_id, apoderado_id=ids[str(CI_APODERADOS + i)], es_principal=True
+            )
+            for i, estudiante_id in enumerate(ids_estudiantes)
+        ), len(ids_estudiantes), 'vínculos estudiante-apoderado')
+
+    def generar_profesores(self, por_asignatura):
+        """Crea `por_asignatura` profesores de cada asignatura; devuelve sus ids en ese orden"""
+        rng = self.aleatorio('profesores')
+        profesores = []
+        for _, asignatura, _ in ASIGNATURAS:
+            for _ in range(por_asignatura):
+                n = len(profesores) + 1
+                nombre = rng.choice(NOMBRES_MASCULINOS if n % 2 else NOMBRES_FEMENINOS)
+                apellidos = f'{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}'
+                profesores.append(Profesor(
+                    nombres=nombre,
+                    apellidos=apellidos,
+                    email=f'{_correo(nombre, apellidos.split()[0])}.{n}@colegio.edu',
+                    telefono=f'77{rng.randint(100000, 999999)}',
+                    especialidad=asignatura,
+                    activo=True
+                ))
+        self.insertar(Profesor, profesores, len(profesores), 'profesores')
+        ids = dict(Profesor.objects.filter(
+            email__in=[profesor.email for profesor in profesores]
+        ).values_list('email', 'id'))
+        return [ids[profesor.email] for profesor in profesores]
+
+    def generar_evaluaciones(self, cursos, periodo):
+        """
+        Crea las evaluaciones que falten (Evaluacion no tiene clave natural
+        única: se identifican por curso y nombre). Devuelve
+        [(id de la evaluación, roster del curso)].
+        """
+        rng = self.aleatorio('evaluaciones')
+        existentes = set(Evaluacion.objects.filter(
+            curso__periodo_academico=periodo
+        ).values_list('curso_id', 'nombre'))
+        nombres = {}
+        nuevas = []
+        for curso_id, _ in cursos:
+            for j in range(EVALUACIONES_POR_CURSO):
+                tipo = rng.choice(TIPOS_EVALUACION)
+                nombre = f'{tipo.capitalize()} {j+1}'
+                fecha = periodo.fecha_inicio + timedelta(days=30 * j + rng.randint(0, 20))
+                nombres.setdefault(curso_id, []).append(nombre)
+                if (curso_id, nombre) not in existentes:
+                    nuevas.append(Evaluacion(
+                        curso_id=curso_id, nombre=nombre, tipo=tipo, fecha=fecha,
+                        descripcion=f'Evaluación {j+1}', ponderacion=Decimal('33.33')
+                    ))
+        self.insertar(Evaluacion, nuevas, len(nuevas), 'evaluaciones')
+        ids = {
+            (curso_id, nombre): pk
+            for pk, curso_id, nombre in Evaluacion.objects.filter(
+                curso__periodo_academico=periodo
+            ).values_list('id', 'curso_id', 'nombre')
+        }
+        return [
+            (ids[curso_id, nombre], roster)
+            for curso_id, roster in cursos for nombre in nombres[curso_id]
+        ]
+
+    @staticmethod
+    def calificacion(rng, evaluacion_id, estudiante_id, perfil):
+        nivel, _ = perfil
+        # nota tiene max_digits=4: 100.00 no cabe en la columna
+        nota = max(0, min(99.99, round(rng.gauss(70 + nivel, 12), 2)))
+        return Calificacion(
+            evaluacion_id=evaluacion_id,
+            estudiante_id=estudiante_id,
+            nota=Decimal(f'{nota:.2f}'),
+            observaciones='' if nota >= 51 else 'Requiere apoyo adicional'
+        )
+
+    @staticmethod
+    def estado(rng, perfil):
+        _, ausentismo = perfil
+        azar = rng.random()
+        if azar < ausentismo:
+            return 'ausente' if azar < ausentismo * 0.7 else 'justificada'
+        if azar < ausentismo + 0.04:
+            return 'tardanza'
+        return 'presente'
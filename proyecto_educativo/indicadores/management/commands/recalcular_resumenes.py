@@ -0,0 +1,57 @@
+"""
+Management command para reconstruir los resúmenes de KPIs
+=========================================================
+Recalcula desde cero ResumenEstudiante, ResumenCurso, ResumenPeriodo y los
+resúmenes mensuales (--mensuales para reconstruir solo estos), o verifica
+(--verificar) que los valores mantenidos por señales no se hayan desviado
+de las tablas de hechos.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from indicadores import resumenes
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los resúmenes de KPIs o verifica su deriva'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Solo compara los resúmenes con un recálculo completo, sin modificarlos',
+        )
+        parser.add_argument(
+            '--mensuales',
+            action='store_true',
+            help='Solo los resúmenes mensuales (global, por grado y por curso)',
+        )
+        parser.add_argument(
+            '--limite',
+            type=int,
+            default=20,
+            help='Cantidad máxima de diferencias a mostrar con --verificar',
+        )
+
+    def handle(self, *args, **options):
+        dimensiones = resumenes.DIMENSIONES
+        if options['mensuales']:
+            dimensiones = [d for d in dimensiones if 'mes' in d.claves]
+
+        if options['verificar']:
+            diferencias = resumenes.verificar(dimensiones)
+            if not diferencias:
+                self.stdout.write(self.style.SUCCESS('✓ Resúmenes consistentes'))
+                return
+            for modelo, clave, guardado, esperado in diferencias[:options['limite']]:
+                self.stdout.write(
+                    f'  {modelo.__name__}[{clave}]: guardado={guardado} esperado={esperado}'
+                )
+            raise CommandError(
+                f'{len(diferencias)} filas de resumen difieren; ejecute recalcular_resumenes sin --verificar'
+            )
+
+        self.stdout.write('Recalculando resúmenes de KPIs...')
+        creados = resumenes.recalcular(dimensiones)
+        for modelo, total in creados.items():
+            self.stdout.write(self.style.SUCCESS(f'  ✓ {modelo.__name__}: {total} filas'))
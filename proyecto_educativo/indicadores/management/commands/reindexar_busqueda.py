@@ -0,0 +1,29 @@
+"""
+Management command para reconstruir el índice de búsqueda de personas
+=====================================================================
+Regenera TerminoBusqueda (ver indicadores/busqueda.py) de estudiantes,
+apoderados y profesores. Necesario tras cargas con `bulk_create`, que no
+disparan las señales que mantienen el índice.
+"""
+
+from django.core.management.base import BaseCommand
+
+from indicadores import busqueda
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de estudiantes, apoderados y profesores'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tipo',
+            action='append',
+            choices=list(busqueda.FUENTES),
+            help='Solo este tipo de persona (repetible; por defecto todos)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Reindexando búsqueda de personas...')
+        totales = busqueda.reindexar(options['tipo'])
+        for tipo, total in totales.items():
+            self.stdout.write(self.style.SUCCESS(f'  ✓ {tipo}: {total} personas'))
@@ -0,0 +1,128 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:51
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+# Asistencia.ESTADOS_AUSENCIA al crear los resúmenes
+ESTADOS_AUSENCIA = ['ausente', 'tardanza']
+
+
+def dimensiones():
+    """(modelo de resumen, {clave: (ruta desde Calificacion, ruta desde Asistencia)})"""
+    mes = {'mes': (TruncMonth('fecha_registro', output_field=DateField()), TruncMonth('fecha', output_field=DateField()))}
+    return [
+        ('ResumenMensual', mes),
+        ('ResumenMensualGrado', {'grado_id': (F('evaluacion__curso__grado_id'), F('curso__grado_id')), **mes}),
+        ('ResumenMensualCurso', {'curso_id': (F('evaluacion__curso_id'), F('curso_id')), **mes}),
+    ]
+
+
+def llenar_resumenes(apps, schema_editor):
+    """Calcula los resúmenes mensuales de las notas y asistencias existentes (lo que hace resumenes.recalcular)"""
+    Calificacion = apps.get_model('indicadores', 'Calificacion')
+    Asistencia = apps.get_model('indicadores', 'Asistencia')
+    for nombre, claves in dimensiones():
+        modelo = apps.get_model('indicadores', nombre)
+        resumenes = {}
+        notas = Calificacion.objects.order_by().values(
+            **{f'_{clave}': rutas[0] for clave, rutas in claves.items()}
+        ).annotate(suma=Sum('nota'), total=Count('id'))
+        for fila in notas:
+            resumen = _resumen(resumenes, modelo, claves, fila)
+            if resumen:
+                resumen.suma_notas = Decimal(str(fila['suma'])).quantize(Decimal('0.01'))
+                resumen.total_notas = fila['total']
+        asistencias = Asistencia.objects.order_by().values(
+            **{f'_{clave}': rutas[1] for clave, rutas in claves.items()}
+        ).annotate(
+            total=Count('id'),
+            ausencias=Count('id', filter=Q(estado__in=ESTADOS_AUSENCIA)),
+            ausentes=Count('id', filter=Q(estado='ausente')),
+        )
+        for fila in asistencias:
+            resumen = _resumen(resumenes, modelo, claves, fila)
+            if resumen:
+                resumen.total_asistencias = fila['total']
+                resumen.total_ausencias = fila['ausencias']
+                resumen.total_ausentes = fila['ausentes']
+        modelo.objects.bulk_create(resumenes.values(), batch_size=1000)
+
+
+def _resumen(resumenes, modelo, claves, fila):
+    """Fila de resumen (sin guardar) de las claves de `fila`; None si alguna falta"""
+    clave = tuple(fila[f'_{nombre}'] for nombre in claves)
+    if any(valor is None for valor in clave):
+        return None
+    if clave not in resumenes:
+        resumenes[clave] = modelo(**dict(zip(claves, clave)))
+    return resumenes[clave]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indicadores', '0002_resumenes_kpi'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('suma_notas', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_notas', models.IntegerField(default=0)),
+                ('total_asistencias', models.IntegerField(default=0)),
+                ('total_ausencias', models.IntegerField(default=0)),
+                ('mes', models.DateField(help_text='Primer día del mes')),
+                ('total_ausentes', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Resumen Mensual',
+                'verbose_name_plural': 'Resúmenes Mensuales',
+                'ordering': ['mes'],
+                'unique_together': {('mes',)},
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenMensualCurso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('suma_notas', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_notas', models.IntegerField(default=0)),
+                ('total_asistencias', models.IntegerField(default=0)),
+                ('total_ausencias', models.IntegerField(default=0)),
+                ('mes', models.DateField(help_text='Primer día del mes')),
+                ('total_ausentes', models.IntegerField(default=0)),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_mensuales', to='indicadores.curso')),
+            ],
+            options={
+                'verbose_name': 'Resumen Mensual por Curso',
+                'verbose_name_plural': 'Resúmenes Mensuales por Curso',
+                'ordering': ['curso', 'mes'],
+                'unique_together': {('curso', 'mes')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenMensualGrado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('suma_notas', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_notas', models.IntegerField(default=0)),
+                ('total_asistencias', models.IntegerField(default=0)),
+                ('total_ausencias', models.IntegerField(default=0)),
+                ('mes', models.DateField(help_text='Primer día del mes')),
+                ('total_ausentes', models.IntegerField(default=0)),
+                ('grado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_mensuales', to='indicadores.grado')),
+            ],
+            options={
+                'verbose_name': 'Resumen Mensual por Grado',
+                'verbose_name_plural': 'Resúmenes Mensuales por Grado',
+                'ordering': ['grado', 'mes'],
+                'unique_together': {('grado', 'mes')},
+            },
+        ),
+        migrations.RunPython(llenar_resumenes, migrations.RunPython.noop),
+    ]
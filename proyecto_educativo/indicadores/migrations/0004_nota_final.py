@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indicadores', '0003_resumenes_mensuales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotaFinal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nota_final', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('peso_evaluado', models.DecimalField(decimal_places=2, help_text='Porcentaje de la ponderación aplicada del curso que el estudiante rindió', max_digits=5)),
+                ('evaluaciones_rendidas', models.IntegerField(default=0)),
+                ('evaluaciones_aplicadas', models.IntegerField(default=0)),
+                ('fecha_calculo', models.DateTimeField(auto_now=True)),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='indicadores.curso')),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='indicadores.estudiante')),
+            ],
+            options={
+                'verbose_name': 'Nota Final',
+                'verbose_name_plural': 'Notas Finales',
+                'ordering': ['curso', '-nota_final'],
+                'unique_together': {('estudiante', 'curso')},
+            },
+        ),
+    ]
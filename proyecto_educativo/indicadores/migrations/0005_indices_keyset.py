@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indicadores', '0004_nota_final'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['-fecha', 'id'], name='asistencia_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calificacion',
+            index=models.Index(fields=['-fecha_registro', 'id'], name='calificacion_fecha_id_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indicadores', '0005_indices_keyset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoteProcesado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=100, unique=True)),
+                ('recurso', models.CharField(max_length=50)),
+                ('huella', models.CharField(help_text='SHA-256 del contenido del lote', max_length=64)),
+                ('resultado', models.JSONField(blank=True, null=True)),
+                ('fecha_proceso', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Lote Procesado',
+                'verbose_name_plural': 'Lotes Procesados',
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:13
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# Copia de busqueda.FUENTES y busqueda.normalizar al crear el índice: la
+# migración no depende de los modelos ni del código actuales de la app
+PESOS = {
+    'Estudiante': ('estudiante', {'apellidos': 3, 'ci': 3, 'nombres': 2, 'email': 1}),
+    'Apoderado': ('apoderado', {'apellidos': 3, 'ci': 3, 'nombres': 2, 'email': 1}),
+    'Profesor': ('profesor', {'apellidos': 3, 'nombres': 2, 'email': 1}),
+}
+TAMANO_LOTE = 2000
+_NO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+
+def normalizar(texto):
+    plano = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode('ascii')
+    return [palabra for palabra in _NO_ALFANUMERICO.split(plano.lower()) if palabra]
+
+
+def indexar_personas(apps, schema_editor):
+    """Llena el índice con las personas existentes (lo que hace busqueda.reindexar)"""
+    TerminoBusqueda = apps.get_model('indicadores', 'TerminoBusqueda')
+    largo_termino = TerminoBusqueda._meta.get_field('termino').max_length
+    largo_etiqueta = TerminoBusqueda._meta.get_field('etiqueta').max_length
+    for nombre, (tipo, pesos) in PESOS.items():
+        modelo = apps.get_model('indicadores', nombre)
+        filas = []
+        for objeto in modelo.objects.order_by().only('id', *pesos).iterator(chunk_size=TAMANO_LOTE):
+            etiqueta = ' '.join(normalizar(f'{objeto.apellidos} {objeto.nombres}'))[:largo_etiqueta]
+            mejores = {}
+            for campo, peso in pesos.items():
+                for palabra in normalizar(getattr(objeto, campo)):
+                    palabra = palabra[:largo_termino]
+                    mejores[palabra] = max(peso, mejores.get(palabra, 0))
+            filas.extend(
+                TerminoBusqueda(tipo=tipo, objeto_id=objeto.pk, termino=palabra, peso=peso, etiqueta=etiqueta)
+                for palabra, peso in mejores.items()
+            )
+            if len(filas) >= TAMANO_LOTE:
+                TerminoBusqueda.objects.bulk_create(filas)
+                filas = []
+        TerminoBusqueda.objects.bulk_create(filas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indicadores', '0006_lotes_procesados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('estudiante', 'Estudiante'), ('apoderado', 'Apoderado'), ('profesor', 'Profesor')], max_length=10)),
+                ('objeto_id', models.PositiveBigIntegerField()),
+                ('termino', models.CharField(help_text='Sin acentos, en minúsculas', max_length=100)),
+                ('peso', models.PositiveSmallIntegerField(default=1)),
+                ('etiqueta', models.CharField(help_text='Apellidos y nombres normalizados (desempate)', max_length=200)),
+            ],
+            options={
+                'verbose_name': 'Término de Búsqueda',
+                'verbose_name_plural': 'Términos de Búsqueda',
+                'indexes': [models.Index(fields=['tipo', 'termino'], name='busqueda_prefijo_idx'), models.Index(fields=['tipo', 'objeto_id'], name='busqueda_objeto_idx')],
+            },
+        ),
+        migrations.RunPython(indexar_personas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indicadores', '0007_terminos_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='apoderado',
+            index=models.Index(fields=['apellidos', 'nombres', 'id'], name='apoderado_nombre_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='estudiante',
+            index=models.Index(fields=['apellidos', 'nombres', 'id'], name='estudiante_nombre_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluacion',
+            index=models.Index(fields=['-fecha', 'id'], name='evaluacion_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profesor',
+            index=models.Index(fields=['apellidos', 'nombres', 'id'], name='profesor_nombre_id_idx'),
+        ),
+    ]
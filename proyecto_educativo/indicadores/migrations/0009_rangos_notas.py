@@ -0,0 +1,84 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:14
+
+from django.db import migrations, models
+from django.db.models import Count, F, Q
+
+# resumenes.RANGOS_NOTAS al crear los conteos: campo -> notas que cuenta
+RANGOS = {
+    'notas_excelentes': Q(nota__gte=90),
+    'notas_buenas': Q(nota__gte=70, nota__lt=90),
+    'notas_regulares': Q(nota__gte=51, nota__lt=70),
+    'notas_insuficientes': Q(nota__lt=51),
+}
+
+
+def contar_rangos(apps, schema_editor):
+    """Cuenta por rango las notas existentes de cada curso y período (lo que hace resumenes.recalcular)"""
+    Calificacion = apps.get_model('indicadores', 'Calificacion')
+    for nombre, clave, ruta in [
+        ('ResumenCurso', 'curso_id', F('evaluacion__curso_id')),
+        ('ResumenPeriodo', 'periodo_id', F('evaluacion__curso__periodo_academico_id')),
+    ]:
+        modelo = apps.get_model('indicadores', nombre)
+        resumenes = {getattr(resumen, clave): resumen for resumen in modelo.objects.all()}
+        conteos = Calificacion.objects.order_by().values(_clave=ruta).annotate(
+            **{campo: Count('id', filter=condicion) for campo, condicion in RANGOS.items()}
+        )
+        for fila in conteos:
+            # Sin fila de resumen no hay totales que completar: recalcular_resumenes la crea
+            resumen = resumenes.get(fila['_clave'])
+            if resumen:
+                for campo in RANGOS:
+                    setattr(resumen, campo, fila[campo])
+        modelo.objects.bulk_update(resumenes.values(), list(RANGOS), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indicadores', '0008_indices_opciones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumencurso',
+            name='notas_buenas',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='resumencurso',
+            name='notas_excelentes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='resumencurso',
+            name='notas_insuficientes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='resumencurso',
+            name='notas_regulares',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='resumenperiodo',
+            name='notas_buenas',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='resumenperiodo',
+            name='notas_excelentes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='resumenperiodo',
+            name='notas_insuficientes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='resumenperiodo',
+            name='notas_regulares',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(contar_rangos, migrations.RunPython.noop),
+    ]
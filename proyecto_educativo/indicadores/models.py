@@ -1,8 +1,79 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 
-class Grado(models.Model):
+from .cache_kpis import invalidar_al_confirmar
+
+class KPIQuerySet(models.QuerySet):
+    """
+    QuerySet que invalida la caché de KPIs también en operaciones masivas.
+
+    `update` además mueve en los resúmenes los aportes de las filas cuyas
+    claves o valores cambia (ver resumenes.DEPENDENCIAS) y `delete` resta
+    en lote los de los hechos que se borran, propios o en cascada (ver
+    resumenes.CASCADAS).
+    """
+    
+    def bulk_create(self, *args, **kwargs):
+        objetos = super().bulk_create(*args, **kwargs)
+        invalidar_al_confirmar()
+        return objetos
+    
+    def bulk_update(self, *args, **kwargs):
+        filas = super().bulk_update(*args, **kwargs)
+        invalidar_al_confirmar()
+        return filas
+    
+    def update(self, **kwargs):
+        from . import resumenes
+
+        if not resumenes.dependencias(self.model, kwargs):
+            filas = super().update(**kwargs)
+        else:
+            with transaction.atomic(using=self.db):
+                pks = list(self.values_list('pk', flat=True))
+                with resumenes.moviendo(self.model, pks, kwargs):
+                    filas = super().update(**kwargs)
+        invalidar_al_confirmar()
+        return filas
+    
+    def delete(self):
+        from . import resumenes
+
+        if self.model not in resumenes.CASCADAS:
+            resultado = super().delete()
+        else:
+            with transaction.atomic(using=self.db):
+                pks = list(self.values_list('pk', flat=True))
+                with resumenes.borrando(self.model, pks):
+                    resultado = super().delete()
+        invalidar_al_confirmar()
+        return resultado
+
+
+class ModeloKPI(models.Model):
+    """
+    Base de los modelos cuyas altas, cambios o bajas afectan los KPIs.
+
+    Usa KPIQuerySet y, al borrar una instancia, resta en lote los aportes
+    de los hechos que se borran con ella. Las bajas no usan señales
+    pre_delete/post_delete: con receptores Django ya no puede borrar en
+    una sola consulta las calificaciones y asistencias de una cascada.
+    """
+    objects = KPIQuerySet.as_manager()
+    
+    class Meta:
+        abstract = True
+    
+    def delete(self, *args, **kwargs):
+        from . import resumenes
+
+        with resumenes.borrando(type(self), [self.pk]):
+            resultado = super().delete(*args, **kwargs)
+        invalidar_al_confirmar()
+        return resultado
+
+class Grado(ModeloKPI):
     """Niveles académicos del sistema educativo"""
     nombre = models.CharField(max_length=50, unique=True)
     descripcion = models.TextField(blank=True)
@@ -15,7 +86,7 @@ class Grado(models.Model):
     def __str__(self):
         return self.nombre
 
-class Asignatura(models.Model):
+class Asignatura(ModeloKPI):
     """Materias o asignaturas del currículo"""
     nombre = models.CharField(max_length=100, unique=True)
     codigo = models.CharField(max_length=10, unique=True)
@@ -29,7 +100,7 @@ class Asignatura(models.Model):
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
 
-class PeriodoAcademico(models.Model):
+class PeriodoAcademico(ModeloKPI):
     """Períodos académicos (semestres, bimestres, etc.)"""
     nombre = models.CharField(max_length=50)
     fecha_inicio = models.DateField()
@@ -45,7 +116,7 @@ class PeriodoAcademico(models.Model):
     def __str__(self):
         return f"{self.nombre} ({self.fecha_inicio} - {self.fecha_fin})"
 
-class Profesor(models.Model):
+class Profesor(ModeloKPI):
     """Docentes del sistema educativo"""
     nombres = models.CharField(max_length=100)
     apellidos = models.CharField(max_length=100)
@@ -58,6 +129,10 @@ class Profesor(models.Model):
         verbose_name = "Profesor"
         verbose_name_plural = "Profesores"
         ordering = ['apellidos', 'nombres']
+        indexes = [
+            # Opciones remotas de los formularios (opciones.py)
+            models.Index(fields=['apellidos', 'nombres', 'id'], name='profesor_nombre_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombres} {self.apellidos}"
@@ -66,7 +141,7 @@ class Profesor(models.Model):
     def nombre_completo(self):
         return f"{self.nombres} {self.apellidos}"
 
-class Estudiante(models.Model):
+class Estudiante(ModeloKPI):
     """Estudiantes del sistema educativo"""
     nombres = models.CharField(max_length=100)
     apellidos = models.CharField(max_length=100)
@@ -81,6 +156,10 @@ class Estudiante(models.Model):
         verbose_name = "Estudiante"
         verbose_name_plural = "Estudiantes"
         ordering = ['apellidos', 'nombres']
+        indexes = [
+            # Opciones remotas de los formularios (opciones.py)
+            models.Index(fields=['apellidos', 'nombres', 'id'], name='estudiante_nombre_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombres} {self.apellidos} (CI: {self.ci})"
@@ -113,6 +192,10 @@ class Apoderado(models.Model):
         verbose_name = "Apoderado"
         verbose_name_plural = "Apoderados"
         ordering = ['apellidos', 'nombres']
+        indexes = [
+            # Opciones remotas de los formularios (opciones.py)
+            models.Index(fields=['apellidos', 'nombres', 'id'], name='apoderado_nombre_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombres} {self.apellidos} ({self.get_parentesco_display()})"
@@ -121,7 +204,7 @@ class Apoderado(models.Model):
     def nombre_completo(self):
         return f"{self.nombres} {self.apellidos}"
 
-class Curso(models.Model):
+class Curso(ModeloKPI):
     """Cursos específicos por período académico"""
     grado = models.ForeignKey(Grado, on_delete=models.CASCADE)
     asignatura = models.ForeignKey(Asignatura, on_delete=models.CASCADE)
@@ -129,6 +212,9 @@ class Curso(models.Model):
     periodo_academico = models.ForeignKey(PeriodoAcademico, on_delete=models.CASCADE)
     seccion = models.CharField(max_length=10, default='A')
     
+    # Relaciones que recorre __str__ (para select_related)
+    RELACIONES_STR = ['grado', 'asignatura', 'profesor']
+    
     class Meta:
         verbose_name = "Curso"
         verbose_name_plural = "Cursos"
@@ -138,7 +224,7 @@ class Curso(models.Model):
     def __str__(self):
         return f"{self.grado} - {self.asignatura} ({self.seccion}) - {self.profesor.nombre_completo}"
 
-class Inscripcion(models.Model):
+class Inscripcion(ModeloKPI):
     """Inscripciones de estudiantes en cursos"""
     estudiante = models.ForeignKey(Estudiante, on_delete=models.CASCADE)
     curso = models.ForeignKey(Curso, on_delete=models.CASCADE)
@@ -170,7 +256,7 @@ class EstudianteApoderado(models.Model):
     def __str__(self):
         return f"{self.estudiante.nombre_completo} -> {self.apoderado.nombre_completo}"
 
-class Evaluacion(models.Model):
+class Evaluacion(ModeloKPI):
     """Evaluaciones (exámenes, tareas, proyectos)"""
     TIPO_CHOICES = [
         ('examen', 'Examen'),
@@ -196,11 +282,15 @@ class Evaluacion(models.Model):
         verbose_name = "Evaluación"
         verbose_name_plural = "Evaluaciones"
         ordering = ['curso', 'fecha']
+        indexes = [
+            # Opciones remotas de los formularios (opciones.py)
+            models.Index(fields=['-fecha', 'id'], name='evaluacion_fecha_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.curso} - {self.nombre} ({self.get_tipo_display()})"
 
-class Calificacion(models.Model):
+class Calificacion(ModeloKPI):
     """Calificaciones obtenidas por estudiantes en evaluaciones"""
     evaluacion = models.ForeignKey(Evaluacion, on_delete=models.CASCADE)
     estudiante = models.ForeignKey(Estudiante, on_delete=models.CASCADE)
@@ -218,11 +308,15 @@ class Calificacion(models.Model):
         verbose_name_plural = "Calificaciones"
         unique_together = ['evaluacion', 'estudiante']
         ordering = ['evaluacion', '-nota']
+        indexes = [
+            # Paginación keyset de la API (paginacion.PaginacionCalificaciones)
+            models.Index(fields=['-fecha_registro', 'id'], name='calificacion_fecha_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.estudiante.nombre_completo} - {self.evaluacion.nombre}: {self.nota}"
 
-class Asistencia(models.Model):
+class Asistencia(ModeloKPI):
     """Registro diario de asistencia"""
     ESTADO_CHOICES = [
         ('presente', 'Presente'),
@@ -230,6 +324,8 @@ class Asistencia(models.Model):
         ('tardanza', 'Tardanza'),
         ('justificada', 'Ausencia Justificada'),
     ]
+    # Estados que cuentan como ausentismo en los KPIs
+    ESTADOS_AUSENCIA = ['ausente', 'tardanza']
     
     estudiante = models.ForeignKey(Estudiante, on_delete=models.CASCADE)
     curso = models.ForeignKey(Curso, on_delete=models.CASCADE)
@@ -242,6 +338,207 @@ class Asistencia(models.Model):
         verbose_name_plural = "Asistencias"
         unique_together = ['estudiante', 'curso', 'fecha']
         ordering = ['-fecha', 'curso', 'estudiante']
+        indexes = [
+            # Paginación keyset de la API (paginacion.PaginacionAsistencia)
+            models.Index(fields=['-fecha', 'id'], name='asistencia_fecha_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.estudiante.nombre_completo} - {self.curso} ({self.fecha}): {self.get_estado_display()}"
+
+class NotaFinal(models.Model):
+    """Nota final ponderada por estudiante y curso (calculada en lote, ver notas_finales.py)"""
+    estudiante = models.ForeignKey(Estudiante, on_delete=models.CASCADE)
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE)
+    nota_final = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    peso_evaluado = models.DecimalField(
+        max_digits=5, 
+        decimal_places=2,
+        help_text="Porcentaje de la ponderación aplicada del curso que el estudiante rindió"
+    )
+    evaluaciones_rendidas = models.IntegerField(default=0)
+    evaluaciones_aplicadas = models.IntegerField(default=0)
+    fecha_calculo = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Nota Final"
+        verbose_name_plural = "Notas Finales"
+        unique_together = ['estudiante', 'curso']
+        ordering = ['curso', '-nota_final']
+    
+    def __str__(self):
+        return f"{self.estudiante_id} - {self.curso_id}: {self.nota_final}"
+
+class LoteProcesado(models.Model):
+    """Lotes ya aplicados por clave de idempotencia (reintentos de carga, ver lotes.py)"""
+    clave = models.CharField(max_length=100, unique=True)
+    recurso = models.CharField(max_length=50)
+    huella = models.CharField(max_length=64, help_text="SHA-256 del contenido del lote")
+    resultado = models.JSONField(null=True, blank=True)
+    fecha_proceso = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Lote Procesado"
+        verbose_name_plural = "Lotes Procesados"
+    
+    def __str__(self):
+        return f"{self.recurso}: {self.clave}"
+
+# ============================================
+# ÍNDICE DE BÚSQUEDA (mantenido por señales)
+# ============================================
+
+class TerminoBusqueda(models.Model):
+    """Palabra normalizada del nombre, CI o email de una persona (ver busqueda.py)"""
+    TIPO_CHOICES = [
+        ('estudiante', 'Estudiante'),
+        ('apoderado', 'Apoderado'),
+        ('profesor', 'Profesor'),
+    ]
+    
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
+    objeto_id = models.PositiveBigIntegerField()
+    termino = models.CharField(max_length=100, help_text="Sin acentos, en minúsculas")
+    peso = models.PositiveSmallIntegerField(default=1)
+    etiqueta = models.CharField(max_length=200, help_text="Apellidos y nombres normalizados (desempate)")
+    
+    class Meta:
+        verbose_name = "Término de Búsqueda"
+        verbose_name_plural = "Términos de Búsqueda"
+        indexes = [
+            # Búsqueda por prefijo: tipo = %s AND termino >= %s AND termino < %s
+            models.Index(fields=['tipo', 'termino'], name='busqueda_prefijo_idx'),
+            models.Index(fields=['tipo', 'objeto_id'], name='busqueda_objeto_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.tipo}:{self.objeto_id} {self.termino}"
+
+# ============================================
+# RESÚMENES DE KPIs (mantenidos por señales)
+# ============================================
+
+class ResumenKPI(models.Model):
+    """Acumulados de notas y asistencia; base de los resúmenes por dimensión"""
+    suma_notas = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_notas = models.IntegerField(default=0)
+    total_asistencias = models.IntegerField(default=0)
+    total_ausencias = models.IntegerField(default=0)
+    
+    class Meta:
+        abstract = True
+    
+    @property
+    def promedio(self):
+        if self.total_notas:
+            return self.suma_notas / self.total_notas
+        return None
+    
+    @property
+    def porcentaje_ausentismo(self):
+        if self.total_asistencias:
+            return self.total_ausencias / self.total_asistencias * 100
+        return 0
+
+class ResumenRangosKPI(ResumenKPI):
+    """Acumulados que además cuentan las notas por rango del dashboard (ver resumenes.RANGOS_NOTAS)"""
+    notas_excelentes = models.IntegerField(default=0)
+    notas_buenas = models.IntegerField(default=0)
+    notas_regulares = models.IntegerField(default=0)
+    notas_insuficientes = models.IntegerField(default=0)
+    
+    class Meta:
+        abstract = True
+    
+    @property
+    def notas_aprobadas(self):
+        return self.notas_excelentes + self.notas_buenas + self.notas_regulares
+
+class ResumenEstudiante(ResumenKPI):
+    """Acumulados de KPIs por estudiante"""
+    estudiante = models.OneToOneField(Estudiante, on_delete=models.CASCADE, related_name='resumen')
+    
+    class Meta:
+        verbose_name = "Resumen por Estudiante"
+        verbose_name_plural = "Resúmenes por Estudiante"
+    
+    def __str__(self):
+        return f"Resumen {self.estudiante_id}"
+
+class ResumenCurso(ResumenRangosKPI):
+    """Acumulados de KPIs por curso"""
+    curso = models.OneToOneField(Curso, on_delete=models.CASCADE, related_name='resumen')
+    
+    class Meta:
+        verbose_name = "Resumen por Curso"
+        verbose_name_plural = "Resúmenes por Curso"
+    
+    def __str__(self):
+        return f"Resumen curso {self.curso_id}"
+
+class ResumenPeriodo(ResumenRangosKPI):
+    """Acumulados de KPIs por período académico"""
+    periodo = models.OneToOneField(PeriodoAcademico, on_delete=models.CASCADE, related_name='resumen')
+    
+    class Meta:
+        verbose_name = "Resumen por Período"
+        verbose_name_plural = "Resúmenes por Período"
+    
+    def __str__(self):
+        return f"Resumen periodo {self.periodo_id}"
+
+# ============================================
+# RESÚMENES MENSUALES (tendencias del dashboard)
+# ============================================
+
+class ResumenMensualKPI(ResumenKPI):
+    """Acumulados de un mes; agrega el conteo de ausencias sin justificar"""
+    mes = models.DateField(help_text="Primer día del mes")
+    total_ausentes = models.IntegerField(default=0)
+    
+    class Meta:
+        abstract = True
+    
+    @property
+    def porcentaje_ausentes(self):
+        if self.total_asistencias:
+            return self.total_ausentes / self.total_asistencias * 100
+        return 0
+
+class ResumenMensual(ResumenMensualKPI):
+    """Acumulados de KPIs por mes (todo el sistema)"""
+    
+    class Meta:
+        verbose_name = "Resumen Mensual"
+        verbose_name_plural = "Resúmenes Mensuales"
+        ordering = ['mes']
+        unique_together = ['mes']
+    
+    def __str__(self):
+        return f"Resumen {self.mes:%Y-%m}"
+
+class ResumenMensualGrado(ResumenMensualKPI):
+    """Acumulados de KPIs por grado y mes"""
+    grado = models.ForeignKey(Grado, on_delete=models.CASCADE, related_name='resumenes_mensuales')
+    
+    class Meta:
+        verbose_name = "Resumen Mensual por Grado"
+        verbose_name_plural = "Resúmenes Mensuales por Grado"
+        ordering = ['grado', 'mes']
+        unique_together = ['grado', 'mes']
+    
+    def __str__(self):
+        return f"Resumen grado {self.grado_id} {self.mes:%Y-%m}"
+
+class ResumenMensualCurso(ResumenMensualKPI):
+    """Acumulados de KPIs por curso y mes"""
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='resumenes_mensuales')
+    
+    class Meta:
+        verbose_name = "Resumen Mensual por Curso"
+        verbose_name_plural = "Resúmenes Mensuales por Curso"
+        ordering = ['curso', 'mes']
+        unique_together = ['curso', 'mes']
+    
+    def __str__(self):
+        return f"Resumen curso {self.curso_id} {self.mes:%Y-%m}"
@@ -0,0 +1,165 @@
+"""
+Motor de Notas Finales Ponderadas
+=================================
+Calcula la nota final de cada estudiante × curso de un período usando
+`Evaluacion.ponderacion`, en un solo lote vectorizado con pandas/NumPy.
+
+- Solo cuentan las evaluaciones aplicadas (con al menos una calificación);
+  las ponderaciones se normalizan sobre su suma, aunque no sumen 100.
+- Evaluaciones no rendidas por un estudiante inscrito:
+    'cero'   -> cuentan como 0 (nota final real del curso)
+    'omitir' -> se renormaliza sobre las evaluaciones que sí rindió
+"""
+
+import numpy as np
+import pandas as pd
+from django.db import connection, transaction
+
+from .models import Inscripcion, Evaluacion, Calificacion, NotaFinal
+
+FALTANTES = ['cero', 'omitir']
+
+COLUMNAS_RESULTADO = [
+    'estudiante_id', 'curso_id', 'nota_final', 'peso_evaluado',
+    'evaluaciones_rendidas', 'evaluaciones_aplicadas'
+]
+
+
+def _redondear(valores, decimales=2):
+    """Redondeo "escolar" (mitad hacia arriba); np.round redondea al par"""
+    factor = 10 ** decimales
+    return np.floor(valores * factor + 0.5) / factor
+
+
+def calcular_notas_finales_df(evaluaciones, calificaciones, inscripciones, faltantes='cero'):
+    """
+    Núcleo vectorizado del cálculo.
+
+    evaluaciones:   DataFrame [evaluacion_id, curso_id, ponderacion]
+    calificaciones: DataFrame [evaluacion_id, estudiante_id, nota]
+    inscripciones:  DataFrame [estudiante_id, curso_id]
+
+    Devuelve un DataFrame con COLUMNAS_RESULTADO, una fila por estudiante
+    inscrito (o calificado) en un curso con evaluaciones aplicadas.
+    """
+    if faltantes not in FALTANTES:
+        raise ValueError(f"faltantes debe ser uno de {FALTANTES}")
+
+    evaluaciones = evaluaciones.astype({'ponderacion': 'float64'})
+    notas = calificaciones.astype({'nota': 'float64'}).merge(
+        evaluaciones, on='evaluacion_id', how='inner', sort=False
+    )
+    if notas.empty:
+        return pd.DataFrame(columns=COLUMNAS_RESULTADO)
+
+    # Peso total y cantidad de evaluaciones aplicadas por curso
+    aplicadas = evaluaciones[evaluaciones['evaluacion_id'].isin(notas['evaluacion_id'].unique())]
+    por_curso = aplicadas.groupby('curso_id', sort=False).agg(
+        peso_curso=('ponderacion', 'sum'),
+        evaluaciones_aplicadas=('evaluacion_id', 'size')
+    )
+
+    notas['aporte'] = notas['nota'].to_numpy() * notas['ponderacion'].to_numpy()
+    por_estudiante = notas.groupby(['estudiante_id', 'curso_id'], sort=False).agg(
+        suma=('aporte', 'sum'),
+        peso=('ponderacion', 'sum'),
+        evaluaciones_rendidas=('nota', 'size')
+    )
+
+    # Inscritos sin ninguna nota también reciben fila (con peso 0)
+    inscritos = pd.MultiIndex.from_frame(
+        inscripciones[inscripciones['curso_id'].isin(por_curso.index)][['estudiante_id', 'curso_id']]
+    )
+    por_estudiante = por_estudiante.reindex(
+        por_estudiante.index.union(inscritos), fill_value=0
+    ).reset_index()
+    resultado = por_estudiante.join(por_curso, on='curso_id')
+
+    suma = resultado['suma'].to_numpy()
+    peso = resultado['peso'].to_numpy(dtype='float64')
+    peso_curso = resultado['peso_curso'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if faltantes == 'cero':
+            nota_final = suma / peso_curso
+        else:
+            nota_final = np.where(peso > 0, suma / peso, np.nan)
+        peso_evaluado = peso / peso_curso * 100
+
+    resultado['nota_final'] = _redondear(nota_final)
+    resultado['peso_evaluado'] = _redondear(peso_evaluado)
+    resultado['evaluaciones_rendidas'] = resultado['evaluaciones_rendidas'].astype('int64')
+    return resultado[COLUMNAS_RESULTADO]
+
+
+def _dataframe(queryset, columnas):
+    """Ejecuta un values_list directamente con el cursor (sin instanciar modelos)"""
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=columnas)
+
+
+def cargar_datos(periodo, curso=None, grado=None):
+    """Evaluaciones, calificaciones e inscripciones activas de un período (tres consultas)"""
+    filtros = {'periodo_academico_id': periodo}
+    if curso is not None:
+        filtros['id'] = curso
+    if grado is not None:
+        filtros['grado_id'] = grado
+
+    def con_prefijo(prefijo):
+        return {f'{prefijo}__{campo}': valor for campo, valor in filtros.items()}
+
+    evaluaciones = _dataframe(
+        Evaluacion.objects.filter(**con_prefijo('curso')).values_list('id', 'curso_id', 'ponderacion'),
+        ['evaluacion_id', 'curso_id', 'ponderacion']
+    )
+    calificaciones = _dataframe(
+        Calificacion.objects.filter(**con_prefijo('evaluacion__curso')).values_list(
+            'evaluacion_id', 'estudiante_id', 'nota'
+        ),
+        ['evaluacion_id', 'estudiante_id', 'nota']
+    )
+    inscripciones = _dataframe(
+        Inscripcion.objects.filter(activa=True, **con_prefijo('curso')).values_list(
+            'estudiante_id', 'curso_id'
+        ),
+        ['estudiante_id', 'curso_id']
+    )
+    return evaluaciones, calificaciones, inscripciones
+
+
+def calcular_notas_finales(periodo, curso=None, grado=None, faltantes='cero'):
+    """Notas finales de un período (opcionalmente de un curso o grado) como DataFrame"""
+    return calcular_notas_finales_df(*cargar_datos(periodo, curso, grado), faltantes=faltantes)
+
+
+def refrescar_notas_finales(periodo, curso=None, grado=None, faltantes='cero', batch_size=2000):
+    """
+    Recalcula y reemplaza las filas de NotaFinal del período (o curso/grado).
+
+    Devuelve la cantidad de filas guardadas.
+    """
+    resultado = calcular_notas_finales(periodo, curso, grado, faltantes)
+    resultado = resultado.astype(object).where(resultado.notna(), None)
+
+    objetos = [
+        NotaFinal(
+            estudiante_id=estudiante_id, curso_id=curso_id, nota_final=nota_final,
+            peso_evaluado=peso_evaluado, evaluaciones_rendidas=rendidas,
+            evaluaciones_aplicadas=aplicadas
+        )
+        for estudiante_id, curso_id, nota_final, peso_evaluado, rendidas, aplicadas
+        in resultado.itertuples(index=False, name=None)
+    ]
+
+    existentes = NotaFinal.objects.filter(curso__periodo_academico_id=periodo)
+    if curso is not None:
+        existentes = existentes.filter(curso_id=curso)
+    if grado is not None:
+        existentes = existentes.filter(curso__grado_id=grado)
+
+    with transaction.atomic():
+        existentes.delete()
+        NotaFinal.objects.bulk_create(objetos, batch_size=batch_size)
+    return len(objetos)
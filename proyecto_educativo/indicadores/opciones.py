@@ -0,0 +1,125 @@
+"""
+Opciones remotas para los selects de los formularios
+====================================================
+Los formularios ya no incrustan en el HTML todas las filas de Estudiante,
+Curso o Evaluacion: el widget `SelectRemoto` (widgets.py) solo renderiza la
+opción elegida y el navegador pide el resto a /api/opciones/<recurso>/ a
+medida que se escribe.
+
+Cada recurso declara su queryset (con las relaciones que recorre
+`__str__`), un orden respaldado por índice para la paginación keyset y
+cómo aplicar ?q= y los filtros dependientes (?curso=, ?evaluacion=). Las
+personas se buscan en el índice de búsqueda (busqueda.py); cursos y
+evaluaciones, con tablas mucho menores, por nombre.
+"""
+
+from collections import namedtuple
+from functools import reduce
+from operator import and_, or_
+
+from django.db.models import Q
+
+from . import busqueda
+from .models import Apoderado, Curso, Estudiante, Evaluacion, Profesor
+
+# Un recurso: queryset base, orden keyset (termina en 'id') y filtro de la consulta
+Recurso = namedtuple('Recurso', 'queryset orden filtrar')
+
+MAXIMO_POR_PAGINA = 50
+
+
+def _entero(parametros, nombre):
+    """Id numérico de ?<nombre>= o None; ValueError si no es un entero"""
+    valor = parametros.get(nombre)
+    if valor in (None, ''):
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        raise ValueError(f"El parámetro '{nombre}' debe ser un id numérico")
+
+
+def _por_indice(tipo):
+    """Filtro de personas: ?q= contra el índice de búsqueda del `tipo`"""
+    def filtrar(queryset, parametros):
+        filas = busqueda.coincidencias(tipo, parametros.get('q', ''))
+        if filas is not None:
+            queryset = queryset.filter(id__in=filas.values('objeto_id'))
+        return queryset
+    return filtrar
+
+
+def _por_texto(campos):
+    """Filtro por palabras de ?q=: cada palabra debe aparecer en alguno de `campos`"""
+    def filtrar(queryset, parametros):
+        palabras = parametros.get('q', '').split()[:busqueda.MAXIMO_PALABRAS]
+        if palabras:
+            queryset = queryset.filter(reduce(and_, (
+                reduce(or_, (Q(**{f'{campo}__icontains': palabra}) for campo in campos))
+                for palabra in palabras
+            )))
+        return queryset
+    return filtrar
+
+
+def _filtrar_estudiantes(queryset, parametros):
+    """?curso= o ?evaluacion= limitan a los inscritos activos en ese curso"""
+    queryset = _por_indice('estudiante')(queryset, parametros)
+    curso = _entero(parametros, 'curso')
+    if curso is not None:
+        queryset = queryset.filter(inscripcion__curso_id=curso, inscripcion__activa=True)
+    evaluacion = _entero(parametros, 'evaluacion')
+    if evaluacion is not None:
+        queryset = queryset.filter(inscripcion__curso__evaluacion=evaluacion, inscripcion__activa=True)
+    return queryset
+
+
+def _filtrar_profesores(queryset, parametros):
+    return _por_indice('profesor')(queryset.filter(activo=True), parametros)
+
+
+def _filtrar_cursos(queryset, parametros):
+    queryset = _por_texto([
+        'grado__nombre', 'asignatura__nombre', 'seccion', 'profesor__apellidos',
+    ])(queryset, parametros)
+    periodo = _entero(parametros, 'periodo')
+    if periodo is not None:
+        queryset = queryset.filter(periodo_academico_id=periodo)
+    return queryset
+
+
+def _filtrar_evaluaciones(queryset, parametros):
+    queryset = _por_texto(['nombre', 'curso__asignatura__nombre', 'curso__grado__nombre'])(queryset, parametros)
+    curso = _entero(parametros, 'curso')
+    if curso is not None:
+        queryset = queryset.filter(curso_id=curso)
+    return queryset
+
+
+RECURSOS = {
+    'estudiantes': Recurso(
+        lambda: Estudiante.objects.all(), ['apellidos', 'nombres', 'id'], _filtrar_estudiantes,
+    ),
+    'apoderados': Recurso(
+        lambda: Apoderado.objects.all(), ['apellidos', 'nombres', 'id'], _por_indice('apoderado'),
+    ),
+    'profesores': Recurso(
+        lambda: Profesor.objects.all(), ['apellidos', 'nombres', 'id'], _filtrar_profesores,
+    ),
+    'cursos': Recurso(
+        lambda: Curso.objects.select_related(*Curso.RELACIONES_STR),
+        ['-periodo_academico_id', 'id'], _filtrar_cursos,
+    ),
+    'evaluaciones': Recurso(
+        lambda: Evaluacion.objects.select_related(
+            'curso', *(f'curso__{relacion}' for relacion in Curso.RELACIONES_STR)
+        ),
+        ['-fecha', 'id'], _filtrar_evaluaciones,
+    ),
+}
+
+
+def opciones(recurso, parametros):
+    """QuerySet filtrado del `recurso` según ?q= y sus filtros dependientes (KeyError si no existe)"""
+    definicion = RECURSOS[recurso]
+    return definicion.filtrar(definicion.queryset(), parametros)
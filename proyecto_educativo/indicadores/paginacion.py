@@ -0,0 +1,314 @@
+"""
+Paginación de la API
+====================
+Las tablas de dimensiones (grados, cursos, estudiantes...) usan la
+paginación por número de página configurada en REST_FRAMEWORK, con un
+conteo que deja de ser exacto en tablas grandes (PaginacionConteoAproximado).
+Las tablas de hechos de alto volumen (asistencia, calificaciones) usan
+paginación por clave (keyset): cada página filtra a partir de la última
+fila devuelta sobre un orden indexado, sin COUNT(*) ni OFFSET, así que
+recorrer millones de filas tiene un costo por página constante.
+"""
+
+import base64
+import hashlib
+import json
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# ============================================
+# CONTEO APROXIMADO (paginación por número)
+# ============================================
+
+def _umbral():
+    return getattr(settings, 'PAGINACION_CONTEO_EXACTO_HASTA', 100_000)
+
+
+def estimar_filas(queryset):
+    """
+    Filas estimadas por el planificador de PostgreSQL (None en otros motores).
+    
+    Sin filtros lee `pg_class.reltuples` (mantenido por ANALYZE/autovacuum);
+    con filtros, la estimación de EXPLAIN para la consulta completa.
+    """
+    conexion = connections[queryset.db]
+    if conexion.vendor != 'postgresql':
+        return None
+    queryset = queryset.order_by()
+    with conexion.cursor() as cursor:
+        if not queryset.query.where and not queryset.query.distinct:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            fila = cursor.fetchone()
+            # -1: tabla nunca analizada
+            return fila[0] if fila and fila[0] >= 0 else None
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _clave_conteo(queryset):
+    sql, params = queryset.order_by().query.sql_with_params()
+    firma = hashlib.sha256(f'{queryset.db}:{sql}:{params!r}'.encode('utf-8')).hexdigest()
+    return f'indicadores:conteo:{firma}'
+
+
+class PaginaAproximada(Page):
+    """Página cuyo `has_next` se basa en las filas leídas, no en el conteo"""
+    
+    def __init__(self, object_list, number, paginator, hay_mas):
+        super().__init__(object_list, number, paginator)
+        self.hay_mas = hay_mas
+    
+    def has_next(self):
+        return self.hay_mas
+
+
+class PaginadorConteoAproximado(Paginator):
+    """
+    Paginator cuyo `count` es exacto solo en listados chicos.
+    
+    Si el planificador (PostgreSQL) estima más de
+    PAGINACION_CONTEO_EXACTO_HASTA filas se usa la estimación. En otros
+    motores el COUNT(*) exacto de un listado grande se guarda en la caché
+    (PAGINACION_CONTEO_CACHE_TIMEOUT) y se reutiliza para las mismas
+    consultas. `aproximado` indica si el conteo devuelto no es exacto; en
+    ese caso las páginas se leen con una fila extra para saber si hay más,
+    de modo que un conteo desactualizado no oculta filas.
+    """
+    aproximado = False
+    
+    def validate_number(self, number):
+        # Con conteo aproximado no se acota por num_pages (ver page())
+        if not (self.count and self.aproximado):
+            return super().validate_number(number)
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+    
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.aproximado:
+            return super().page(number)
+        inicio = (number - 1) * self.per_page
+        filas = list(self.object_list[inicio:inicio + self.per_page + 1])
+        if not filas and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+        return PaginaAproximada(filas[:self.per_page], number, self, len(filas) > self.per_page)
+    
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        if self.object_list.query.is_empty():
+            # queryset.none(): no genera SQL que estimar
+            return 0
+        umbral = _umbral()
+        estimado = estimar_filas(self.object_list)
+        if estimado is not None and estimado > umbral:
+            self.aproximado = True
+            return estimado
+        
+        clave = _clave_conteo(self.object_list) if estimado is None else None
+        if clave is not None:
+            guardado = cache.get(clave)
+            if guardado is not None:
+                self.aproximado = True
+                return guardado
+        total = self.object_list.count()
+        if clave is not None and total > umbral:
+            cache.set(clave, total, getattr(settings, 'PAGINACION_CONTEO_CACHE_TIMEOUT', 300))
+        return total
+
+
+class PaginacionConteoAproximado(PageNumberPagination):
+    """
+    Paginación por número de página con conteo aproximado en tablas grandes.
+    
+    La respuesta agrega `count_aproximado`: true si `count` es una
+    estimación o un conteo cacheado (`next` sigue siendo exacto).
+    """
+    django_paginator_class = PaginadorConteoAproximado
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_aproximado': self.page.paginator.aproximado,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+    
+    def get_paginated_response_schema(self, schema):
+        respuesta = super().get_paginated_response_schema(schema)
+        respuesta['properties']['count_aproximado'] = {'type': 'boolean', 'example': False}
+        return respuesta
+
+
+# ============================================
+# KEYSET (tablas de hechos)
+# ============================================
+
+
+class PaginacionKeyset(BasePagination):
+    """
+    Paginación por clave compuesta.
+
+    `ordering` debe terminar en una clave única (normalmente 'id') y estar
+    respaldada por un índice. El cursor (?cursor=) codifica los valores de
+    orden de la primera o última fila de la página y la dirección.
+    """
+    ordering = ['id']
+    page_size = None  # por defecto REST_FRAMEWORK['PAGE_SIZE']
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.tamano = self._tamano_pagina(request)
+        self.modelo = queryset.model
+
+        posicion, hacia_atras = self._leer_cursor(request)
+        orden = [self._invertir(campo) for campo in self.ordering] if hacia_atras else list(self.ordering)
+        queryset = queryset.order_by(*orden)
+        if posicion is not None:
+            queryset = queryset.filter(self._despues_de(orden, posicion))
+
+        filas = list(queryset[:self.tamano + 1])
+        hay_mas = len(filas) > self.tamano
+        filas = filas[:self.tamano]
+        if hacia_atras:
+            filas.reverse()
+
+        self.cursor_siguiente = self.cursor_anterior = None
+        if filas:
+            if hay_mas or hacia_atras:
+                self.cursor_siguiente = (self._posicion(filas[-1]), False)
+            if posicion is not None and (hay_mas or not hacia_atras):
+                self.cursor_anterior = (self._posicion(filas[0]), True)
+        return filas
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        return self._enlace(self.cursor_siguiente)
+
+    def get_previous_link(self):
+        return self._enlace(self.cursor_anterior)
+
+    # --------------------------------------------
+    # Cursor
+    # --------------------------------------------
+
+    def _tamano_pagina(self, request):
+        tamano = self.page_size or api_settings.PAGE_SIZE
+        valor = request.query_params.get(self.page_size_query_param)
+        if valor:
+            try:
+                tamano = int(valor)
+            except ValueError:
+                pass
+        return max(1, min(tamano, self.max_page_size))
+
+    @staticmethod
+    def _invertir(campo):
+        return campo[1:] if campo.startswith('-') else f'-{campo}'
+
+    def _campo(self, campo):
+        return self.modelo._meta.get_field(campo.lstrip('-'))
+
+    def _posicion(self, fila):
+        """Valores de orden de una fila (instancia o dict de `.values()`)"""
+        valores = []
+        for campo in self.ordering:
+            nombre = self._campo(campo).attname
+            valor = fila[nombre] if isinstance(fila, dict) else getattr(fila, nombre)
+            valores.append(valor.isoformat() if hasattr(valor, 'isoformat') else valor)
+        return valores
+
+    def _leer_cursor(self, request):
+        crudo = request.query_params.get(self.cursor_query_param)
+        if not crudo:
+            return None, False
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(crudo.encode('ascii')).decode('utf-8'))
+            valores = datos['p']
+            if len(valores) != len(self.ordering):
+                raise ValueError
+            posicion = [self._campo(campo).to_python(valor) for campo, valor in zip(self.ordering, valores)]
+            return posicion, bool(datos.get('r'))
+        except (TypeError, ValueError, KeyError, ValidationError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _despues_de(self, orden, posicion):
+        """Filas estrictamente posteriores a `posicion` según `orden` (comparación lexicográfica)"""
+        condiciones = []
+        for i, campo in enumerate(orden):
+            iguales = {orden[j].lstrip('-'): posicion[j] for j in range(i)}
+            operador = 'lt' if campo.startswith('-') else 'gt'
+            condiciones.append(Q(**iguales, **{f'{campo.lstrip("-")}__{operador}': posicion[i]}))
+        return reduce(or_, condiciones)
+
+    def _enlace(self, cursor):
+        if cursor is None:
+            return None
+        posicion, hacia_atras = cursor
+        datos = {'p': posicion}
+        if hacia_atras:
+            datos['r'] = 1
+        codificado = base64.urlsafe_b64encode(json.dumps(datos).encode('utf-8')).decode('ascii')
+        return replace_query_param(remove_query_param(self.base_url, 'page'), self.cursor_query_param, codificado)
+
+
+class PaginacionAsistencia(PaginacionKeyset):
+    """Asistencia: más recientes primero (índice asistencia_fecha_id_idx)"""
+    ordering = ['-fecha', 'id']
+
+
+class PaginacionCalificaciones(PaginacionKeyset):
+    """Calificaciones: más recientes primero (índice calificacion_fecha_id_idx)"""
+    ordering = ['-fecha_registro', 'id']
@@ -0,0 +1,127 @@
+"""
+Plan de consultas para campos dispersos (?fields= / ?omit=)
+===========================================================
+Dado el subconjunto de campos de un serializer pedido por el cliente,
+decide qué relaciones de `select_related` siguen siendo necesarias y qué
+columnas pasar a `only()`, a partir del `source` de cada campo:
+
+- 'nota' o 'estudiante' (FK)       -> columna propia, sin JOIN
+- 'estudiante.ci'                  -> JOIN a estudiante, columna ci
+- 'curso.__str__' / propiedades    -> JOIN al modelo completo (y a sus
+                                      relaciones declaradas)
+
+Si algún campo depende de columnas que no se pueden deducir (propiedades o
+métodos del modelo base), se conservan todas las columnas.
+"""
+
+import re
+
+from django.core.exceptions import FieldDoesNotExist
+
+METODOS_LECTURA = ('GET', 'HEAD')
+
+_DISPLAY = re.compile(r'^get_(\w+)_display$')
+
+
+def campos_solicitados(request):
+    """Conjuntos (fields, omit) de los query params; (None, None) si no aplica"""
+    if request is None or request.method not in METODOS_LECTURA:
+        return None, None
+
+    def leer(nombre):
+        valor = request.query_params.get(nombre)
+        if not valor:
+            return None
+        return {campo.strip() for campo in valor.split(',') if campo.strip()}
+
+    return leer('fields'), leer('omit')
+
+
+def _campo_concreto(modelo, nombre):
+    """Nombre del campo concreto de `modelo` que lee el atributo `nombre` (o None)"""
+    coincidencia = _DISPLAY.match(nombre)
+    if coincidencia:
+        nombre = coincidencia.group(1)
+    try:
+        campo = modelo._meta.get_field(nombre)
+    except FieldDoesNotExist:
+        return None
+    return campo.name if campo.concrete else None
+
+
+def _rutas(modelo, campos):
+    """
+    (columnas, completos) que necesitan los campos del serializer.
+
+    columnas: rutas de only() ('nota', 'estudiante__ci'); completos: rutas
+    de relaciones que se deben cargar enteras ('curso'); None en columnas
+    si hace falta el modelo base completo.
+    """
+    columnas, completos, todas = set(), set(), False
+    for campo in campos.values():
+        atributos = campo.source_attrs
+        actual, ruta = modelo, []
+        for atributo in atributos[:-1]:
+            try:
+                relacion = actual._meta.get_field(atributo)
+            except FieldDoesNotExist:
+                relacion = None
+            if relacion is None or not relacion.is_relation or relacion.many_to_many or relacion.one_to_many:
+                break
+            ruta.append(atributo)
+            actual = relacion.related_model
+        else:
+            nombre = _campo_concreto(actual, atributos[-1]) if atributos else None
+            if nombre is not None:
+                columnas.add('__'.join(ruta + [nombre]))
+                continue
+        if ruta:
+            completos.add('__'.join(ruta))
+        else:
+            todas = True
+    return (None if todas else columnas), completos
+
+
+def relaciones_necesarias(relaciones, modelo, campos):
+    """Subconjunto de `relaciones` (rutas select_related) que usan los `campos`"""
+    columnas, completos = _rutas(modelo, campos)
+    usadas = set(completos)
+    for columna in columnas or ():
+        partes = columna.split('__')[:-1]
+        if partes:
+            usadas.add('__'.join(partes))
+    return [
+        relacion for relacion in relaciones
+        if any(
+            relacion == ruta or relacion.startswith(f'{ruta}__') or ruta.startswith(f'{relacion}__')
+            for ruta in usadas
+        )
+    ]
+
+
+def columnas_necesarias(modelo, campos, relaciones):
+    """
+    Argumentos para only() con los `campos` y las `relaciones` conservadas,
+    o None si se deben cargar todas las columnas.
+    """
+    columnas, completos = _rutas(modelo, campos)
+    if columnas is None:
+        return None
+    # Una relación completa no puede tener a la vez columnas restringidas
+    if any(columna.startswith(f'{ruta}__') for ruta in completos for columna in columnas):
+        return None
+
+    # Solo se restringen columnas de relaciones que se cargan con JOIN
+    unidas = set(relaciones)
+    restringidas = {columna for columna in columnas if columna.rpartition('__')[0] in unidas | {''}}
+
+    def restringida(ruta):
+        return any(columna.startswith(f'{ruta}__') for columna in restringidas)
+
+    for relacion in relaciones:
+        partes = relacion.split('__')
+        for i in range(1, len(partes) + 1):
+            padre = '__'.join(partes[:i - 1])
+            if not padre or restringida(padre):
+                restringidas.add('__'.join(partes[:i]))
+    return [modelo._meta.pk.name] + sorted(restringidas - {modelo._meta.pk.name})
@@ -0,0 +1,343 @@
+"""
+Presupuesto de consultas por petición
+=====================================
+Mide las consultas SQL de cada petición (total, duplicadas, similares y
+tiempo de base de datos) para detectar regresiones N+1 antes de llegar a
+producción:
+
+- `PresupuestoConsultasMiddleware` (desarrollo/staging): con
+  PRESUPUESTO_CONSULTAS_ACTIVO agrega las cabeceras X-DB-* y Server-Timing
+  a cada respuesta, registra la medición en el logger de este módulo y,
+  si la ruta excede su presupuesto, lo advierte en el log o, con
+  PRESUPUESTO_CONSULTAS_ESTRICTO, lanza PresupuestoExcedido.
+- `PresupuestoRutasMixin` (tests): recorre todas las rutas de
+  indicadores/urls.py (GET y, con un cuerpo de ejemplo, POST) y falla si
+  alguna excede su presupuesto o no lo tiene.
+
+Los presupuestos se declaran en PRESUPUESTO_CONSULTAS por nombre de ruta
+('indicadores:dashboard'), con comodines ('indicadores:*-list'); vale la
+primera coincidencia exacta y, si no hay, el primer patrón que coincida.
+Esas claves valen para las lecturas (GET, HEAD, OPTIONS); las escrituras
+solo usan claves con el método delante ('POST indicadores:pasar_lista'),
+así un comodín de lectura nunca cubre un POST. Cada valor es el máximo de
+consultas o un dict con 'consultas', 'duplicadas' y/o 'tiempo_ms'.
+
+"Duplicadas" son consultas idénticas (mismo SQL y parámetros) repetidas;
+"similares", el mismo SQL con distintos parámetros: la firma de un N+1.
+Las respuestas en streaming (exportaciones) consultan después de pasar por
+el middleware, así que este solo mide su preparación.
+"""
+
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from fnmatch import fnmatchcase
+
+from django.conf import settings
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils.http import urlencode
+
+logger = logging.getLogger(__name__)
+
+LIMITES = ('consultas', 'duplicadas', 'tiempo_ms')
+METODOS_LECTURA = ('GET', 'HEAD', 'OPTIONS')
+
+
+class PresupuestoExcedido(Exception):
+    """Una petición excedió el presupuesto de consultas de su ruta"""
+
+
+# ============================================
+# MEDICIÓN
+# ============================================
+
+class Medicion:
+    """Consultas ejecutadas mientras está instalada como execute_wrapper"""
+
+    def __init__(self):
+        self.consultas = []  # (sql, parámetros, segundos)
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append((sql, params, time.perf_counter() - inicio))
+
+    @property
+    def total(self):
+        return len(self.consultas)
+
+    @property
+    def duplicadas(self):
+        """Ejecuciones repetidas de una consulta idéntica (sin contar la primera)"""
+        return self.total - len(Counter((sql, repr(params)) for sql, params, _ in self.consultas))
+
+    @property
+    def similares(self):
+        """Ejecuciones repetidas del mismo SQL con cualquier parámetro (sin contar la primera)"""
+        return self.total - len(Counter(sql for sql, _, _ in self.consultas))
+
+    @property
+    def tiempo_ms(self):
+        return sum(duracion for _, _, duracion in self.consultas) * 1000
+
+    def mas_repetidas(self, cantidad=3):
+        """[(veces, sql)] de los SQL más repetidos"""
+        return [
+            (veces, sql) for sql, veces in
+            Counter(sql for sql, _, _ in self.consultas).most_common(cantidad) if veces > 1
+        ]
+
+    def como_dict(self):
+        return {
+            'consultas': self.total,
+            'duplicadas': self.duplicadas,
+            'similares': self.similares,
+            'tiempo_ms': round(self.tiempo_ms, 2),
+        }
+
+
+@contextmanager
+def medir_consultas():
+    """Mide las consultas de todas las bases de datos dentro del bloque"""
+    medicion = Medicion()
+    with ExitStack() as pila:
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(medicion))
+        yield medicion
+
+
+# ============================================
+# PRESUPUESTOS
+# ============================================
+
+def presupuesto(nombre_ruta, presupuestos=None, metodo='GET'):
+    """Límites {'consultas': n, ...} de la ruta `nombre_ruta` para `metodo` (None si no tiene)"""
+    if presupuestos is None:
+        presupuestos = getattr(settings, 'PRESUPUESTO_CONSULTAS', {})
+    if nombre_ruta is None:
+        return None
+    metodo = metodo.upper()
+    if metodo in METODOS_LECTURA:
+        candidatos = {clave: valor for clave, valor in presupuestos.items() if ' ' not in clave}
+    else:
+        prefijo = f'{metodo} '
+        candidatos = {
+            clave[len(prefijo):]: valor for clave, valor in presupuestos.items() if clave.startswith(prefijo)
+        }
+    valor = candidatos.get(nombre_ruta)
+    if valor is None:
+        valor = next(
+            (limite for patron, limite in candidatos.items() if fnmatchcase(nombre_ruta, patron)),
+            None
+        )
+    if valor is None:
+        return None
+    return valor if isinstance(valor, dict) else {'consultas': valor}
+
+
+def excesos(medicion, limites, limites_verificados=LIMITES):
+    """Descripciones de los límites de `limites` que `medicion` excede"""
+    if not limites:
+        return []
+    medido = medicion.como_dict()
+    return [
+        f"{limite} {medido[limite]} > {limites[limite]}"
+        for limite in limites_verificados
+        if limite in limites and medido[limite] > limites[limite]
+    ]
+
+
+# ============================================
+# MIDDLEWARE
+# ============================================
+
+class PresupuestoConsultasMiddleware:
+    """
+    Cabeceras, log y verificación del presupuesto de consultas por petición.
+
+    Inactivo (sin costo) salvo con PRESUPUESTO_CONSULTAS_ACTIVO; pensado
+    para desarrollo y staging. Conviene ubicarlo primero en MIDDLEWARE para
+    medir también las consultas de sesión y autenticación.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'PRESUPUESTO_CONSULTAS_ACTIVO', False):
+            return self.get_response(request)
+
+        with medir_consultas() as medicion:
+            response = self.get_response(request)
+
+        coincidencia = getattr(request, 'resolver_match', None)
+        ruta = coincidencia.view_name if coincidencia else None
+        response['X-DB-Consultas'] = str(medicion.total)
+        response['X-DB-Duplicadas'] = str(medicion.duplicadas)
+        response['X-DB-Similares'] = str(medicion.similares)
+        response['X-DB-Tiempo-Ms'] = f'{medicion.tiempo_ms:.1f}'
+        response['Server-Timing'] = f'db;dur={medicion.tiempo_ms:.1f};desc="{medicion.total} consultas"'
+
+        limites = presupuesto(ruta, metodo=request.method)
+        if limites:
+            response['X-DB-Presupuesto'] = ', '.join(f'{k}={v}' for k, v in limites.items())
+        exceso = excesos(medicion, limites)
+        if not exceso:
+            logger.debug('%s %s (%s): %s', request.method, request.path, ruta, medicion.como_dict())
+            return response
+
+        mensaje = (
+            f"{request.method} {request.path} ({ruta}) excede su presupuesto de consultas: "
+            f"{'; '.join(exceso)}"
+        )
+        for veces, sql in medicion.mas_repetidas():
+            mensaje += f'\n  {veces}x {sql[:200]}'
+        if getattr(settings, 'PRESUPUESTO_CONSULTAS_ESTRICTO', False):
+            raise PresupuestoExcedido(mensaje)
+        logger.warning(mensaje)
+        return response
+
+
+# ============================================
+# RUTAS (para los tests)
+# ============================================
+
+def rutas(urlconf='indicadores.urls'):
+    """
+    {nombre: (parámetros, vista)} de las rutas con nombre de `urlconf`.
+
+    `parámetros` son los argumentos de la URL sin el sufijo de formato de
+    DRF (las variantes `.json` comparten nombre y se omiten).
+    """
+    encontradas = {}
+
+    def recorrer(patrones, prefijo_parametros=()):
+        for patron in patrones:
+            grupos = tuple(patron.pattern.regex.groupindex)
+            if isinstance(patron, URLResolver):
+                recorrer(patron.url_patterns, prefijo_parametros + grupos)
+            elif isinstance(patron, URLPattern) and patron.name and 'format' not in grupos:
+                encontradas.setdefault(patron.name, (prefijo_parametros + grupos, patron.callback))
+
+    recorrer(get_resolver(urlconf).url_patterns)
+    return encontradas
+
+
+def _pk_de_ejemplo(vista):
+    """Pk de alguna fila del modelo del viewset de DRF detrás de `vista` (None si no aplica)"""
+    queryset = getattr(getattr(vista, 'cls', None), 'queryset', None)
+    if queryset is None:
+        return None
+    return queryset.model._default_manager.order_by('pk').values_list('pk', flat=True).first()
+
+
+def _metodos(vista):
+    """Métodos que atiende la vista de un viewset de DRF (None en vistas de función: no los declaran)"""
+    acciones = getattr(vista, 'actions', None)
+    return {metodo.upper() for metodo in acciones} if acciones else None
+
+
+class PresupuestoRutasMixin:
+    """
+    Para TestCase: `assertPresupuestoRutas()` hace GET a cada ruta de
+    `urlconf_presupuesto` y verifica su presupuesto de consultas. El GET
+    debe responder 2xx (una respuesta de error se mide por su camino corto);
+    las rutas de viewsets que no atienden GET solo miden su escritura.
+
+    Los parámetros `pk` de las rutas de viewsets se toman de una fila
+    existente del modelo; el resto se pasan en `parametros` (por nombre
+    de parámetro o, en `por_ruta`, por nombre de ruta). Una ruta sin
+    presupuesto, o que no se puede construir, también es un error salvo que
+    esté en `excluir`.
+
+    `por_ruta[nombre]` describe además una escritura a medir con su
+    presupuesto 'POST <ruta>': 'method', 'data', 'format' ('json' para
+    enviar JSON), 'query' (parámetros de la URL, también para el GET) y
+    'status' (el esperado; sin él, cualquier respuesta menor a 400). Las
+    rutas de viewsets que aceptan POST y las que tienen un presupuesto de
+    escritura deben tener su escritura en `por_ruta`.
+    """
+    urlconf_presupuesto = 'indicadores.urls'
+    namespace_presupuesto = 'indicadores'
+
+    def assertPresupuestoRutas(self, parametros=None, por_ruta=None, excluir=(), presupuestos=None):
+        parametros, por_ruta = parametros or {}, por_ruta or {}
+        fallas, mediciones = [], {}
+        for nombre, (argumentos, vista) in sorted(rutas(self.urlconf_presupuesto).items()):
+            if nombre in excluir:
+                continue
+            ruta = f'{self.namespace_presupuesto}:{nombre}'
+            especificacion = por_ruta.get(nombre, {})
+            if not presupuesto(ruta, presupuestos):
+                fallas.append(f'{ruta}: sin presupuesto en PRESUPUESTO_CONSULTAS')
+                continue
+
+            kwargs = {}
+            for argumento in argumentos:
+                if argumento in especificacion:
+                    kwargs[argumento] = especificacion[argumento]
+                elif argumento in parametros:
+                    kwargs[argumento] = parametros[argumento]
+                elif argumento == 'pk':
+                    kwargs[argumento] = _pk_de_ejemplo(vista)
+                if kwargs.get(argumento) is None:
+                    fallas.append(f"{ruta}: falta un valor para '{argumento}'")
+                    break
+            else:
+                url = reverse(ruta, kwargs=kwargs)
+                if especificacion.get('query'):
+                    url = f"{url}?{urlencode(especificacion['query'])}"
+                metodos = _metodos(vista)
+                if metodos is None or 'GET' in metodos:
+                    medicion = self._medir_ruta(ruta, url, 'GET', especificacion, presupuestos, fallas)
+                    mediciones[ruta] = medicion.como_dict()
+
+                metodo = especificacion.get('method', '').upper()
+                acepta_post = metodos is not None and 'POST' in metodos
+                if not metodo and (acepta_post or presupuesto(ruta, presupuestos, 'POST')):
+                    fallas.append(f"{ruta}: atiende POST pero no hay una escritura en por_ruta")
+                elif metodo and not presupuesto(ruta, presupuestos, metodo):
+                    fallas.append(f"{ruta}: sin presupuesto '{metodo} {ruta}' en PRESUPUESTO_CONSULTAS")
+                elif metodo:
+                    medicion = self._medir_ruta(ruta, url, metodo, especificacion, presupuestos, fallas)
+                    mediciones[f'{metodo} {ruta}'] = medicion.como_dict()
+        if fallas:
+            self.fail('Presupuesto de consultas:\n' + '\n'.join(fallas))
+        return mediciones
+
+    def _medir_ruta(self, ruta, url, metodo, especificacion, presupuestos, fallas):
+        """Hace la petición, anota en `fallas` los errores y excesos y devuelve la medición"""
+        with medir_consultas() as medicion:
+            response = self._pedir_ruta(url, metodo, especificacion)
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+
+        descripcion = f'{metodo} {url}'
+        if metodo == 'GET':
+            fallida = response.status_code // 100 != 2
+        elif 'status' in especificacion:
+            fallida = response.status_code != especificacion['status']
+        else:
+            fallida = response.status_code >= 400
+        if fallida:
+            fallas.append(f'{ruta}: {descripcion} respondió {response.status_code}')
+        # El tiempo depende de la máquina: en los tests solo se cuentan consultas
+        exceso = excesos(
+            medicion, presupuesto(ruta, presupuestos, metodo), limites_verificados=('consultas', 'duplicadas')
+        )
+        if exceso:
+            fallas.append(f"{ruta}: {descripcion} {'; '.join(exceso)}")
+        return medicion
+
+    def _pedir_ruta(self, url, metodo, especificacion):
+        if metodo == 'GET':
+            return self.client.get(url)
+        datos = especificacion.get('data', {})
+        if especificacion.get('format') == 'json':
+            return self.client.generic(metodo, url, json.dumps(datos), content_type='application/json')
+        return getattr(self.client, metodo.lower())(url, datos)
@@ -0,0 +1,58 @@
+"""
+Renderers de la API
+===================
+- JSONRapidoRenderer: mismo JSON que el JSONRenderer de DRF (mismos bytes),
+  codificado con orjson cuando está instalado.
+- MessagePackRenderer: binario compacto, opcional (requiere `msgpack`);
+  se elige con `Accept: application/msgpack`.
+
+Los tipos que ni orjson ni msgpack codifican igual que DRF (Decimal, date,
+datetime, time, textos traducibles...) pasan por el mismo
+`rest_framework.utils.encoders.JSONEncoder.default`, de modo que los tres
+formatos representan igual los valores de todos los serializers.
+"""
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack es opcional
+    msgpack = None
+
+_codificar = JSONEncoder().default
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """JSONRenderer compatible byte a byte, acelerado con orjson"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        opciones = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        contenido = orjson.dumps(data, default=_codificar, option=opciones)
+        # Igual que DRF: U+2028 y U+2029 escapados (no son válidos en JavaScript)
+        return contenido.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Respuestas en MessagePack (`Accept: application/msgpack`)"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_codificar, use_bin_type=True, datetime=False)
+
@@ -0,0 +1,530 @@
+"""
+Resúmenes de KPIs mantenidos incrementalmente
+=============================================
+Cada escritura de Calificacion o Asistencia aplica un delta (suma de notas,
+cantidad de notas, asistencias y ausencias) sobre los resúmenes por
+estudiante, curso y período (los de curso y período cuentan además las
+notas por rango, ver RANGOS_NOTAS), y sobre los resúmenes mensuales (global, por
+grado y por curso). Así el dashboard lee O(cursos) o O(meses) filas en
+lugar de recorrer las tablas de hechos.
+
+Las altas masivas (`bulk_create`) no disparan señales: quien las use debe
+aplicar los deltas con `actualizar_lote` (como hacen las altas en lote de
+lotes.py) o ejecutar `recalcular_resumenes`. `QuerySet.update` sobre
+calificaciones, asistencias, evaluaciones y cursos mueve los aportes
+afectados (KPIQuerySet.update con `moviendo`), igual que las señales
+pre_save de Evaluacion y Curso al cambiar su curso, grado o período.
+
+Las bajas no usan señales (obligarían a Django a borrar fila por fila,
+también en cascada): `delete` de ModeloKPI y de KPIQuerySet resta en lote
+los aportes de todos los hechos que se borran, propios o en cascada
+(`borrando`, ver CASCADAS), antes de borrarlos.
+"""
+
+from collections import namedtuple
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, DateField, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, TruncMonth
+from django.utils import timezone
+
+from .models import (
+    Grado, Asignatura, PeriodoAcademico, Profesor, Estudiante, Evaluacion, Calificacion, Asistencia, Curso,
+    ResumenEstudiante, ResumenCurso, ResumenPeriodo,
+    ResumenMensual, ResumenMensualGrado, ResumenMensualCurso
+)
+
+CAMPOS_RESUMEN = ['suma_notas', 'total_notas', 'total_asistencias', 'total_ausencias']
+CAMPOS_RESUMEN_MENSUAL = CAMPOS_RESUMEN + ['total_ausentes']
+
+# Rangos de notas del dashboard: rango -> (campo de ResumenRangosKPI, nota mínima)
+NOTA_APROBACION = 51
+RANGOS_NOTAS = {
+    'excelente': ('notas_excelentes', 90),
+    'bueno': ('notas_buenas', 70),
+    'regular': ('notas_regulares', NOTA_APROBACION),
+    'insuficiente': ('notas_insuficientes', None),
+}
+CAMPOS_RANGOS = [campo for campo, _ in RANGOS_NOTAS.values()]
+CAMPOS_RESUMEN_RANGOS = CAMPOS_RESUMEN + CAMPOS_RANGOS
+
+# Una dimensión: modelo de resumen, campos clave y campos acumulados
+Dimension = namedtuple('Dimension', 'modelo claves campos')
+
+DIMENSIONES = [
+    Dimension(ResumenEstudiante, ['estudiante_id'], CAMPOS_RESUMEN),
+    Dimension(ResumenCurso, ['curso_id'], CAMPOS_RESUMEN_RANGOS),
+    Dimension(ResumenPeriodo, ['periodo_id'], CAMPOS_RESUMEN_RANGOS),
+    Dimension(ResumenMensual, ['mes'], CAMPOS_RESUMEN_MENSUAL),
+    Dimension(ResumenMensualGrado, ['grado_id', 'mes'], CAMPOS_RESUMEN_MENSUAL),
+    Dimension(ResumenMensualCurso, ['curso_id', 'mes'], CAMPOS_RESUMEN_MENSUAL),
+]
+
+# Cómo se obtiene cada clave desde las tablas de hechos (recálculo completo)
+RUTAS_CALIFICACION = {
+    'estudiante_id': F('estudiante_id'),
+    'curso_id': F('evaluacion__curso_id'),
+    'periodo_id': F('evaluacion__curso__periodo_academico_id'),
+    'grado_id': F('evaluacion__curso__grado_id'),
+    'mes': TruncMonth('fecha_registro', output_field=DateField()),
+}
+RUTAS_ASISTENCIA = {
+    'estudiante_id': F('estudiante_id'),
+    'curso_id': F('curso_id'),
+    'periodo_id': F('curso__periodo_academico_id'),
+    'grado_id': F('curso__grado_id'),
+    'mes': TruncMonth('fecha', output_field=DateField()),
+}
+
+
+def expresion_promedio(prefijo=''):
+    """Expresión SQL de suma_notas / total_notas (None si no hay notas)"""
+    return Case(
+        When(**{f'{prefijo}total_notas__gt': 0},
+             then=Cast(f'{prefijo}suma_notas', FloatField()) / F(f'{prefijo}total_notas')),
+        default=None,
+        output_field=FloatField()
+    )
+
+
+def condiciones_rangos(prefijo=''):
+    """{campo de rango: Q} sobre la nota (`prefijo` para llegar a ella desde otro modelo)"""
+    condiciones = {}
+    maximo = None
+    for campo, minimo in RANGOS_NOTAS.values():
+        condicion = Q()
+        if minimo is not None:
+            condicion &= Q(**{f'{prefijo}nota__gte': minimo})
+        if maximo is not None:
+            condicion &= Q(**{f'{prefijo}nota__lt': maximo})
+        condiciones[campo] = condicion
+        maximo = minimo
+    return condiciones
+
+
+def campo_rango(nota):
+    """Campo de ResumenRangosKPI que cuenta `nota`"""
+    for campo, minimo in RANGOS_NOTAS.values():
+        if minimo is None or nota >= minimo:
+            return campo
+
+
+def inicio_de_mes(fecha):
+    """Primer día del mes de una fecha o de un datetime (en hora local)"""
+    if hasattr(fecha, 'hour'):
+        fecha = timezone.localtime(fecha).date() if timezone.is_aware(fecha) else fecha.date()
+    return fecha.replace(day=1)
+
+
+# ============================================
+# APLICACIÓN DE DELTAS
+# ============================================
+
+def aporte_calificacion(nota):
+    """Deltas que suma una calificación a los resúmenes"""
+    nota = Decimal(str(nota))
+    return {'suma_notas': nota, 'total_notas': 1, campo_rango(nota): 1}
+
+
+def aporte_asistencia(estado):
+    """Deltas que suma un registro de asistencia a los resúmenes"""
+    return {
+        'total_asistencias': 1,
+        'total_ausencias': int(estado in Asistencia.ESTADOS_AUSENCIA),
+        'total_ausentes': int(estado == 'ausente'),
+    }
+
+
+# Columnas (estudiante, curso, periodo, grado, fecha, valor) de cada hecho guardado
+CAMPOS_CONTRIBUCION = {
+    Calificacion: [
+        'estudiante_id', 'evaluacion__curso_id', 'evaluacion__curso__periodo_academico_id',
+        'evaluacion__curso__grado_id', 'fecha_registro', 'nota'
+    ],
+    Asistencia: [
+        'estudiante_id', 'curso_id', 'curso__periodo_academico_id', 'curso__grado_id', 'fecha', 'estado'
+    ],
+}
+
+
+def _contribucion(modelo, fila):
+    """Contribución (hechos, deltas) de una fila de CAMPOS_CONTRIBUCION[modelo]"""
+    estudiante_id, curso_id, periodo_id, grado_id, fecha, valor = fila
+    hechos = {
+        'estudiante_id': estudiante_id, 'curso_id': curso_id, 'periodo_id': periodo_id,
+        'grado_id': grado_id, 'mes': inicio_de_mes(fecha) if fecha else None,
+    }
+    aporte = aporte_calificacion if modelo is Calificacion else aporte_asistencia
+    return hechos, aporte(valor)
+
+
+def contribucion_calificacion(pk=None, instance=None):
+    """
+    Claves (estudiante, curso, periodo, grado, mes) y aporte de una calificación.
+
+    Con `pk` se lee el estado guardado en la base; con `instance`, el estado
+    en memoria. Devuelve None si la calificación no existe.
+    """
+    if pk is not None:
+        fila = Calificacion.objects.filter(pk=pk).values_list(*CAMPOS_CONTRIBUCION[Calificacion]).first()
+        return _contribucion(Calificacion, fila) if fila else None
+    curso_id, periodo_id, grado_id = Evaluacion.objects.filter(pk=instance.evaluacion_id).values_list(
+        'curso_id', 'curso__periodo_academico_id', 'curso__grado_id'
+    ).first() or (None, None, None)
+    return _contribucion(Calificacion, (
+        instance.estudiante_id, curso_id, periodo_id, grado_id, instance.fecha_registro, instance.nota
+    ))
+
+
+def contribucion_asistencia(pk=None, instance=None):
+    """Claves (estudiante, curso, periodo, grado, mes) y aporte de un registro de asistencia"""
+    if pk is not None:
+        fila = Asistencia.objects.filter(pk=pk).values_list(*CAMPOS_CONTRIBUCION[Asistencia]).first()
+        return _contribucion(Asistencia, fila) if fila else None
+    periodo_id, grado_id = Curso.objects.filter(pk=instance.curso_id).values_list(
+        'periodo_academico_id', 'grado_id'
+    ).first() or (None, None)
+    return _contribucion(Asistencia, (
+        instance.estudiante_id, instance.curso_id, periodo_id, grado_id, instance.fecha, instance.estado
+    ))
+
+
+def actualizar(anterior, nueva):
+    """Reemplaza la contribución `anterior` por `nueva` (None si no hay) en todos los resúmenes"""
+    actualizar_lote(([_restar(anterior)] if anterior else []) + ([nueva] if nueva else []))
+
+
+# ============================================
+# DELTAS EN LOTE
+# ============================================
+
+# Claves por UPDATE ... CASE (SQLite limita la profundidad de las expresiones)
+CLAVES_POR_UPDATE = 200
+# Filas por INSERT ... ON CONFLICT DO UPDATE (además del límite de parámetros del motor)
+FILAS_POR_UPSERT = 1000
+# Motores con INSERT ... ON CONFLICT (claves) DO UPDATE SET c = tabla.c + excluded.c
+MOTORES_UPSERT = ('postgresql', 'sqlite')
+
+
+def _acumular(dimension, contribuciones):
+    """Suma los deltas de `contribuciones` por clave de la dimensión"""
+    acumulados = {}
+    for hechos, deltas in contribuciones:
+        clave = tuple(hechos[nombre] for nombre in dimension.claves)
+        if any(valor is None for valor in clave):
+            continue
+        fila = acumulados.setdefault(clave, {})
+        for nombre, valor in deltas.items():
+            if nombre in dimension.campos:
+                fila[nombre] = fila.get(nombre, 0) + valor
+    return {clave: fila for clave, fila in acumulados.items() if any(fila.values())}
+
+
+def _sumar_upsert(dimension, acumulados):
+    """
+    Suma los deltas con un INSERT ... ON CONFLICT DO UPDATE por bloque: las
+    filas nuevas se crean con el delta y las existentes se incrementan en
+    la misma sentencia (atómica aunque otra escritura toque la misma fila).
+    """
+    modelo = dimension.modelo
+    campos = [modelo._meta.get_field(nombre) for nombre in dimension.claves + dimension.campos]
+    qn = connection.ops.quote_name
+    tabla = qn(modelo._meta.db_table)
+    columnas = ', '.join(qn(campo.column) for campo in campos)
+    conflicto = ', '.join(qn(campo.column) for campo in campos[:len(dimension.claves)])
+    sumas = ', '.join(
+        f'{qn(campo.column)} = {tabla}.{qn(campo.column)} + excluded.{qn(campo.column)}'
+        for campo in campos[len(dimension.claves):]
+    )
+    fila_sql = f"({', '.join(['%s'] * len(campos))})"
+
+    filas = [
+        [
+            campo.get_db_prep_save(valor, connection)
+            for campo, valor in zip(campos, (*clave, *(deltas.get(n, 0) for n in dimension.campos)))
+        ]
+        for clave, deltas in acumulados.items()
+    ]
+    tamano = max(1, min(FILAS_POR_UPSERT, connection.ops.bulk_batch_size(campos, filas)))
+    with connection.cursor() as cursor:
+        for inicio in range(0, len(filas), tamano):
+            bloque = filas[inicio:inicio + tamano]
+            cursor.execute(
+                f"INSERT INTO {tabla} ({columnas}) VALUES {', '.join([fila_sql] * len(bloque))} "
+                f"ON CONFLICT ({conflicto}) DO UPDATE SET {sumas}",
+                [valor for fila in bloque for valor in fila]
+            )
+
+
+def _aplicar_lote(dimension, acumulados):
+    """Crea las filas que falten (en cero) y suma los deltas con un UPDATE por bloque"""
+    modelo = dimension.modelo
+    claves = list(acumulados)
+    modelo.objects.bulk_create(
+        [modelo(**dict(zip(dimension.claves, clave))) for clave in claves],
+        ignore_conflicts=True
+    )
+    for inicio in range(0, len(claves), CLAVES_POR_UPDATE):
+        bloque = claves[inicio:inicio + CLAVES_POR_UPDATE]
+        condiciones = {clave: Q(**dict(zip(dimension.claves, clave))) for clave in bloque}
+        cambios = {}
+        for nombre in dimension.campos:
+            casos = [
+                When(condiciones[clave], then=Value(acumulados[clave][nombre]))
+                for clave in bloque if acumulados[clave].get(nombre)
+            ]
+            if casos:
+                campo = modelo._meta.get_field(nombre)
+                cambios[nombre] = F(nombre) + Case(*casos, default=Value(0), output_field=campo)
+        modelo.objects.filter(reduce(or_, condiciones.values())).update(**cambios)
+
+
+def actualizar_lote(contribuciones):
+    """
+    Aplica muchas contribuciones (hechos, deltas) de una vez.
+
+    Agrupa los deltas por clave y usa una consulta por dimensión (upsert
+    que suma los deltas) en PostgreSQL y SQLite; en otros motores, dos
+    (altas de filas faltantes + UPDATE con CASE). Nunca una por fila.
+    """
+    contribuciones = list(contribuciones)
+    aplicar = _sumar_upsert if connection.vendor in MOTORES_UPSERT else _aplicar_lote
+    # Sin savepoint: quien llama suele estar ya dentro de su propia transacción
+    with transaction.atomic(savepoint=False):
+        for dimension in DIMENSIONES:
+            acumulados = _acumular(dimension, contribuciones)
+            if acumulados:
+                aplicar(dimension, acumulados)
+
+
+# ============================================
+# CAMBIOS MASIVOS Y DE CLAVES
+# ============================================
+
+# Hechos cuyo aporte depende de cada modelo: (modelo de hechos, ruta desde
+# el hecho, campos del modelo que cambian sus claves o su aporte)
+DEPENDENCIAS = {
+    Calificacion: [(Calificacion, 'pk', {'nota', 'evaluacion', 'estudiante', 'fecha_registro'})],
+    Asistencia: [(Asistencia, 'pk', {'estado', 'curso', 'estudiante', 'fecha'})],
+    Evaluacion: [(Calificacion, 'evaluacion', {'curso'})],
+    Curso: [
+        (Calificacion, 'evaluacion__curso', {'grado', 'periodo_academico'}),
+        (Asistencia, 'curso', {'grado', 'periodo_academico'}),
+    ],
+}
+
+# Ids por consulta al leer contribuciones (límite de parámetros de SQLite)
+IDS_POR_CONSULTA = 500
+
+
+def dependencias(modelo, campos):
+    """[(modelo de hechos, ruta)] cuyos aportes cambian al modificar `campos` de `modelo`"""
+    nombres = {modelo._meta.get_field(campo).name for campo in campos}
+    return [
+        (hechos, ruta) for hechos, ruta, relevantes in DEPENDENCIAS.get(modelo, [])
+        if nombres & relevantes
+    ]
+
+
+def contribuciones(hechos, ruta, pks):
+    """Contribuciones guardadas de los hechos cuyo `ruta` está en `pks`"""
+    resultado = []
+    for inicio in range(0, len(pks), IDS_POR_CONSULTA):
+        filas = hechos.objects.filter(**{f'{ruta}__in': pks[inicio:inicio + IDS_POR_CONSULTA]}).order_by()
+        resultado.extend(
+            _contribucion(hechos, fila) for fila in filas.values_list(*CAMPOS_CONTRIBUCION[hechos])
+        )
+    return resultado
+
+
+def _contribuciones_afectadas(afectadas, pks):
+    return [
+        contribucion for hechos, ruta in afectadas for contribucion in contribuciones(hechos, ruta, pks)
+    ]
+
+
+def _restar(contribucion):
+    hechos, deltas = contribucion
+    return hechos, {nombre: -valor for nombre, valor in deltas.items()}
+
+
+def contribuciones_anteriores(modelo, pks, campos):
+    """Aportes a quitar antes de cambiar `campos` de las filas `pks` de `modelo` (None si no afecta)"""
+    afectadas = dependencias(modelo, campos)
+    if not afectadas or not pks:
+        return None
+    return afectadas, [_restar(c) for c in _contribuciones_afectadas(afectadas, pks)]
+
+
+def mover_contribuciones(anteriores, pks):
+    """Quita los aportes `anteriores` y suma los actuales de las mismas filas"""
+    if anteriores is None:
+        return
+    afectadas, restas = anteriores
+    actualizar_lote(restas + _contribuciones_afectadas(afectadas, pks))
+
+
+# Hechos que se borran con cada modelo, propios o en cascada: (modelo de hechos, ruta desde el hecho)
+CASCADAS = {
+    Calificacion: [(Calificacion, 'pk')],
+    Asistencia: [(Asistencia, 'pk')],
+    Evaluacion: [(Calificacion, 'evaluacion')],
+    Estudiante: [(Calificacion, 'estudiante'), (Asistencia, 'estudiante')],
+    Curso: [(Calificacion, 'evaluacion__curso'), (Asistencia, 'curso')],
+    **{
+        modelo: [(Calificacion, f'evaluacion__curso__{campo}'), (Asistencia, f'curso__{campo}')]
+        for modelo, campo in [
+            (Grado, 'grado'), (Asignatura, 'asignatura'), (Profesor, 'profesor'),
+            (PeriodoAcademico, 'periodo_academico'),
+        ]
+    },
+}
+
+
+@contextmanager
+def borrando(modelo, pks):
+    """
+    Mantiene los resúmenes al borrar las filas `pks` de `modelo` dentro del
+    bloque: resta antes, en lote, los aportes de los hechos que se borran
+    con ellas (las filas de resumen de un curso o estudiante borrado se van
+    después en la misma cascada).
+    """
+    afectadas = CASCADAS.get(modelo)
+    if not afectadas or not pks:
+        yield
+        return
+    with transaction.atomic():
+        actualizar_lote([_restar(c) for c in _contribuciones_afectadas(afectadas, pks)])
+        yield
+
+
+@contextmanager
+def moviendo(modelo, pks, campos):
+    """
+    Mantiene los resúmenes al cambiar `campos` de las filas `pks` de `modelo`
+    dentro del bloque (p. ej. con QuerySet.update): lee los aportes
+    afectados antes y después y aplica la diferencia en lote.
+    """
+    with transaction.atomic():
+        anteriores = contribuciones_anteriores(modelo, pks, campos)
+        yield
+        mover_contribuciones(anteriores, pks)
+
+
+# ============================================
+# RECÁLCULO COMPLETO Y DETECCIÓN DE DERIVA
+# ============================================
+
+def _vacio(dimension):
+    return {nombre: Decimal('0.00') if nombre == 'suma_notas' else 0 for nombre in dimension.campos}
+
+
+def _clave(fila, dimension):
+    return tuple(fila[clave] for clave in dimension.claves)
+
+
+def _redondear(dimension, nombre, valor):
+    """
+    `valor` con los decimales del campo de resumen `nombre`.
+
+    En SQLite Sum() sobre un DecimalField suma floats: 300 notas de 70.01
+    dan 21002.9999999999 en lugar de 21003.00.
+    """
+    decimales = getattr(dimension.modelo._meta.get_field(nombre), 'decimal_places', None)
+    if decimales is None or valor is None:
+        return valor
+    return Decimal(str(valor)).quantize(Decimal(1).scaleb(-decimales))
+
+
+def calcular_resumenes(dimensiones=DIMENSIONES):
+    """
+    Calcula desde cero los acumulados de cada dimensión.
+
+    Devuelve {modelo: {(claves...): {campo: valor}}} usando dos consultas
+    agrupadas por dimensión (los rangos de notas, con Count condicional en
+    la de calificaciones).
+    """
+    resultado = {}
+    for dimension in dimensiones:
+        filas = {}
+        rangos = {
+            campo: Count('id', filter=condicion)
+            for campo, condicion in condiciones_rangos().items() if campo in dimension.campos
+        }
+        for fila in Calificacion.objects.order_by().annotate(
+            **{f'_{clave}': RUTAS_CALIFICACION[clave] for clave in dimension.claves}
+        ).values(*(f'_{clave}' for clave in dimension.claves)).annotate(
+            suma=Sum('nota'), total=Count('id'), **rangos
+        ):
+            datos = filas.setdefault(
+                tuple(fila[f'_{clave}'] for clave in dimension.claves), _vacio(dimension)
+            )
+            datos['suma_notas'] = _redondear(dimension, 'suma_notas', fila['suma'])
+            datos['total_notas'] = fila['total']
+            for campo in rangos:
+                datos[campo] = fila[campo]
+        for fila in Asistencia.objects.order_by().annotate(
+            **{f'_{clave}': RUTAS_ASISTENCIA[clave] for clave in dimension.claves}
+        ).values(*(f'_{clave}' for clave in dimension.claves)).annotate(
+            total=Count('id'),
+            ausencias=Count('id', filter=Q(estado__in=Asistencia.ESTADOS_AUSENCIA)),
+            ausentes=Count('id', filter=Q(estado='ausente'))
+        ):
+            datos = filas.setdefault(
+                tuple(fila[f'_{clave}'] for clave in dimension.claves), _vacio(dimension)
+            )
+            datos['total_asistencias'] = fila['total']
+            datos['total_ausencias'] = fila['ausencias']
+            if 'total_ausentes' in datos:
+                datos['total_ausentes'] = fila['ausentes']
+        resultado[dimension.modelo] = filas
+    return resultado
+
+
+def recalcular(dimensiones=DIMENSIONES):
+    """Reconstruye las tablas de resumen; devuelve filas creadas por modelo"""
+    calculados = calcular_resumenes(dimensiones)
+    creados = {}
+    with transaction.atomic():
+        for dimension in dimensiones:
+            dimension.modelo.objects.all().delete()
+            objetos = dimension.modelo.objects.bulk_create(
+                [
+                    dimension.modelo(**dict(zip(dimension.claves, clave)), **datos)
+                    for clave, datos in calculados[dimension.modelo].items()
+                ],
+                batch_size=1000
+            )
+            creados[dimension.modelo] = len(objetos)
+    return creados
+
+
+def verificar(dimensiones=DIMENSIONES):
+    """
+    Compara los resúmenes guardados con un recálculo completo.
+
+    Devuelve una lista de (modelo, claves, guardado, esperado) con las filas
+    que difieren.
+    """
+    calculados = calcular_resumenes(dimensiones)
+    diferencias = []
+    for dimension in dimensiones:
+        vacio = _vacio(dimension)
+        guardados = {
+            _clave(fila, dimension): {nombre: fila[nombre] for nombre in dimension.campos}
+            for fila in dimension.modelo.objects.values(*dimension.claves, *dimension.campos)
+        }
+        esperados = calculados[dimension.modelo]
+        for clave in set(guardados) | set(esperados):
+            guardado = guardados.get(clave, vacio)
+            esperado = esperados.get(clave, vacio)
+            if any(
+                _redondear(dimension, n, guardado[n]) != _redondear(dimension, n, esperado[n])
+                for n in dimension.campos
+            ):
+                diferencias.append((dimension.modelo, clave, guardado, esperado))
+    return diferencias
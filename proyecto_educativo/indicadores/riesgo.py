@@ -0,0 +1,130 @@
+"""
+Motor de Riesgo Académico
+=========================
+Calcula promedio, ausentismo y nivel de riesgo de todos los estudiantes
+activos con un número fijo de consultas agrupadas, sin importar cuántos
+estudiantes existan.
+"""
+
+from django.db.models import Avg, Count, Q
+
+from .models import Estudiante, Calificacion, Asistencia
+
+# Umbrales de riesgo
+# ==================
+PROMEDIO_RIESGO = 60
+PROMEDIO_RIESGO_ALTO = 50
+AUSENTISMO_RIESGO = 20
+AUSENTISMO_RIESGO_ALTO = 30
+
+ESTADOS_AUSENCIA = Asistencia.ESTADOS_AUSENCIA
+
+
+def nivel_riesgo(promedio, porcentaje_ausentismo):
+    """Devuelve 'ALTO', 'MEDIO' o None según promedio y ausentismo"""
+    if promedio < PROMEDIO_RIESGO or porcentaje_ausentismo > AUSENTISMO_RIESGO:
+        if promedio < PROMEDIO_RIESGO_ALTO or porcentaje_ausentismo > AUSENTISMO_RIESGO_ALTO:
+            return 'ALTO'
+        return 'MEDIO'
+    return None
+
+
+def _filtros_curso(prefijo, periodo=None, grado=None, curso=None):
+    """Construye los filtros de periodo/grado/curso sobre la relación `prefijo`"""
+    filtros = {}
+    if periodo is not None:
+        filtros[f'{prefijo}__periodo_academico_id'] = periodo
+    if grado is not None:
+        filtros[f'{prefijo}__grado_id'] = grado
+    if curso is not None:
+        filtros[f'{prefijo}_id'] = curso
+    return filtros
+
+
+def _fila_riesgo(estudiante_id, nombres, apellidos, ci, promedio, porcentaje_ausentismo, nivel):
+    return {
+        'id': estudiante_id,
+        'nombre_completo': f"{nombres} {apellidos}",
+        'ci': ci,
+        'promedio': round(promedio, 2),
+        'ausentismo': round(porcentaje_ausentismo, 2),
+        'nivel_riesgo': nivel
+    }
+
+
+def _riesgo_desde_resumen():
+    """Sin filtros: una sola consulta sobre ResumenEstudiante"""
+    estudiantes = Estudiante.objects.filter(
+        activo=True, resumen__total_notas__gt=0
+    ).values_list(
+        'id', 'nombres', 'apellidos', 'ci', 'resumen__suma_notas', 'resumen__total_notas',
+        'resumen__total_asistencias', 'resumen__total_ausencias'
+    )
+
+    estudiantes_riesgo = []
+    for estudiante_id, nombres, apellidos, ci, suma, total_notas, total_asistencias, ausencias in estudiantes:
+        promedio = suma / total_notas
+        porcentaje_ausentismo = (ausencias / total_asistencias * 100) if total_asistencias > 0 else 0
+        nivel = nivel_riesgo(promedio, porcentaje_ausentismo)
+        if nivel:
+            estudiantes_riesgo.append(_fila_riesgo(
+                estudiante_id, nombres, apellidos, ci, promedio, porcentaje_ausentismo, nivel
+            ))
+    return estudiantes_riesgo
+
+
+def calcular_estudiantes_riesgo(periodo=None, grado=None, curso=None):
+    """
+    Estudiantes activos con promedio < 60 o ausentismo > 20%.
+
+    Sin filtros lee ResumenEstudiante en una consulta. Con filtros de
+    periodo, grado o curso (ids) ejecuta como máximo tres consultas
+    (promedios agrupados, asistencias agrupadas y datos de los estudiantes).
+    """
+    if periodo is None and grado is None and curso is None:
+        return _riesgo_desde_resumen()
+
+    promedios = {
+        fila['estudiante']: fila['promedio']
+        for fila in Calificacion.objects.filter(
+            estudiante__activo=True,
+            **_filtros_curso('evaluacion__curso', periodo, grado, curso)
+        ).order_by().values('estudiante').annotate(promedio=Avg('nota'))
+    }
+
+    asistencias = {
+        fila['estudiante']: (fila['total'], fila['ausencias'])
+        for fila in Asistencia.objects.filter(
+            estudiante__activo=True,
+            **_filtros_curso('curso', periodo, grado, curso)
+        ).order_by().values('estudiante').annotate(
+            total=Count('id'),
+            ausencias=Count('id', filter=Q(estado__in=ESTADOS_AUSENCIA))
+        )
+    }
+
+    riesgo = {}
+    for estudiante_id, promedio in promedios.items():
+        total_asistencias, ausencias = asistencias.get(estudiante_id, (0, 0))
+        porcentaje_ausentismo = (ausencias / total_asistencias * 100) if total_asistencias > 0 else 0
+        nivel = nivel_riesgo(promedio, porcentaje_ausentismo)
+        if nivel:
+            riesgo[estudiante_id] = (promedio, porcentaje_ausentismo, nivel)
+
+    if not riesgo:
+        return []
+
+    # Se recorre la lista de activos (sin IN de miles de parámetros) para
+    # conservar el orden por apellidos/nombres del modelo
+    estudiantes = Estudiante.objects.filter(activo=True).values_list(
+        'id', 'nombres', 'apellidos', 'ci'
+    )
+
+    estudiantes_riesgo = []
+    for estudiante_id, nombres, apellidos, ci in estudiantes:
+        if estudiante_id not in riesgo:
+            continue
+        estudiantes_riesgo.append(_fila_riesgo(
+            estudiante_id, nombres, apellidos, ci, *riesgo[estudiante_id]
+        ))
+    return estudiantes_riesgo
@@ -5,31 +5,45 @@ Convierte los modelos Django en JSON para la API REST
 """
 
 from rest_framework import serializers
+from .plan_consultas import campos_solicitados
 from .models import (
     Grado, Asignatura, PeriodoAcademico, Profesor, Estudiante, 
     Apoderado, Curso, Inscripcion, EstudianteApoderado, 
-    Evaluacion, Calificacion, Asistencia
+    Evaluacion, Calificacion, Asistencia, NotaFinal
 )
 
-class GradoSerializer(serializers.ModelSerializer):
+class CamposDinamicosMixin:
+    """
+    Campos dispersos: en lecturas, ?fields=a,b deja solo esos campos y
+    ?omit=c los quita (nombres desconocidos se ignoran).
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        campos, omitidos = campos_solicitados(self.context.get('request'))
+        for nombre in list(self.fields):
+            if (campos is not None and nombre not in campos) or (omitidos and nombre in omitidos):
+                self.fields.pop(nombre)
+
+class GradoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para el modelo Grado"""
     class Meta:
         model = Grado
         fields = ['id', 'nombre', 'descripcion']
 
-class AsignaturaSerializer(serializers.ModelSerializer):
+class AsignaturaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para el modelo Asignatura"""
     class Meta:
         model = Asignatura
         fields = ['id', 'nombre', 'codigo', 'descripcion']
 
-class PeriodoAcademicoSerializer(serializers.ModelSerializer):
+class PeriodoAcademicoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para el modelo PeriodoAcademico"""
     class Meta:
         model = PeriodoAcademico
         fields = ['id', 'nombre', 'fecha_inicio', 'fecha_fin', 'activo']
 
-class ProfesorSerializer(serializers.ModelSerializer):
+class ProfesorSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para el modelo Profesor"""
     nombre_completo = serializers.ReadOnlyField()
     
@@ -38,7 +52,7 @@ class ProfesorSerializer(serializers.ModelSerializer):
         fields = ['id', 'nombres', 'apellidos', 'nombre_completo', 'email', 
                  'telefono', 'especialidad', 'activo']
 
-class EstudianteSerializer(serializers.ModelSerializer):
+class EstudianteSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para el modelo Estudiante"""
     nombre_completo = serializers.ReadOnlyField()
     
@@ -47,7 +61,7 @@ class EstudianteSerializer(serializers.ModelSerializer):
         fields = ['id', 'nombres', 'apellidos', 'nombre_completo', 'ci', 
                  'email', 'telefono', 'fecha_nacimiento', 'direccion', 'activo']
 
-class ApoderadoSerializer(serializers.ModelSerializer):
+class ApoderadoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para el modelo Apoderado"""
     nombre_completo = serializers.ReadOnlyField()
     parentesco_display = serializers.CharField(source='get_parentesco_display', read_only=True)
@@ -57,7 +71,7 @@ class ApoderadoSerializer(serializers.ModelSerializer):
         fields = ['id', 'nombres', 'apellidos', 'nombre_completo', 'ci', 
                  'email', 'telefono', 'direccion', 'parentesco', 'parentesco_display']
 
-class CursoSerializer(serializers.ModelSerializer):
+class CursoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para el modelo Curso"""
     grado_nombre = serializers.CharField(source='grado.nombre', read_only=True)
     asignatura_nombre = serializers.CharField(source='asignatura.nombre', read_only=True)
@@ -71,7 +85,7 @@ class CursoSerializer(serializers.ModelSerializer):
                  'asignatura_codigo', 'profesor', 'profesor_nombre', 'periodo_academico', 
                  'periodo_nombre', 'seccion']
 
-class InscripcionSerializer(serializers.ModelSerializer):
+class InscripcionSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para el modelo Inscripcion"""
     estudiante_nombre = serializers.CharField(source='estudiante.nombre_completo', read_only=True)
     estudiante_ci = serializers.CharField(source='estudiante.ci', read_only=True)
@@ -82,7 +96,7 @@ class InscripcionSerializer(serializers.ModelSerializer):
         fields = ['id', 'estudiante', 'estudiante_nombre', 'estudiante_ci', 
                  'curso', 'curso_info', 'fecha_inscripcion', 'activa']
 
-class EstudianteApoderadoSerializer(serializers.ModelSerializer):
+class EstudianteApoderadoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para el modelo EstudianteApoderado"""
     estudiante_nombre = serializers.CharField(source='estudiante.nombre_completo', read_only=True)
     apoderado_nombre = serializers.CharField(source='apoderado.nombre_completo', read_only=True)
@@ -94,7 +108,7 @@ class EstudianteApoderadoSerializer(serializers.ModelSerializer):
                  'apoderado_nombre', 'apoderado_parentesco', 'es_principal', 
                  'fecha_asignacion', 'activa']
 
-class EvaluacionSerializer(serializers.ModelSerializer):
+class EvaluacionSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para el modelo Evaluacion"""
     curso_info = serializers.CharField(source='curso.__str__', read_only=True)
     tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
@@ -104,7 +118,7 @@ class EvaluacionSerializer(serializers.ModelSerializer):
         fields = ['id', 'curso', 'curso_info', 'nombre', 'descripcion', 
                  'tipo', 'tipo_display', 'fecha', 'ponderacion']
 
-class CalificacionSerializer(serializers.ModelSerializer):
+class CalificacionSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para el modelo Calificacion"""
     estudiante_nombre = serializers.CharField(source='estudiante.nombre_completo', read_only=True)
     estudiante_ci = serializers.CharField(source='estudiante.ci', read_only=True)
@@ -118,7 +132,19 @@ class CalificacionSerializer(serializers.ModelSerializer):
                  'curso_info', 'estudiante', 'estudiante_nombre', 'estudiante_ci', 
                  'nota', 'fecha_registro', 'observaciones']
 
-class AsistenciaSerializer(serializers.ModelSerializer):
+class CalificacionLoteSerializer(serializers.Serializer):
+    """
+    Un ítem de un alta en lote de calificaciones (ver lotes.py).
+    
+    Solo valida tipos y rangos, sin consultas; las claves foráneas, la
+    inscripción y los duplicados se validan para todo el lote a la vez.
+    """
+    evaluacion = serializers.IntegerField(min_value=1)
+    estudiante = serializers.IntegerField(min_value=1)
+    nota = serializers.DecimalField(max_digits=4, decimal_places=2, min_value=0, max_value=100)
+    observaciones = serializers.CharField(required=False, allow_blank=True)
+
+class AsistenciaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para el modelo Asistencia"""
     estudiante_nombre = serializers.CharField(source='estudiante.nombre_completo', read_only=True)
     estudiante_ci = serializers.CharField(source='estudiante.ci', read_only=True)
@@ -131,14 +157,41 @@ class AsistenciaSerializer(serializers.ModelSerializer):
                  'curso', 'curso_info', 'fecha', 'estado', 'estado_display', 
                  'observaciones']
 
+class AsistenciaLoteSerializer(serializers.Serializer):
+    """Un ítem del upsert en lote de asistencia (ver lotes.py); sin consultas"""
+    estudiante = serializers.IntegerField(min_value=1)
+    curso = serializers.IntegerField(min_value=1)
+    fecha = serializers.DateField()
+    estado = serializers.ChoiceField(choices=Asistencia.ESTADO_CHOICES)
+    observaciones = serializers.CharField(required=False, allow_blank=True)
+
+class NotaFinalSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """Serializer para el modelo NotaFinal (solo lectura)"""
+    estudiante_nombre = serializers.CharField(source='estudiante.nombre_completo', read_only=True)
+    estudiante_ci = serializers.CharField(source='estudiante.ci', read_only=True)
+    grado_nombre = serializers.CharField(source='curso.grado.nombre', read_only=True)
+    asignatura_nombre = serializers.CharField(source='curso.asignatura.nombre', read_only=True)
+    
+    class Meta:
+        model = NotaFinal
+        fields = ['id', 'estudiante', 'estudiante_nombre', 'estudiante_ci', 'curso', 
+                 'grado_nombre', 'asignatura_nombre', 'nota_final', 'peso_evaluado', 
+                 'evaluaciones_rendidas', 'evaluaciones_aplicadas', 'fecha_calculo']
+        read_only_fields = fields
+
 # Serializers especiales para KPIs y Dashboard
 # ============================================
 
-class EstudianteConPromedioSerializer(serializers.ModelSerializer):
-    """Serializer con promedio de notas calculado"""
+class EstudianteConPromedioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """
+    Serializer con promedio de notas calculado.
+    
+    Espera un queryset anotado con `promedio_general` y `total_evaluaciones`
+    (ver EstudianteViewSet.con_promedio).
+    """
     nombre_completo = serializers.ReadOnlyField()
     promedio_general = serializers.SerializerMethodField()
-    total_evaluaciones = serializers.SerializerMethodField()
+    total_evaluaciones = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Estudiante
@@ -146,45 +199,28 @@ class EstudianteConPromedioSerializer(serializers.ModelSerializer):
                  'promedio_general', 'total_evaluaciones']
     
     def get_promedio_general(self, obj):
-        """Calcula el promedio general del estudiante"""
-        calificaciones = obj.calificacion_set.all()
-        if calificaciones:
-            return round(sum(c.nota for c in calificaciones) / len(calificaciones), 2)
-        return 0
-    
-    def get_total_evaluaciones(self, obj):
-        """Cuenta total de evaluaciones del estudiante"""
-        return obj.calificacion_set.count()
-
-class CursoConEstadisticasSerializer(serializers.ModelSerializer):
-    """Serializer con estadísticas del curso"""
+        """Promedio general anotado, redondeado a 2 decimales (0 si no tiene notas)"""
+        return round(obj.promedio_general, 2) if obj.promedio_general else 0
+
+class CursoConEstadisticasSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """
+    Serializer con estadísticas del curso.
+    
+    Espera un queryset anotado con `total_estudiantes`, `promedio_curso` y
+    `total_evaluaciones` (ver kpis.anotar_estadisticas_cursos).
+    """
     grado_nombre = serializers.CharField(source='grado.nombre', read_only=True)
     asignatura_nombre = serializers.CharField(source='asignatura.nombre', read_only=True)
     profesor_nombre = serializers.CharField(source='profesor.nombre_completo', read_only=True)
-    total_estudiantes = serializers.SerializerMethodField()
+    total_estudiantes = serializers.IntegerField(read_only=True)
     promedio_curso = serializers.SerializerMethodField()
-    total_evaluaciones = serializers.SerializerMethodField()
+    total_evaluaciones = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Curso
         fields = ['id', 'grado_nombre', 'asignatura_nombre', 'profesor_nombre', 
                  'seccion', 'total_estudiantes', 'promedio_curso', 'total_evaluaciones']
     
-    def get_total_estudiantes(self, obj):
-        """Cuenta estudiantes inscritos en el curso"""
-        return obj.inscripcion_set.filter(activa=True).count()
-    
     def get_promedio_curso(self, obj):
-        """Calcula promedio general del curso"""
-        from django.db.models import Avg
-        evaluaciones = obj.evaluacion_set.all()
-        if evaluaciones:
-            promedio = Calificacion.objects.filter(
-                evaluacion__in=evaluaciones
-            ).aggregate(Avg('nota'))['nota__avg']
-            return round(promedio, 2) if promedio else 0
-        return 0
-    
-    def get_total_evaluaciones(self, obj):
-        """Cuenta evaluaciones del curso"""
-        return obj.evaluacion_set.count()
\ No newline at end of file
+        """Promedio del curso anotado, redondeado a 2 decimales (0 si no tiene notas)"""
+        return round(obj.promedio_curso, 2) if obj.promedio_curso else 0
@@ -0,0 +1,100 @@
+"""
+Señales de la app Indicadores
+=============================
+Mantienen los resúmenes de KPIs al día ante cada alta o modificación de
+calificaciones y asistencias (y ante cambios de curso, grado o período
+de evaluaciones y cursos), invalidan la caché de KPIs y actualizan el
+índice de búsqueda de personas.
+
+Las bajas que afectan los KPIs no tienen receptores: las resuelve en lote
+`delete` de ModeloKPI y KPIQuerySet (ver resumenes.borrando), así Django
+sigue borrando calificaciones y asistencias en cascada sin cargarlas.
+"""
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import busqueda, cache_kpis, resumenes
+from .models import Inscripcion, Evaluacion, Curso, Calificacion, Asistencia
+
+CONTRIBUCIONES = {
+    Calificacion: resumenes.contribucion_calificacion,
+    Asistencia: resumenes.contribucion_asistencia,
+}
+
+
+@receiver(pre_save, sender=Calificacion)
+@receiver(pre_save, sender=Asistencia)
+def guardar_contribucion_anterior(sender, instance, raw=False, **kwargs):
+    """Recuerda el aporte guardado en la base antes de modificar"""
+    if raw:
+        return
+    instance._resumen_anterior = (
+        CONTRIBUCIONES[sender](pk=instance.pk) if instance.pk is not None else None
+    )
+
+
+@receiver(post_save, sender=Calificacion)
+@receiver(post_save, sender=Asistencia)
+def actualizar_resumen_guardado(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = getattr(instance, '_resumen_anterior', None)
+    resumenes.actualizar(anterior, CONTRIBUCIONES[sender](instance=instance))
+
+
+@receiver(pre_save, sender=Evaluacion)
+@receiver(pre_save, sender=Curso)
+def guardar_contribuciones_movidas(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Si cambia el curso de una evaluación, o el grado o período de un curso, recuerda sus aportes"""
+    instance._resumen_movido = None
+    if raw or instance.pk is None:
+        return
+    nombres = {nombre for _, _, relevantes in resumenes.DEPENDENCIAS[sender] for nombre in relevantes}
+    campos = [
+        campo.attname for campo in map(sender._meta.get_field, sorted(nombres))
+        if update_fields is None or campo.name in update_fields or campo.attname in update_fields
+    ]
+    guardado = sender._base_manager.filter(pk=instance.pk).values(*campos).first() if campos else None
+    if guardado is None:
+        return
+    cambiados = [campo for campo in campos if guardado[campo] != getattr(instance, campo)]
+    if cambiados:
+        instance._resumen_movido = resumenes.contribuciones_anteriores(sender, [instance.pk], cambiados)
+
+
+@receiver(post_save, sender=Evaluacion)
+@receiver(post_save, sender=Curso)
+def mover_contribuciones_guardadas(sender, instance, raw=False, **kwargs):
+    if not raw:
+        resumenes.mover_contribuciones(getattr(instance, '_resumen_movido', None), [instance.pk])
+        instance._resumen_movido = None
+
+
+# Caché de KPIs
+# =============
+
+def invalidar_cache_kpis(sender, **kwargs):
+    cache_kpis.invalidar_al_confirmar()
+
+
+# Las bajas invalidan desde ModeloKPI.delete y KPIQuerySet.delete
+for modelo in [Calificacion, Asistencia, Inscripcion, Evaluacion]:
+    post_save.connect(invalidar_cache_kpis, sender=modelo)
+
+
+# Índice de búsqueda
+# ==================
+
+def indexar_persona(sender, instance, raw=False, **kwargs):
+    if not raw:
+        busqueda.indexar(instance)
+
+
+def desindexar_persona(sender, instance, **kwargs):
+    busqueda.desindexar(instance)
+
+
+for modelo in busqueda.TIPOS:
+    post_save.connect(indexar_persona, sender=modelo)
+    post_delete.connect(desindexar_persona, sender=modelo)
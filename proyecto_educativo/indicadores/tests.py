@@ -1,3 +1,1538 @@
-from django.test import TestCase
+"""
+Tests de la app Indicadores
+===========================
+"""
 
-# Create your tests here.
+import csv
+import json
+from datetime import date, timedelta
+from importlib.util import find_spec
+from io import StringIO
+from unittest import mock, skipUnless
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import (
+    busqueda, exportaciones, kpis, listados, notas_finales, paginacion, presupuesto_consultas, renderers,
+    resumenes, views
+)
+from .management.commands import generar_datos
+from .presupuesto_consultas import PresupuestoRutasMixin
+from .models import (
+    Grado, Asignatura, PeriodoAcademico, Profesor, Estudiante, Apoderado, EstudianteApoderado,
+    Curso, Inscripcion, Evaluacion, Calificacion, Asistencia,
+    ResumenEstudiante, ResumenCurso, ResumenPeriodo, ResumenMensual, ResumenMensualCurso,
+    NotaFinal, LoteProcesado, TerminoBusqueda
+)
+
+
+def crear_datos(n_estudiantes=4, notas=(40, 55, 75, 95), sufijo=''):
+    """Crea un periodo con dos cursos, estudiantes inscritos, notas y asistencia"""
+    periodo = PeriodoAcademico.objects.create(
+        nombre=f'Semestre Test{sufijo}', fecha_inicio=date(2025, 2, 1),
+        fecha_fin=date(2025, 7, 31), activo=True
+    )
+    grado = Grado.objects.create(nombre=f'1° Test{sufijo}')
+    profesor = Profesor.objects.create(nombres='Ana', apellidos='Vega', email=f'ana{sufijo}@test.edu')
+    cursos = [
+        Curso.objects.create(
+            grado=grado, profesor=profesor, periodo_academico=periodo,
+            asignatura=Asignatura.objects.create(nombre=f'Asignatura {i}{sufijo}', codigo=f'A{i}{sufijo}')
+        )
+        for i in range(2)
+    ]
+    estudiantes = []
+    for i in range(n_estudiantes):
+        estudiante = Estudiante.objects.create(
+            nombres=f'Est{i}', apellidos=f'Apellido{i:05d}', ci=f'CI{i}{sufijo}',
+            fecha_nacimiento=date(2015, 1, 1)
+        )
+        estudiantes.append(estudiante)
+        for curso in cursos:
+            Inscripcion.objects.create(estudiante=estudiante, curso=curso)
+    for curso in cursos:
+        evaluacion = Evaluacion.objects.create(
+            curso=curso, nombre='Examen 1', fecha=date(2025, 3, 1), ponderacion=Decimal('50')
+        )
+        for i, estudiante in enumerate(estudiantes):
+            Calificacion.objects.create(
+                evaluacion=evaluacion, estudiante=estudiante,
+                nota=Decimal(notas[i % len(notas)])
+            )
+            for dia in range(5):
+                Asistencia.objects.create(
+                    estudiante=estudiante, curso=curso,
+                    fecha=date(2025, 3, 3) + timedelta(days=dia),
+                    estado='ausente' if (i == 3 and dia < 2) else 'presente'
+                )
+    return periodo, grado, cursos, estudiantes
+
+
+class IndicadoresTestCase(TestCase):
+    """Base de los tests: cada test parte con la caché de KPIs vacía"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+class EstudiantesRiesgoTests(IndicadoresTestCase):
+    """Motor de riesgo: resultados y número constante de consultas"""
+
+    url = '/api/dashboard/estudiantes_riesgo/'
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def test_niveles_de_riesgo(self):
+        crear_datos()
+        data = self.client.get(self.url).json()
+        niveles = {fila['ci']: fila['nivel_riesgo'] for fila in data}
+        # CI0: promedio 40 -> ALTO; CI1: 55 -> MEDIO; CI3: 95 pero 40% ausente -> ALTO
+        self.assertEqual(niveles, {'CI0': 'ALTO', 'CI1': 'MEDIO', 'CI3': 'ALTO'})
+        self.assertEqual(data[0]['promedio'], 40.0)
+
+    def test_consultas_constantes(self):
+        _, _, cursos, _ = crear_datos(n_estudiantes=4)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+        with self.assertNumQueries(3):
+            self.client.get(self.url, {'curso': cursos[0].id})
+        extra = Estudiante.objects.bulk_create([
+            Estudiante(nombres='X', apellidos=f'X{i}', ci=f'X{i}', fecha_nacimiento=date(2015, 1, 1))
+            for i in range(30)
+        ])
+        Calificacion.objects.bulk_create([
+            Calificacion(evaluacion=Evaluacion.objects.first(), estudiante=e, nota=Decimal('10'))
+            for e in extra
+        ])
+        resumenes.recalcular()
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.client.get(self.url).json()), 33)
+        with self.assertNumQueries(3):
+            self.client.get(self.url, {'curso': cursos[0].id})
+
+    def test_filtros(self):
+        periodo, grado, cursos, _ = crear_datos()
+        data = self.client.get(self.url, {'curso': cursos[0].id, 'periodo': periodo.id}).json()
+        self.assertEqual(len(data), 3)
+        self.assertEqual(self.client.get(self.url, {'periodo': periodo.id + 100}).json(), [])
+        self.assertEqual(self.client.get(self.url, {'grado': 'abc'}).status_code, 400)
+
+
+class AgregadosPorCursoTests(IndicadoresTestCase):
+    """promedio_por_curso y ausentismo_por_curso en una sola consulta agrupada"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.periodo, self.grado, self.cursos, _ = crear_datos()
+
+    def test_promedio_por_curso(self):
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/dashboard/promedio_por_curso/').json()
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[0]['promedio'], 66.25)
+        self.assertEqual(data[0]['total_estudiantes'], 4)
+        self.assertEqual(data[0]['profesor'], 'Ana Vega')
+
+    def test_ausentismo_por_curso(self):
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/dashboard/ausentismo_por_curso/').json()
+        self.assertEqual(data[0]['total_registros'], 20)
+        self.assertEqual(data[0]['ausencias'], 2)
+        self.assertEqual(data[0]['porcentaje_ausentismo'], 10.0)
+
+    def test_filtros_y_paginacion(self):
+        url = '/api/dashboard/ausentismo_por_curso/'
+        self.assertEqual(self.client.get(url, {'grado': self.grado.id + 1}).json(), [])
+        with self.assertNumQueries(2):
+            data = self.client.get(url, {'page': 1, 'periodo': self.periodo.id}).json()
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(len(data['results']), 2)
+
+
+class ResumenesTests(IndicadoresTestCase):
+    """Resúmenes de KPIs mantenidos por señales"""
+
+    def setUp(self):
+        super().setUp()
+        self.periodo, _, self.cursos, self.estudiantes = crear_datos()
+
+    def test_altas(self):
+        resumen = ResumenCurso.objects.get(curso=self.cursos[0])
+        self.assertEqual((resumen.suma_notas, resumen.total_notas), (Decimal('265'), 4))
+        self.assertEqual((resumen.total_asistencias, resumen.total_ausencias), (20, 2))
+        self.assertEqual(ResumenPeriodo.objects.get(periodo=self.periodo).total_notas, 8)
+        self.assertEqual(resumenes.verificar(), [])
+
+    def test_modificaciones_y_bajas(self):
+        calificacion = Calificacion.objects.filter(estudiante=self.estudiantes[0]).first()
+        calificacion.nota = Decimal('60')
+        calificacion.save()
+        self.assertEqual(
+            ResumenEstudiante.objects.get(estudiante=self.estudiantes[0]).suma_notas, Decimal('100')
+        )
+        asistencia = Asistencia.objects.filter(estado='ausente').first()
+        asistencia.estado = 'presente'
+        asistencia.save()
+        calificacion.delete()
+        Asistencia.objects.filter(curso=self.cursos[1]).delete()
+        self.assertEqual(ResumenCurso.objects.get(curso=self.cursos[1]).total_asistencias, 0)
+        self.assertEqual(resumenes.verificar(), [])
+
+    def test_rangos_de_notas(self):
+        resumen = ResumenCurso.objects.get(curso=self.cursos[0])
+        self.assertEqual(
+            (resumen.notas_excelentes, resumen.notas_buenas, resumen.notas_regulares, resumen.notas_insuficientes),
+            (1, 1, 1, 1)
+        )
+        calificacion = Calificacion.objects.get(evaluacion__curso=self.cursos[0], nota=40)
+        calificacion.nota = Decimal('90')
+        calificacion.save()
+        Calificacion.objects.filter(evaluacion__curso=self.cursos[1], nota=55).update(nota=Decimal('50.99'))
+        Calificacion.objects.filter(nota=95).delete()
+        self.assertEqual(resumenes.verificar(), [])
+
+        # El dashboard lee los conteos de ResumenPeriodo, sin recorrer Calificacion
+        with CaptureQueriesContext(connection) as consultas:
+            resumen = kpis.resumen_calificaciones()
+        self.assertEqual(len(consultas), 1)
+        self.assertNotIn(Calificacion._meta.db_table, consultas[0]['sql'])
+        self.assertAlmostEqual(float(resumen.pop('promedio')), 385.99 / 6)
+        self.assertEqual(resumen, {
+            'total': 6, 'aprobados': 4, 'tasa_aprobacion': 66.7,
+            'excelente': 1, 'bueno': 2, 'regular': 1, 'insuficiente': 2,
+        })
+
+    def test_update_masivo_de_hechos(self):
+        Calificacion.objects.filter(estudiante=self.estudiantes[0]).update(nota=Decimal('90.50'))
+        self.assertEqual(
+            ResumenEstudiante.objects.get(estudiante=self.estudiantes[0]).suma_notas, Decimal('181.00')
+        )
+        Asistencia.objects.filter(curso=self.cursos[0], estado='ausente').update(estado='presente')
+        self.assertEqual(ResumenCurso.objects.get(curso=self.cursos[0]).total_ausencias, 0)
+        Asistencia.objects.filter(curso=self.cursos[1]).update(fecha=F('fecha') + timedelta(days=40))
+        self.assertEqual(resumenes.verificar(), [])
+
+        # Campos que no afectan los resúmenes: un solo UPDATE
+        with CaptureQueriesContext(connection) as consultas:
+            Calificacion.objects.update(observaciones='Revisada')
+        self.assertEqual(len(consultas), 1)
+
+    def test_deltas_en_lote_sin_upsert_nativo(self):
+        # Motores sin INSERT ... ON CONFLICT DO UPDATE: altas en cero + UPDATE con CASE
+        with mock.patch.object(resumenes, 'MOTORES_UPSERT', ()):
+            Calificacion.objects.filter(evaluacion__curso=self.cursos[0]).update(nota=Decimal('33.33'))
+            Asistencia.objects.filter(estado='ausente').update(estado='justificada')
+        self.assertEqual(ResumenCurso.objects.get(curso=self.cursos[0]).suma_notas, Decimal('133.32'))
+        self.assertEqual(resumenes.verificar(), [])
+
+    def test_cambio_de_curso_de_una_evaluacion(self):
+        evaluacion = Evaluacion.objects.filter(curso=self.cursos[0]).first()
+        evaluacion.curso = self.cursos[1]
+        evaluacion.save()
+        self.assertEqual(ResumenCurso.objects.get(curso=self.cursos[0]).total_notas, 0)
+        self.assertEqual(resumenes.verificar(), [])
+        Evaluacion.objects.filter(pk=evaluacion.pk).update(curso=self.cursos[0])
+        self.assertEqual(resumenes.verificar(), [])
+
+    def test_cambio_de_grado_o_periodo_de_un_curso(self):
+        curso = self.cursos[0]
+        curso.grado = Grado.objects.create(nombre='2° Test')
+        curso.save(update_fields=['grado'])
+        self.assertEqual(resumenes.verificar(), [])
+
+        otro_periodo = PeriodoAcademico.objects.create(
+            nombre='Otro', fecha_inicio=date(2025, 8, 1), fecha_fin=date(2025, 12, 20)
+        )
+        Curso.objects.filter(pk=self.cursos[1].pk).update(periodo_academico=otro_periodo)
+        self.assertEqual(ResumenPeriodo.objects.get(periodo=otro_periodo).total_notas, 4)
+        self.assertEqual(resumenes.verificar(), [])
+
+        # Sin cambios de clave no se leen aportes
+        with CaptureQueriesContext(connection) as consultas:
+            curso.seccion = 'B'
+            curso.save()
+        self.assertEqual(len(consultas), 2)
+
+    def _borrar(self, borrable):
+        """Borra un queryset o una instancia; devuelve el número de consultas"""
+        with CaptureQueriesContext(connection) as consultas:
+            borrable.delete()
+        return len(consultas)
+
+    def test_bajas_en_lote(self):
+        extra = Estudiante.objects.bulk_create([
+            Estudiante(nombres='X', apellidos=f'X{i}', ci=f'X{i}', fecha_nacimiento=date(2015, 1, 1))
+            for i in range(86)
+        ])
+        evaluacion = Evaluacion.objects.get(curso=self.cursos[1])
+        Calificacion.objects.bulk_create([Calificacion(evaluacion=evaluacion, estudiante=e, nota=Decimal('70')) for e in extra])
+        resumenes.recalcular()
+
+        # 4 calificaciones o 90: ids, aportes, un upsert por tabla de resumen (6),
+        # un DELETE y dos SAVEPOINT con su RELEASE
+        chico = self._borrar(Calificacion.objects.filter(evaluacion__curso=self.cursos[0]))
+        self.assertEqual(self._borrar(Calificacion.objects.filter(evaluacion__curso=self.cursos[1])), chico)
+        self.assertLessEqual(chico, 13)
+        self.assertEqual(ResumenCurso.objects.get(curso=self.cursos[1]).total_notas, 0)
+        self.assertEqual(resumenes.verificar(), [])
+
+        # Una instancia: su aporte, un upsert por tabla de resumen, el DELETE y el SAVEPOINT
+        asistencia = Asistencia.objects.filter(estado='ausente').first()
+        self.assertLessEqual(self._borrar(asistencia), 10)
+        self.assertEqual(resumenes.verificar(), [])
+
+    def test_bajas_en_cascada(self):
+        # Sin receptores de baja, las calificaciones y asistencias de la cascada se
+        # borran con un DELETE por tabla: el costo no depende de cuántas haya
+        self.assertLessEqual(self._borrar(self.estudiantes[0]), 18)
+        self.assertEqual(resumenes.verificar(), [])
+        self.assertLessEqual(self._borrar(Evaluacion.objects.filter(curso=self.cursos[0])), 15)
+        self.assertEqual(resumenes.verificar(), [])
+        self.assertLessEqual(self._borrar(self.cursos[0]), 17)
+        self.assertEqual(ResumenPeriodo.objects.get(periodo=self.periodo).total_asistencias, 15)
+        self.assertEqual(resumenes.verificar(), [])
+        self.assertLessEqual(self._borrar(Grado.objects.all()), 26)
+        self.assertFalse(Calificacion.objects.exists())
+        self.assertEqual(resumenes.verificar(), [])
+
+    def test_comando_detecta_deriva(self):
+        ResumenCurso.objects.filter(curso=self.cursos[0]).update(total_notas=99)
+        with self.assertRaises(CommandError):
+            call_command('recalcular_resumenes', verificar=True, stdout=StringIO())
+        call_command('recalcular_resumenes', stdout=StringIO())
+        self.assertEqual(resumenes.verificar(), [])
+
+    def test_sumas_grandes_sin_error_de_punto_flotante(self):
+        # En SQLite Sum() sobre nota suma floats: 300 × 70.01 da 21002.9999999999
+        evaluacion = Evaluacion.objects.create(
+            curso=self.cursos[0], nombre='Masiva', fecha=date(2025, 3, 3), ponderacion=Decimal('10')
+        )
+        estudiantes = Estudiante.objects.bulk_create([
+            Estudiante(nombres='Masivo', apellidos=f'{i:03d}', ci=f'M{i}', fecha_nacimiento=date(2015, 1, 1))
+            for i in range(300)
+        ])
+        Calificacion.objects.bulk_create([
+            Calificacion(evaluacion=evaluacion, estudiante=estudiante, nota=Decimal('70.01'))
+            for estudiante in estudiantes
+        ])
+        resumenes.recalcular()
+        self.assertEqual(resumenes.verificar(), [])
+        resumen = ResumenCurso.objects.get(curso=self.cursos[0])
+        self.assertEqual(resumen.suma_notas, Decimal('265') + Decimal('70.01') * 300)
+
+    def test_dashboard_lee_resumenes(self):
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(float(response.context['promedio_general']), 66.25)
+        self.assertEqual(
+            [e.ci for e in response.context['estudiantes_riesgo']], ['CI0']
+        )
+
+
+class DashboardConsultasTests(IndicadoresTestCase):
+    """dashboard_view respeta kpis.DASHBOARD_MAX_CONSULTAS sin importar el volumen"""
+
+    def consultas_dashboard(self):
+        with CaptureQueriesContext(connection) as capturadas:
+            response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        return response, len(capturadas)
+
+    def test_cota_de_consultas(self):
+        crear_datos(n_estudiantes=3)
+        response, pocas = self.consultas_dashboard()
+        self.assertLessEqual(pocas, kpis.DASHBOARD_MAX_CONSULTAS)
+        self.assertEqual(response.context['distribucion_notas'], {
+            'excelente': 0, 'bueno': 2, 'regular': 2, 'insuficiente': 2
+        })
+        self.assertAlmostEqual(response.context['tasa_aprobacion'], 66.7)
+
+        crear_datos(n_estudiantes=12, sufijo='B')
+        _, muchas = self.consultas_dashboard()
+        self.assertEqual(muchas, pocas)
+
+    def test_totales_en_una_consulta(self):
+        crear_datos(n_estudiantes=3)
+        with self.assertNumQueries(1):
+            totales = kpis.totales_generales()
+        self.assertEqual(totales, {
+            'total_estudiantes': 3, 'total_profesores': 1,
+            'total_cursos': 2, 'total_evaluaciones': 2,
+        })
+
+
+class CacheKPIsTests(IndicadoresTestCase):
+    """Caché versionada del dashboard y de /api/dashboard/"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        _, _, self.cursos, self.estudiantes = crear_datos()
+
+    def test_segunda_lectura_sin_consultas(self):
+        self.client.get('/')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/').status_code, 200)
+        self.client.get('/api/dashboard/kpis_generales/')
+        with self.assertNumQueries(0):
+            self.client.get('/api/dashboard/kpis_generales/')
+
+    def test_escrituras_invalidan(self):
+        url = '/api/dashboard/promedio_por_curso/'
+        antes = self.client.get(url).json()[0]['promedio']
+        calificacion = Calificacion.objects.filter(evaluacion__curso=self.cursos[0]).first()
+        calificacion.nota = calificacion.nota + 40
+        with self.captureOnCommitCallbacks(execute=True):
+            calificacion.save()
+        self.assertEqual(self.client.get(url).json()[0]['promedio'], antes + 10)
+
+    def test_operaciones_masivas_invalidan(self):
+        url = '/api/dashboard/kpis_generales/'
+        self.client.get(url)
+        Evaluacion.objects.filter(curso=self.cursos[0]).update(nombre='Renombrada')
+        self.assertNumQueries(2, self.client.get, url)
+        self.client.get(url)
+        Asistencia.objects.bulk_create([
+            Asistencia(estudiante=self.estudiantes[0], curso=self.cursos[0], fecha=date(2025, 4, 1))
+        ])
+        self.assertNumQueries(2, self.client.get, url)
+
+    def test_refrescar_y_alcance(self):
+        url = '/api/dashboard/kpis_generales/'
+        self.client.get(url)
+        self.assertNumQueries(2, self.client.get, url, {'refrescar': 1})
+        self.assertNumQueries(2, self.client.get, url, {'periodo': 1})
+        usuario = User.objects.create_user('docente', password='x')
+        self.client.force_authenticate(usuario)
+        self.assertNumQueries(2, self.client.get, url)
+
+
+class ResumenesMensualesTests(IndicadoresTestCase):
+    """Tendencias mensuales leídas de los resúmenes por mes"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        _, self.grado, self.cursos, self.estudiantes = crear_datos()
+        hoy = timezone.localdate()
+        Asistencia.objects.create(
+            estudiante=self.estudiantes[0], curso=self.cursos[0], fecha=hoy, estado='ausente'
+        )
+        Asistencia.objects.create(
+            estudiante=self.estudiantes[1], curso=self.cursos[1], fecha=hoy, estado='tardanza'
+        )
+
+    def test_resumen_del_mes(self):
+        resumen = ResumenMensual.objects.get(mes=timezone.localdate().replace(day=1))
+        self.assertEqual((resumen.total_notas, resumen.total_asistencias), (8, 2))
+        self.assertEqual((resumen.total_ausentes, resumen.total_ausencias), (1, 2))
+        self.assertEqual(
+            ResumenMensualCurso.objects.get(curso=self.cursos[0], mes=date(2025, 3, 1)).total_ausencias, 2
+        )
+        self.assertEqual(resumenes.verificar(), [])
+
+    def test_tendencia_endpoint(self):
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/dashboard/tendencia_mensual/', {'curso': self.cursos[0].id}).json()
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['promedio'], 66.25)
+        self.assertEqual(data[0]['porcentaje_ausentismo'], 100.0)
+        data = self.client.get('/api/dashboard/tendencia_mensual/', {'meses': 24, 'grado': self.grado.id}).json()
+        self.assertEqual([fila['total_asistencias'] for fila in data], [40, 2])
+
+    def test_dashboard_usa_resumen_mensual(self):
+        response = self.client.get('/')
+        self.assertEqual(json.loads(response.context['ausentismo_mensual_json'])['data'], [50.0])
+        self.assertEqual(json.loads(response.context['tendencia_mensual_json'])['data'], [66.25])
+
+
+class NotasFinalesTests(IndicadoresTestCase):
+    """Motor de notas finales ponderadas"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.periodo, _, self.cursos, self.estudiantes = crear_datos()
+        curso = self.cursos[0]
+        # Ponderaciones 50 + 30 aplicadas (+20 sin notas): no suman 100
+        parcial = Evaluacion.objects.create(
+            curso=curso, nombre='Parcial', fecha=date(2025, 4, 1), ponderacion=Decimal('30')
+        )
+        Evaluacion.objects.create(curso=curso, nombre='Final', fecha=date(2025, 6, 1), ponderacion=Decimal('20'))
+        Calificacion.objects.create(evaluacion=parcial, estudiante=self.estudiantes[0], nota=Decimal('100'))
+        Calificacion.objects.create(evaluacion=parcial, estudiante=self.estudiantes[1], nota=Decimal('70'))
+        self.sin_notas = Estudiante.objects.create(
+            nombres='Nuevo', apellidos='Inscrito', ci='CI-NUEVO', fecha_nacimiento=date(2015, 1, 1)
+        )
+        Inscripcion.objects.create(estudiante=self.sin_notas, curso=curso)
+
+    def _notas(self, faltantes):
+        resultado = notas_finales.calcular_notas_finales(self.periodo.id, curso=self.cursos[0].id, faltantes=faltantes)
+        return {fila.estudiante_id: fila for fila in resultado.itertuples()}
+
+    def test_faltantes_cero(self):
+        notas = self._notas('cero')
+        self.assertEqual(len(notas), 5)
+        self.assertEqual(notas[self.estudiantes[0].id].nota_final, 62.5)
+        self.assertEqual(notas[self.estudiantes[2].id].nota_final, 46.88)
+        self.assertEqual(notas[self.estudiantes[2].id].peso_evaluado, 62.5)
+        self.assertEqual(notas[self.sin_notas.id].nota_final, 0)
+        self.assertEqual(notas[self.estudiantes[0].id].evaluaciones_aplicadas, 2)
+
+    def test_faltantes_omitir(self):
+        notas = self._notas('omitir')
+        self.assertEqual(notas[self.estudiantes[0].id].nota_final, 62.5)
+        self.assertEqual(notas[self.estudiantes[2].id].nota_final, 75.0)
+        self.assertTrue(notas[self.sin_notas.id].nota_final != notas[self.sin_notas.id].nota_final)
+
+    def test_recalcular_endpoint(self):
+        url = '/api/notas-finales/recalcular/'
+        self.assertEqual(self.client.post(f'{url}?periodo={self.periodo.id}').status_code, 403)
+        self.client.force_authenticate(User.objects.create_user('docente', password='x'))
+        self.assertEqual(self.client.post(url).status_code, 400)
+        self.assertEqual(self.client.post(f'{url}?periodo={self.periodo.id}&faltantes=x').status_code, 400)
+        data = self.client.post(f'{url}?periodo={self.periodo.id}&faltantes=omitir').json()
+        self.assertEqual(data['notas_finales'], 9)
+        # Recalcular reemplaza las filas en lugar de duplicarlas
+        self.client.post(f'{url}?periodo={self.periodo.id}')
+        self.assertEqual(NotaFinal.objects.count(), 9)
+        nota = NotaFinal.objects.get(estudiante=self.estudiantes[1], curso=self.cursos[0])
+        self.assertEqual(nota.nota_final, Decimal('60.63'))
+        data = self.client.get('/api/notas-finales/', {'curso': self.cursos[0].id}).json()
+        self.assertEqual(data['count'], 5)
+
+
+class EstudiantesConPromedioTests(IndicadoresTestCase):
+    """Endpoint con_promedio: anotaciones, orden, filtros y paginación"""
+
+    url = '/api/estudiantes/con_promedio/'
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        crear_datos(n_estudiantes=6)
+
+    def test_promedio_y_orden(self):
+        data = self.client.get(self.url, {'ordering': '-promedio_general'}).json()
+        self.assertEqual(data['count'], 6)
+        self.assertEqual(
+            [(fila['ci'], fila['promedio_general']) for fila in data['results']][:3],
+            [('CI3', 95.0), ('CI2', 75.0), ('CI1', 55.0)]
+        )
+        self.assertEqual(data['results'][0]['total_evaluaciones'], 2)
+        self.assertEqual(self.client.get(self.url, {'ordering': 'email'}).status_code, 400)
+
+    def test_filtro_por_promedio(self):
+        data = self.client.get(self.url, {'promedio_min': 50, 'promedio_max': 60}).json()
+        self.assertEqual(sorted(fila['ci'] for fila in data['results']), ['CI1', 'CI5'])
+        self.assertEqual(self.client.get(self.url, {'promedio_min': 'x'}).status_code, 400)
+
+    def test_consultas_constantes(self):
+        Estudiante.objects.bulk_create([
+            Estudiante(nombres='X', apellidos=f'X{i}', ci=f'X{i}', fecha_nacimiento=date(2015, 1, 1))
+            for i in range(40)
+        ])
+        # COUNT + página
+        with self.assertNumQueries(2):
+            data = self.client.get(self.url).json()
+        self.assertEqual((data['count'], len(data['results'])), (46, 20))
+        self.assertEqual(data['results'][-1]['promedio_general'], 0)
+
+
+class CursosConEstadisticasTests(IndicadoresTestCase):
+    """Endpoint con_estadisticas: una consulta anotada, sin multiplicación de filas"""
+
+    url = '/api/cursos/con_estadisticas/'
+
+    def test_estadisticas_y_consultas(self):
+        client = APIClient()
+        _, _, cursos, estudiantes = crear_datos()
+        Evaluacion.objects.create(
+            curso=cursos[0], nombre='Examen 2', fecha=date(2025, 4, 1), ponderacion=Decimal('50')
+        )
+        Inscripcion.objects.filter(curso=cursos[1], estudiante=estudiantes[0]).update(activa=False)
+        # COUNT + página, sin importar cuántos cursos haya
+        with self.assertNumQueries(2):
+            data = client.get(self.url, {'ordering': '-total_evaluaciones'}).json()
+        primero, segundo = data['results']
+        self.assertEqual(
+            (primero['id'], primero['total_estudiantes'], primero['total_evaluaciones'], primero['promedio_curso']),
+            (cursos[0].id, 4, 2, 66.25)
+        )
+        self.assertEqual((segundo['total_estudiantes'], segundo['total_evaluaciones']), (3, 1))
+        self.assertEqual(primero['profesor_nombre'], 'Ana Vega')
+
+
+class PlanConsultasTests(IndicadoresTestCase):
+    """Los listados del router hacen un número de consultas independiente del tamaño de página"""
+
+    def _poblar(self, sufijo):
+        periodo, _, _, estudiantes = crear_datos(sufijo=sufijo)
+        for i, estudiante in enumerate(estudiantes):
+            apoderado = Apoderado.objects.create(
+                nombres='Apo', apellidos=f'{i}{sufijo}', ci=f'AP{i}{sufijo}', telefono='1'
+            )
+            EstudianteApoderado.objects.create(estudiante=estudiante, apoderado=apoderado)
+        notas_finales.refrescar_notas_finales(periodo.id)
+
+    def _consultas_por_endpoint(self, client, parametros=None):
+        from .urls import router
+        consultas = {}
+        for prefijo, viewset, _ in router.registry:
+            if not hasattr(viewset, 'list'):
+                continue
+            with CaptureQueriesContext(connection) as contexto:
+                response = client.get(f'/api/{prefijo}/', parametros)
+            self.assertEqual(response.status_code, 200, prefijo)
+            consultas[prefijo] = len(contexto)
+        return consultas
+
+    def test_consultas_constantes_en_listados(self):
+        client = APIClient()
+        self._poblar('')
+        pocas = self._consultas_por_endpoint(client)
+        # Con campos dispersos tampoco se cargan columnas diferidas fila por fila
+        pocas_dispersas = self._consultas_por_endpoint(client, {'omit': 'id'})
+        for sufijo in ('b', 'c', 'd'):
+            self._poblar(sufijo)
+        self.assertEqual(self._consultas_por_endpoint(client), pocas)
+        self.assertEqual(self._consultas_por_endpoint(client, {'omit': 'id'}), pocas_dispersas)
+        # Página keyset (sin COUNT) y etiquetas de curso de la lista rápida
+        self.assertEqual(pocas['asistencia'], 2)
+
+
+class ListasRapidasTests(IndicadoresTestCase):
+    """Los listados rápidos devuelven exactamente el mismo JSON que los serializers"""
+
+    endpoints = {
+        'calificaciones': views.CalificacionViewSet,
+        'asistencia': views.AsistenciaViewSet,
+        'inscripciones': views.InscripcionViewSet,
+    }
+
+    def test_json_identico(self):
+        client = APIClient()
+        _, _, cursos, _ = crear_datos(n_estudiantes=12)
+        calificacion = Calificacion.objects.first()
+        calificacion.nota = Decimal('7.5')
+        calificacion.observaciones = 'Entregó "tarde" — ñandú'
+        calificacion.save()
+        Asistencia.objects.filter(estado='ausente').update(estado='justificada', observaciones='Médico')
+        for prefijo, viewset in self.endpoints.items():
+            url = f'/api/{prefijo}/'
+            filtro_curso = 'evaluacion__curso' if prefijo == 'calificaciones' else 'curso'
+            consultas = [
+                (url, {}), (url, {filtro_curso: cursos[1].id}), (url, {'search': 'Apellido00001'}),
+                (client.get(url).json()['next'], {}),
+            ]
+            for url, parametros in consultas:
+                rapido = client.get(url, parametros)
+                with mock.patch.object(viewset, 'lista_rapida', None):
+                    normal = client.get(url, parametros)
+                self.assertEqual(rapido.status_code, 200)
+                self.assertEqual(rapido.content, normal.content, (prefijo, parametros))
+
+
+class PaginacionKeysetTests(IndicadoresTestCase):
+    """Paginación por clave de las tablas de hechos"""
+
+    url = '/api/asistencia/'
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        crear_datos(n_estudiantes=4)
+
+    def test_recorrido_completo(self):
+        esperado = list(Asistencia.objects.order_by('-fecha', 'id').values_list('id', flat=True))
+        vistos, paginas, url, datos = [], [], self.url, {'page_size': 7}
+        while url:
+            with self.assertNumQueries(2):
+                pagina = self.client.get(url, datos).json()
+            self.assertNotIn('count', pagina)
+            paginas.append(pagina)
+            vistos.extend(fila['id'] for fila in pagina['results'])
+            url, datos = pagina['next'], {}
+        self.assertEqual(vistos, esperado)
+        self.assertIsNone(paginas[0]['previous'])
+        # Volver desde la tercera página devuelve la segunda
+        anterior = self.client.get(paginas[2]['previous']).json()
+        self.assertEqual(anterior['results'], paginas[1]['results'])
+        self.assertEqual(anterior['next'], paginas[1]['next'])
+
+    def test_fechas_con_filtros_y_cursor_invalido(self):
+        calificaciones = self.client.get('/api/calificaciones/', {'page_size': 3}).json()
+        siguiente = self.client.get(calificaciones['next']).json()
+        self.assertEqual(len(siguiente['results']), 3)
+        self.assertFalse({f['id'] for f in calificaciones['results']} & {f['id'] for f in siguiente['results']})
+        self.assertEqual(self.client.get(self.url, {'cursor': 'no-es-un-cursor'}).status_code, 404)
+        # Las tablas de dimensiones conservan la paginación por número de página
+        self.assertIn('count', self.client.get('/api/estudiantes/').json())
+
+
+class ExportacionesTests(IndicadoresTestCase):
+    """Exportaciones CSV/NDJSON en streaming con los filtros del listado"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        _, _, self.cursos, _ = crear_datos(n_estudiantes=5)
+
+    def _contenido(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_ndjson_igual_al_listado(self):
+        parametros = {'curso': self.cursos[0].id, 'estado': 'presente'}
+        response = self.client.get('/api/asistencia/exportar/', {'formato': 'ndjson', **parametros})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        filas = [json.loads(linea) for linea in self._contenido(response).splitlines()]
+        listado = self.client.get('/api/asistencia/', {'page_size': 1000, **parametros}).json()['results']
+        self.assertEqual(filas, listado)
+        self.assertEqual(len(filas), 23)
+
+    def test_csv_por_lotes(self):
+        with mock.patch.object(exportaciones, 'TAMANO_LOTE', 3):
+            response = self.client.get('/api/calificaciones/exportar/', {'search': 'Est'})
+            lineas = list(csv.reader(self._contenido(response).lstrip('\ufeff').splitlines()))
+        self.assertIn('attachment; filename="calificacion-', response['Content-Disposition'])
+        self.assertEqual(lineas[0][:3], ['id', 'evaluacion', 'evaluacion_nombre'])
+        self.assertEqual(len(lineas), 1 + Calificacion.objects.count())
+        self.assertEqual(
+            sorted(int(fila[0]) for fila in lineas[1:]),
+            sorted(Calificacion.objects.values_list('id', flat=True))
+        )
+        self.assertEqual(self.client.get('/api/inscripciones/exportar/', {'formato': 'xls'}).status_code, 400)
+
+
+class RenderersTests(IndicadoresTestCase):
+    """JSON rápido idéntico al de DRF y MessagePack por Accept"""
+
+    def test_json_rapido_identico(self):
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+
+        datos = {
+            'nota': Decimal('85.50'), 'fecha': date(2025, 3, 3),
+            'registro': timezone.now(), 'texto': 'ñandú \u2028 "citas"',
+            'lazy': gettext_lazy('Presente'), 7: [1.5, None, True], 'anidado': [{'a': Decimal('1')}],
+        }
+        self.assertEqual(renderers.JSONRapidoRenderer().render(datos), JSONRenderer().render(datos))
+
+        crear_datos()
+        client = APIClient()
+        for url in ('/api/calificaciones/', '/api/cursos/con_estadisticas/', '/api/dashboard/kpis_generales/'):
+            response = client.get(url)
+            self.assertEqual(response.content, JSONRenderer().render(response.data), url)
+
+    @skipUnless(find_spec('msgpack'), 'msgpack es opcional (requirements.txt)')
+    def test_messagepack(self):
+        import msgpack
+
+        crear_datos()
+        response = APIClient().get('/api/calificaciones/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        datos = msgpack.unpackb(response.content)
+        self.assertEqual(datos, json.loads(json.dumps(response.data)))
+        self.assertEqual(datos['results'][0]['nota'], response.data['results'][0]['nota'])
+
+
+class CamposDispersosTests(IndicadoresTestCase):
+    """?fields= / ?omit= recortan la respuesta y los JOINs"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        _, _, self.cursos, _ = crear_datos()
+
+    def _consulta(self, url, parametros):
+        with CaptureQueriesContext(connection) as contexto:
+            data = self.client.get(url, parametros).json()
+        return data, contexto.captured_queries[-1]['sql']
+
+    def test_fields_sin_joins(self):
+        completo = self.client.get('/api/calificaciones/').json()['results']
+        data, sql = self._consulta('/api/calificaciones/', {'fields': 'id,estudiante,nota'})
+        self.assertEqual(
+            data['results'],
+            [{campo: fila[campo] for campo in ('id', 'estudiante', 'nota')} for fila in completo]
+        )
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('observaciones', sql)
+
+    def test_omit_quita_relaciones(self):
+        data, sql = self._consulta('/api/asistencia/', {'omit': 'curso_info,observaciones'})
+        fila = data['results'][0]
+        self.assertNotIn('curso_info', fila)
+        self.assertEqual(fila['estudiante_nombre'], 'Est0 Apellido00000')
+        self.assertIn('indicadores_estudiante', sql)
+        self.assertNotIn('indicadores_profesor', sql)
+
+        data, sql = self._consulta('/api/cursos/', {'fields': 'id,grado_nombre'})
+        self.assertEqual(set(data['results'][0]), {'id', 'grado_nombre'})
+        self.assertIn('indicadores_grado', sql)
+        self.assertNotIn('indicadores_profesor', sql)
+
+    def test_detalle_y_escrituras(self):
+        curso = self.cursos[0]
+        data = self.client.get(f'/api/cursos/{curso.id}/', {'fields': 'seccion'}).json()
+        self.assertEqual(data, {'seccion': 'A'})
+        self.client.force_authenticate(User.objects.create_user('docente', password='x'))
+        response = self.client.patch(f'/api/cursos/{curso.id}/?fields=id', {'seccion': 'B'}, format='json')
+        self.assertIn('grado_nombre', response.json())
+
+
+class CalificacionesEnLoteTests(IndicadoresTestCase):
+    """POST de una lista en /api/calificaciones/: validación por conjuntos y bulk_create"""
+
+    url = '/api/calificaciones/'
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('docente', password='x'))
+        _, _, self.cursos, self.estudiantes = crear_datos(n_estudiantes=46)
+        self.evaluaciones = [
+            Evaluacion.objects.create(curso=curso, nombre='Parcial', fecha=date(2025, 4, 1), ponderacion=Decimal('50'))
+            for curso in self.cursos
+        ]
+
+    def _lote(self, evaluacion, estudiantes, nota='80.5'):
+        return [{'evaluacion': evaluacion.id, 'estudiante': e.id, 'nota': nota} for e in estudiantes]
+
+    def _post_contando(self, lote):
+        """POST del lote; devuelve (consultas, respuesta) y exige un único INSERT de calificaciones"""
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.post(self.url, lote, format='json')
+        self.assertEqual(response.status_code, 201)
+        inserts = [
+            consulta for consulta in contexto.captured_queries
+            if consulta['sql'].startswith('INSERT INTO "indicadores_calificacion"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        return len(contexto.captured_queries), response
+
+    def test_lote_consultas_constantes(self):
+        dos, _ = self._post_contando(
+            self._lote(self.evaluaciones[0], self.estudiantes[:1]) + self._lote(self.evaluaciones[1], self.estudiantes[:1])
+        )
+        lote = self._lote(self.evaluaciones[0], self.estudiantes[1:46]) + self._lote(self.evaluaciones[1], self.estudiantes[1:6])
+        self.assertEqual(len(lote), 50)
+        cincuenta, response = self._post_contando(lote)
+        self.assertEqual(cincuenta, dos)
+        data = response.json()
+        self.assertEqual(len(data), 50)
+        self.assertEqual(data[0]['evaluacion_nombre'], 'Parcial')
+        self.assertEqual(data[0]['nota'], '80.50')
+        self.assertEqual(Calificacion.objects.filter(evaluacion__in=self.evaluaciones).count(), 52)
+        self.assertEqual(resumenes.verificar(), [])
+
+    def test_errores_por_item(self):
+        externo = Estudiante.objects.create(
+            nombres='Sin', apellidos='Inscripcion', ci='CI-EXT', fecha_nacimiento=date(2015, 1, 1)
+        )
+        Calificacion.objects.create(evaluacion=self.evaluaciones[0], estudiante=self.estudiantes[1], nota=Decimal('50'))
+        lote = self._lote(self.evaluaciones[0], [self.estudiantes[0], self.estudiantes[1], externo, self.estudiantes[0]])
+        lote.append({'evaluacion': 0, 'estudiante': self.estudiantes[2].id, 'nota': '50'})
+        lote.append({'evaluacion': 999999, 'estudiante': self.estudiantes[2].id, 'nota': '50'})
+        response = self.client.post(self.url, lote, format='json')
+        self.assertEqual(response.status_code, 400)
+        # Primero los tipos y rangos (serializer), luego claves e inscripciones
+        self.assertEqual(list(response.json()), ['4'])
+
+        del lote[4]
+        errores = self.client.post(self.url, lote, format='json').json()
+        self.assertEqual(sorted(errores), ['1', '2', '3', '4'])
+        self.assertIn('non_field_errors', errores['1'])
+        self.assertIn('estudiante', errores['2'])
+        self.assertIn('non_field_errors', errores['3'])
+        self.assertIn('evaluacion', errores['4'])
+        self.assertEqual(Calificacion.objects.filter(evaluacion=self.evaluaciones[0]).count(), 1)
+
+    def test_objeto_unico_sin_cambios(self):
+        response = self.client.post(self.url, self._lote(self.evaluaciones[0], self.estudiantes[:1])[0], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['estudiante'], self.estudiantes[0].id)
+        self.assertEqual(self.client.post(self.url, [], format='json').status_code, 400)
+
+
+class AsistenciaLoteTests(IndicadoresTestCase):
+    """Upsert idempotente de asistencia en /api/asistencia/lote/"""
+
+    url = '/api/asistencia/lote/'
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('docente', password='x'))
+        _, _, self.cursos, self.estudiantes = crear_datos(n_estudiantes=10)
+
+    def _lote(self, fecha, estado='presente'):
+        return [
+            {'estudiante': e.id, 'curso': self.cursos[0].id, 'fecha': fecha, 'estado': estado}
+            for e in self.estudiantes
+        ]
+
+    def test_insertadas_actualizadas_sin_cambios(self):
+        # 2025-03-03 ya tiene registros (todos presentes salvo CI3 ausente)
+        lote = self._lote('2025-03-03') + self._lote('2025-03-10', 'ausente')
+        lote[0]['estado'] = 'tardanza'
+        data = self.client.post(self.url, lote, format='json').json()
+        self.assertEqual(data, {'insertadas': 10, 'actualizadas': 2, 'sin_cambios': 8})
+        self.assertEqual(
+            Asistencia.objects.get(estudiante=self.estudiantes[0], curso=self.cursos[0], fecha=date(2025, 3, 3)).estado,
+            'tardanza'
+        )
+        self.assertEqual(resumenes.verificar(), [])
+
+        # Inscripciones + registros existentes (más el SAVEPOINT de la transacción)
+        with self.assertNumQueries(4):
+            data = self.client.post(self.url, lote, format='json').json()
+        self.assertEqual(data, {'insertadas': 0, 'actualizadas': 0, 'sin_cambios': 20})
+
+    def test_clave_de_idempotencia(self):
+        lote = self._lote('2025-03-10')
+        response = self.client.post(self.url, lote, format='json', HTTP_IDEMPOTENCY_KEY='tablet-1-lote-7')
+        self.assertEqual(response.json()['insertadas'], 10)
+        Asistencia.objects.filter(fecha=date(2025, 3, 10)).delete()
+        with self.assertNumQueries(1):
+            response = self.client.post(self.url, lote, format='json', HTTP_IDEMPOTENCY_KEY='tablet-1-lote-7')
+        self.assertEqual(response.json()['insertadas'], 10)
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertFalse(Asistencia.objects.filter(fecha=date(2025, 3, 10)).exists())
+
+        lote[0]['estado'] = 'ausente'
+        response = self.client.post(self.url, lote, format='json', HTTP_IDEMPOTENCY_KEY='tablet-1-lote-7')
+        self.assertEqual(response.status_code, 409)
+
+    def test_errores_no_registran_la_clave(self):
+        externo = Estudiante.objects.create(
+            nombres='Sin', apellidos='Inscripcion', ci='CI-EXT', fecha_nacimiento=date(2015, 1, 1)
+        )
+        lote = self._lote('2025-03-10')
+        lote.append(dict(lote[0]))
+        lote.append({'estudiante': externo.id, 'curso': self.cursos[0].id, 'fecha': '2025-03-10', 'estado': 'presente'})
+        response = self.client.post(self.url, lote, format='json', HTTP_IDEMPOTENCY_KEY='k')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(response.json()), ['10', '11'])
+        self.assertFalse(LoteProcesado.objects.exists())
+        self.assertFalse(Asistencia.objects.filter(fecha=date(2025, 3, 10)).exists())
+
+
+class BusquedaTests(IndicadoresTestCase):
+    """Índice de búsqueda de personas: normalización, sincronía y autocompletar"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        nacimiento = date(2015, 1, 1)
+        self.garcia = Estudiante.objects.create(nombres='José Luis', apellidos='García Pérez', ci='4455667', fecha_nacimiento=nacimiento)
+        self.garay = Estudiante.objects.create(nombres='Ana', apellidos='Garay', ci='1234567', fecha_nacimiento=nacimiento)
+        self.ana = Estudiante.objects.create(nombres='Anabel', apellidos='Rojas', ci='7654321', email='gar@test.edu', fecha_nacimiento=nacimiento)
+
+    def _autocompletar(self, q, **extra):
+        return [fila['id'] for fila in self.client.get('/api/estudiantes/autocompletar/', {'q': q, **extra}).json()]
+
+    def test_normalizar(self):
+        self.assertEqual(busqueda.normalizar('  JOSÉ  Núñez-Ávila '), ['jose', 'nunez', 'avila'])
+        self.assertEqual(busqueda.palabras_consulta('gar garcia Gar'), ['garcia'])
+
+    def test_autocompletar_ordenado(self):
+        # Apellido con prefijo (peso 3) antes que email (peso 1); desempate alfabético
+        self.assertEqual(self._autocompletar('GAR'), [self.garay.id, self.garcia.id, self.ana.id])
+        self.assertEqual(self._autocompletar('perez jose'), [self.garcia.id])
+        self.assertEqual(self._autocompletar('ana'), [self.garay.id, self.ana.id])
+        self.assertEqual(self._autocompletar('4455'), [self.garcia.id])
+        self.assertEqual(self._autocompletar('gar', limite=1), [self.garay.id])
+        self.assertEqual(self._autocompletar('  '), [])
+        fila = self.client.get('/api/estudiantes/autocompletar/', {'q': 'garcia'}).json()[0]
+        self.assertEqual(fila['texto'], str(self.garcia))
+
+    def test_sincronia_con_senales(self):
+        self.garcia.apellidos = 'Mamani'
+        self.garcia.save()
+        self.assertEqual(self._autocompletar('garcia'), [])
+        self.assertEqual(self._autocompletar('mamani'), [self.garcia.id])
+        self.garay.delete()
+        self.assertFalse(TerminoBusqueda.objects.filter(tipo='estudiante', objeto_id=self.garay.id).exists())
+
+        TerminoBusqueda.objects.all().delete()
+        call_command('reindexar_busqueda', stdout=StringIO())
+        self.assertEqual(self._autocompletar('ana'), [self.ana.id])
+
+    def test_search_usa_el_indice(self):
+        Profesor.objects.create(nombres='Ana', apellidos='Vega', email='avega@test.edu')
+        with CaptureQueriesContext(connection) as contexto:
+            data = self.client.get('/api/estudiantes/', {'search': 'gar jos'}).json()
+        self.assertEqual([fila['id'] for fila in data['results']], [self.garcia.id])
+        self.assertIn('indicadores_terminobusqueda', contexto.captured_queries[-1]['sql'])
+        self.assertNotIn('LIKE', contexto.captured_queries[-1]['sql'])
+        data = self.client.get('/api/profesores/', {'search': 'vega'}).json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(self.client.get('/api/apoderados/autocompletar/', {'q': 'vega'}).json(), [])
+
+
+class ConteoAproximadoTests(IndicadoresTestCase):
+    """Paginación por número: conteo exacto en tablas chicas, cacheado en grandes"""
+
+    url = '/api/estudiantes/'
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        crear_datos(n_estudiantes=6)
+
+    def test_conteo_exacto_bajo_el_umbral(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual((data['count'], data['count_aproximado']), (6, False))
+        self.assertIsNone(paginacion.estimar_filas(Estudiante.objects.all()))
+
+    @override_settings(PAGINACION_CONTEO_EXACTO_HASTA=5)
+    def test_conteo_cacheado_sobre_el_umbral(self):
+        data = self.client.get(self.url, {'activo': 'true'}).json()
+        self.assertEqual((data['count'], data['count_aproximado']), (6, False))
+        Estudiante.objects.create(nombres='Nuevo', apellidos='Z', ci='CI-Z', fecha_nacimiento=date(2015, 1, 1))
+        with CaptureQueriesContext(connection) as contexto:
+            data = self.client.get(self.url, {'activo': 'true'}).json()
+        self.assertEqual((data['count'], data['count_aproximado']), (6, True))
+        self.assertFalse(any('COUNT(' in q['sql'] for q in contexto.captured_queries))
+        self.assertEqual(len(data['results']), 7)
+        # Con el conteo cacheado (6) la tercera página de 3 no se pierde
+        with mock.patch.object(paginacion.PaginacionConteoAproximado, 'page_size', 3):
+            data = self.client.get(self.url, {'activo': 'true', 'page': 2}).json()
+            self.assertTrue(data['count_aproximado'])
+            self.assertIsNotNone(data['next'])
+            data = self.client.get(self.url, {'activo': 'true', 'page': 3}).json()
+            self.assertEqual((len(data['results']), data['next']), (1, None))
+        # Otra consulta (otros filtros) se cuenta por separado
+        self.assertEqual(self.client.get(self.url).json()['count'], 7)
+
+
+class PasarListaTests(IndicadoresTestCase):
+    """Pasar lista con AsistenciaMasivaForm: precarga y guardado en lote"""
+
+    url = '/pasar-lista/'
+
+    def setUp(self):
+        super().setUp()
+        _, _, self.cursos, self.estudiantes = crear_datos(n_estudiantes=4)
+
+    def _datos(self, estudiantes, fecha, estado='presente'):
+        datos = {'curso': self.cursos[0].id, 'fecha': fecha}
+        datos.update({f'estudiante_{e.id}': estado for e in estudiantes})
+        return datos
+
+    def _consultas_post(self, fecha, estado):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.post(self.url, self._datos(self.estudiantes, fecha, estado))
+        self.assertEqual(response.status_code, 302)
+        return len(contexto.captured_queries)
+
+    def test_precarga_estados(self):
+        # CI3 estuvo ausente el 2025-03-03 (crear_datos)
+        response = self.client.get(self.url, {'curso': self.cursos[0].id, 'fecha': '2025-03-03'})
+        form = response.context['form']
+        self.assertEqual(form.registrados, 4)
+        self.assertEqual(form.fields[f'estudiante_{self.estudiantes[3].id}'].initial, 'ausente')
+        self.assertEqual(form.fields[f'estudiante_{self.estudiantes[0].id}'].initial, 'presente')
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_consultas_constantes(self):
+        chico = self._consultas_post('2025-04-01', 'presente')
+        # Curso (vista y formulario), inscritos y estados del día, inscripciones y
+        # registros del lote, el upsert, un upsert por tabla de resumen (6) y el SAVEPOINT
+        self.assertLessEqual(chico, 15)
+        extra = Estudiante.objects.bulk_create([
+            Estudiante(nombres='X', apellidos=f'X{i}', ci=f'X{i}', fecha_nacimiento=date(2015, 1, 1))
+            for i in range(41)
+        ])
+        Inscripcion.objects.bulk_create([Inscripcion(estudiante=e, curso=self.cursos[0]) for e in extra])
+        self.estudiantes += extra
+        self.assertEqual(self._consultas_post('2025-04-02', 'presente'), chico)
+        self.assertEqual(Asistencia.objects.filter(fecha=date(2025, 4, 2)).count(), 45)
+        # Corregir la lista del día: upsert sobre los mismos registros
+        self.assertEqual(self._consultas_post('2025-04-02', 'tardanza'), chico)
+        self.assertEqual(Asistencia.objects.filter(fecha=date(2025, 4, 2), estado='tardanza').count(), 45)
+        self.assertEqual(resumenes.verificar(), [])
+
+
+class PlanillaCalificacionesTests(IndicadoresTestCase):
+    """Planilla de notas de una evaluación: carga en una consulta y upsert en lote"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        _, _, self.cursos, self.estudiantes = crear_datos(n_estudiantes=4)
+        self.evaluacion = Evaluacion.objects.get(curso=self.cursos[0])
+        self.url = f'/api/evaluaciones/{self.evaluacion.id}/planilla/'
+
+    def _post(self, notas):
+        datos = {'evaluacion': self.evaluacion.id}
+        datos.update({f'nota_{e.id}': nota for e, nota in zip(self.estudiantes, notas)})
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.post('/planilla-calificaciones/', datos)
+        self.assertEqual(response.status_code, 302)
+        return len(contexto.captured_queries)
+
+    def test_planilla_api(self):
+        nuevo = Estudiante.objects.create(nombres='Nuevo', apellidos='Zeta', ci='CI-N', fecha_nacimiento=date(2015, 1, 1))
+        Inscripcion.objects.create(estudiante=nuevo, curso=self.cursos[0])
+        data = self.client.get(self.url).json()
+        notas = {fila['estudiante']: fila['nota'] for fila in data['estudiantes']}
+        self.assertEqual(notas[self.estudiantes[0].id], '40.00')
+        self.assertIsNone(notas[nuevo.id])
+
+        self.assertEqual(self.client.post(self.url, [], format='json').status_code, 403)
+        self.client.force_authenticate(User.objects.create_user('docente', password='x'))
+        lote = [
+            {'estudiante': nuevo.id, 'nota': '88'},
+            {'estudiante': self.estudiantes[0].id, 'nota': '41'},
+            {'estudiante': self.estudiantes[1].id, 'nota': '55.00'},
+        ]
+        # Evaluación, inscripciones y notas existentes, el upsert y un upsert por tabla de resumen (6)
+        with CaptureQueriesContext(connection) as contexto:
+            data = self.client.post(self.url, lote, format='json').json()
+        self.assertLessEqual(len(contexto.captured_queries), 13)
+        self.assertEqual(data, {'insertadas': 1, 'actualizadas': 1, 'sin_cambios': 1})
+        self.assertEqual(Calificacion.objects.get(evaluacion=self.evaluacion, estudiante=nuevo).nota, Decimal('88'))
+        self.assertEqual(resumenes.verificar(), [])
+
+        otro = Estudiante.objects.create(nombres='Otro', apellidos='Curso', ci='CI-O', fecha_nacimiento=date(2015, 1, 1))
+        response = self.client.post(self.url, [{'estudiante': otro.id, 'nota': '50'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('estudiante', response.json()['0'])
+
+    def test_pagina_consultas_constantes(self):
+        response = self.client.get('/planilla-calificaciones/', {'evaluacion': self.evaluacion.id})
+        self.assertEqual(response.context['form'].registradas, 4)
+        chico = self._post(['50', '60', '', '70'])
+        # Evaluación (vista y formulario), planilla, validación y upsert del lote,
+        # un upsert por tabla de resumen (6) y el SAVEPOINT
+        self.assertLessEqual(chico, 15)
+        self.assertEqual(
+            Calificacion.objects.get(evaluacion=self.evaluacion, estudiante=self.estudiantes[2]).nota, Decimal('75')
+        )
+        extra = Estudiante.objects.bulk_create([
+            Estudiante(nombres='X', apellidos=f'X{i}', ci=f'X{i}', fecha_nacimiento=date(2015, 1, 1))
+            for i in range(41)
+        ])
+        Inscripcion.objects.bulk_create([Inscripcion(estudiante=e, curso=self.cursos[0]) for e in extra])
+        self.estudiantes = list(Estudiante.objects.filter(inscripcion__curso=self.cursos[0]))
+        self.assertEqual(self._post(['65'] * 45), chico)
+        self.assertEqual(Calificacion.objects.filter(evaluacion=self.evaluacion, nota=Decimal('65')).count(), 45)
+        self.assertEqual(resumenes.verificar(), [])
+
+
+class OpcionesRemotasTests(IndicadoresTestCase):
+    """Selects remotos: el render no depende del tamaño de las tablas"""
+
+    PAGINAS = [
+        '/registrar-calificacion/', '/registrar-asistencia/', '/inscripciones/',
+        '/apoderados/vincular/', '/evaluaciones/', '/cursos/', '/pasar-lista/', '/planilla-calificaciones/',
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        _, _, self.cursos, self.estudiantes = crear_datos(n_estudiantes=5)
+        self.evaluacion = Evaluacion.objects.get(curso=self.cursos[0])
+
+    def _consultas(self):
+        consultas = {}
+        for url in self.PAGINAS:
+            with CaptureQueriesContext(connection) as contexto:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotIn('Masivo', response.content.decode(), url)
+            consultas[url] = len(contexto.captured_queries)
+        return consultas
+
+    def test_paginas_no_recorren_tablas(self):
+        antes = self._consultas()
+        Estudiante.objects.bulk_create([
+            Estudiante(nombres='N', apellidos=f'Masivo{i}', ci=f'M{i}', fecha_nacimiento=date(2015, 1, 1))
+            for i in range(50)
+        ])
+        self.assertEqual(self._consultas(), antes)
+
+    def test_widget_renderiza_solo_la_elegida(self):
+        from .forms import CalificacionForm
+        elegido = self.estudiantes[2]
+        form = CalificacionForm(data={'evaluacion': self.evaluacion.id, 'estudiante': elegido.id, 'nota': '70'})
+        form.full_clean()
+        with CaptureQueriesContext(connection) as contexto:
+            html = str(form['evaluacion']) + str(form['estudiante'])
+        self.assertEqual(len(contexto.captured_queries), 2)
+        self.assertEqual(html.count('<option'), 4)
+        self.assertIn(f'value="{elegido.id}" selected', html)
+        self.assertIn('data-opciones-url="/api/opciones/estudiantes/"', html)
+        self.assertIn('data-depende-de="evaluacion"', html)
+        self.assertIn(str(self.evaluacion), html)
+
+    def test_opciones_keyset(self):
+        ids, url, paginas = [], '/api/opciones/estudiantes/', 0
+        while url:
+            data = self.client.get(url, {'page_size': 2} if paginas == 0 else None).json()
+            ids += [item['id'] for item in data['results']]
+            url, paginas = data['next'], paginas + 1
+        self.assertEqual(paginas, 3)
+        self.assertEqual(ids, list(Estudiante.objects.order_by('apellidos', 'nombres', 'id').values_list('id', flat=True)))
+
+        data = self.client.get('/api/opciones/estudiantes/', {'q': 'apellido00003'}).json()
+        self.assertEqual(data['results'], [{'id': self.estudiantes[3].id, 'texto': str(self.estudiantes[3])}])
+
+        Inscripcion.objects.filter(estudiante=self.estudiantes[0], curso=self.cursos[0]).update(activa=False)
+        for filtro in ({'curso': self.cursos[0].id}, {'evaluacion': self.evaluacion.id}):
+            data = self.client.get('/api/opciones/estudiantes/', filtro).json()
+            self.assertEqual(len(data['results']), 4)
+
+        data = self.client.get('/api/opciones/cursos/', {'q': 'asignatura vega'}).json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertEqual(self.client.get('/api/opciones/cursos/', {'q': 'fisica'}).json()['results'], [])
+        data = self.client.get('/api/opciones/evaluaciones/', {'curso': self.cursos[1].id}).json()
+        self.assertEqual(len(data['results']), 1)
+
+        self.assertEqual(self.client.get('/api/opciones/aulas/').status_code, 404)
+        self.assertEqual(self.client.get('/api/opciones/estudiantes/', {'curso': 'x'}).status_code, 400)
+
+
+class ListadosTests(IndicadoresTestCase):
+    """Páginas de gestión: conteos anotados, paginación, búsqueda y orden"""
+
+    PAGINAS = ['/estudiantes/', '/profesores/', '/apoderados/', '/cursos/', '/evaluaciones/']
+
+    def setUp(self):
+        super().setUp()
+        _, self.grado, self.cursos, self.estudiantes = crear_datos(n_estudiantes=4)
+        self.apoderado = Apoderado.objects.create(nombres='Luis', apellidos='Paz', ci='AP1', telefono='1')
+        for estudiante in self.estudiantes[:3]:
+            EstudianteApoderado.objects.create(estudiante=estudiante, apoderado=self.apoderado)
+
+    def _consultas(self):
+        consultas = {}
+        for url in self.PAGINAS:
+            with CaptureQueriesContext(connection) as contexto:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            consultas[url] = len(contexto.captured_queries)
+        return consultas
+
+    def test_consultas_constantes(self):
+        antes = self._consultas()
+        extra = Estudiante.objects.bulk_create([
+            Estudiante(nombres='N', apellidos=f'Masivo{i:02d}', ci=f'M{i}', fecha_nacimiento=date(2015, 1, 1))
+            for i in range(40)
+        ])
+        apoderados = Apoderado.objects.bulk_create([
+            Apoderado(nombres='A', apellidos=f'Apo{i:02d}', ci=f'AP-{i}', telefono='1') for i in range(30)
+        ])
+        EstudianteApoderado.objects.bulk_create([
+            EstudianteApoderado(estudiante=e, apoderado=a) for e, a in zip(extra, apoderados)
+        ])
+        Inscripcion.objects.bulk_create([Inscripcion(estudiante=e, curso=self.cursos[0]) for e in extra])
+        Evaluacion.objects.bulk_create([
+            Evaluacion(curso=self.cursos[1], nombre=f'Tarea {i}', fecha=date(2025, 4, 1), ponderacion=Decimal('1'))
+            for i in range(30)
+        ])
+        self.assertEqual(self._consultas(), antes)
+
+        response = self.client.get('/estudiantes/')
+        self.assertEqual(len(response.context['estudiantes']), listados.POR_PAGINA)
+        self.assertEqual(response.context['listado'].total, 44)
+        segunda = self.client.get('/estudiantes/', {'page': 2, 'orden': '-apellidos'}).context['estudiantes']
+        self.assertEqual(len(segunda), 44 - listados.POR_PAGINA)
+        self.assertEqual(segunda[len(segunda) - 1].apellidos, 'Apellido00000')
+
+    def test_conteos_anotados(self):
+        cursos = {c.id: c.alumnos for c in self.client.get('/cursos/').context['cursos']}
+        self.assertEqual(cursos, {c.id: 4 for c in self.cursos})
+        evaluaciones = self.client.get('/evaluaciones/').context['evaluaciones']
+        self.assertEqual([e.calificaciones for e in evaluaciones], [4, 4])
+        response = self.client.get('/apoderados/', {'orden': 'estudiantes'})
+        self.assertEqual(response.context['apoderados'][0].estudiantes, 3)
+        self.assertContains(response, 'orden=-estudiantes')
+
+    def test_busqueda_y_filtros(self):
+        response = self.client.get('/estudiantes/', {'q': 'apellido00002'})
+        self.assertEqual([e.id for e in response.context['estudiantes']], [self.estudiantes[2].id])
+        self.assertContains(response, 'value="apellido00002"')
+
+        Inscripcion.objects.filter(estudiante=self.estudiantes[0], curso=self.cursos[0]).update(activa=False)
+        response = self.client.get('/estudiantes/', {'curso': self.cursos[0].id})
+        self.assertEqual(response.context['listado'].total, 3)
+        self.assertEqual(self.client.get('/evaluaciones/', {'curso': self.cursos[1].id}).context['listado'].total, 1)
+
+        response = self.client.get('/estudiantes/', {'curso': 'x', 'page': 9})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['listado'].total, 0)
+        self.assertIn('curso', response.context['listado'].error)
+
+
+class PresupuestoConsultasTests(PresupuestoRutasMixin, IndicadoresTestCase):
+    """Presupuesto de consultas: todas las rutas de la app y el middleware"""
+
+    def setUp(self):
+        super().setUp()
+        self.periodo, self.grado, self.cursos, self.estudiantes = crear_datos(n_estudiantes=4)
+        notas_finales.refrescar_notas_finales(self.periodo.id)
+        apoderado = Apoderado.objects.create(nombres='Luis', apellidos='Paz', ci='AP1', telefono='1')
+        EstudianteApoderado.objects.create(estudiante=self.estudiantes[0], apoderado=apoderado)
+        self.client.force_login(User.objects.create_user('docente', password='x'))
+
+    def escrituras(self, sufijo, fecha):
+        """
+        Un POST válido por ruta de escritura; `sufijo` y `fecha` evitan chocar
+        con una pasada anterior. Las rutas se recorren en orden alfabético:
+        `nuevo` ya está inscrito (inscripcion-list) al pasar lista y al
+        registrar su nota.
+        """
+        curso, estudiantes = self.cursos[0], self.estudiantes
+        evaluacion = Evaluacion.objects.create(curso=curso, nombre=f'Parcial{sufijo}', fecha=fecha, ponderacion=Decimal('20'))
+        apoderado = Apoderado.objects.create(nombres='Eva', apellidos='Rios', ci=f'AP{sufijo}', telefono='1')
+        nuevo = Estudiante.objects.create(nombres='Nuevo', apellidos='Zeta', ci=f'N{sufijo}', fecha_nacimiento=date(2015, 1, 1))
+        inscritos = list(Estudiante.objects.filter(inscripcion__curso=curso))
+        dia = lambda n: (fecha + timedelta(days=n)).isoformat()
+        persona = {'nombres': 'Rosa', 'apellidos': 'Mar', 'telefono': '1', 'activo': True}
+        estudiante = {**persona, 'fecha_nacimiento': '2015-01-01'}
+        nuevo_curso = {'grado': self.grado.id, 'profesor': curso.profesor_id, 'periodo_academico': self.periodo.id}
+        api = lambda data, status=201: {'method': 'post', 'format': 'json', 'data': data, 'status': status}
+        formulario = lambda data: {'method': 'post', 'data': data, 'status': 302}
+        return {
+            'grado-list': api({'nombre': f'2° Test{sufijo}'}),
+            'asignatura-list': api({'nombre': f'Física{sufijo}', 'codigo': f'F{sufijo}'}),
+            'periodoacademico-list': api({'nombre': f'Verano{sufijo}', 'fecha_inicio': dia(0), 'fecha_fin': dia(60)}),
+            'profesor-list': api({**persona, 'email': f'rosa{sufijo}@test.edu'}),
+            'estudiante-list': api({**estudiante, 'ci': f'E{sufijo}'}),
+            'apoderado-list': api({**persona, 'ci': f'AE{sufijo}', 'parentesco': 'madre'}),
+            'curso-list': api({**nuevo_curso, 'asignatura': self.cursos[1].asignatura_id, 'seccion': f'B{sufijo}'}),
+            'inscripcion-list': api({'estudiante': nuevo.id, 'curso': curso.id}),
+            'estudianteapoderado-list': api({'estudiante': estudiantes[1].id, 'apoderado': apoderado.id}),
+            'evaluacion-list': api({'curso': curso.id, 'nombre': 'Tarea', 'fecha': dia(0), 'ponderacion': '10'}),
+            'calificacion-list': api([{'evaluacion': evaluacion.id, 'estudiante': estudiantes[0].id, 'nota': '70'}]),
+            'asistencia-list': api({'estudiante': estudiantes[0].id, 'curso': curso.id, 'fecha': dia(1), 'estado': 'presente'}),
+            'asistencia-lote': api([
+                {'estudiante': e.id, 'curso': curso.id, 'fecha': dia(2), 'estado': 'presente'} for e in estudiantes
+            ], 200),
+            'evaluacion-planilla': {'pk': evaluacion.id, **api([{'estudiante': estudiantes[1].id, 'nota': '65'}], 200)},
+            'notafinal-recalcular': {'query': {'periodo': self.periodo.id}, **api({}, 200)},
+            'estudiantes_list': formulario({**estudiante, 'ci': f'F{sufijo}'}),
+            'profesores_list': formulario({**persona, 'email': f'rosa-f{sufijo}@test.edu'}),
+            'apoderados_list': formulario({**persona, 'ci': f'AF{sufijo}', 'parentesco': 'padre'}),
+            'cursos_list': formulario({**nuevo_curso, 'asignatura': curso.asignatura_id, 'seccion': f'C{sufijo}'}),
+            'inscripciones_list': formulario({'estudiante': nuevo.id, 'curso': self.cursos[1].id, 'activa': 'on'}),
+            'evaluaciones_list': formulario({'curso': curso.id, 'nombre': 'Oral', 'tipo': 'participacion', 'fecha': dia(0), 'ponderacion': '10'}),
+            'vincular_apoderado': formulario({'estudiante': estudiantes[2].id, 'apoderado': apoderado.id, 'activa': 'on'}),
+            'registrar_calificacion': formulario({'evaluacion': evaluacion.id, 'estudiante': nuevo.id, 'nota': '55'}),
+            'planilla_calificaciones': formulario({
+                'evaluacion': evaluacion.id, **{f'nota_{e.id}': '60' for e in estudiantes}
+            }),
+            'registrar_asistencia': formulario({'estudiante': estudiantes[0].id, 'curso': curso.id, 'fecha': dia(3), 'estado': 'tardanza'}),
+            'pasar_lista': formulario({
+                'curso': curso.id, 'fecha': dia(4), **{f'estudiante_{e.id}': 'presente' for e in inscritos + [nuevo]}
+            }),
+        }
+
+    def test_todas_las_rutas_dentro_del_presupuesto(self):
+        mediciones = self.assertPresupuestoRutas(
+            parametros={'recurso': 'estudiantes'}, por_ruta=self.escrituras('-1', date(2025, 4, 1))
+        )
+        self.assertIn('indicadores:dashboard', mediciones)
+        self.assertIn('indicadores:estudiante-detail', mediciones)
+        self.assertEqual(mediciones['POST indicadores:calificacion-list']['duplicadas'], 0)
+        self.assertEqual(Asistencia.objects.filter(fecha=date(2025, 4, 5)).count(), 5)
+        self.assertEqual(Calificacion.objects.filter(evaluacion__nombre='Parcial-1', nota=Decimal('60')).count(), 4)
+        self.assertTrue(Evaluacion.objects.filter(nombre='Oral').exists())
+        self.assertEqual(resumenes.verificar(), [])
+
+        crear_datos(n_estudiantes=10, sufijo='-b')
+        self.assertPresupuestoRutas(parametros={'recurso': 'estudiantes'}, por_ruta=self.escrituras('-2', date(2025, 5, 1)))
+
+    def test_escrituras_sin_cuerpo_o_fallidas(self):
+        por_ruta = self.escrituras('-1', date(2025, 4, 1))
+        with self.assertRaisesMessage(AssertionError, 'indicadores:pasar_lista: atiende POST pero no hay una escritura'):
+            self.assertPresupuestoRutas(parametros={'recurso': 'x'}, por_ruta={**por_ruta, 'pasar_lista': {}})
+        with self.assertRaisesMessage(AssertionError, 'indicadores:grado-list: atiende POST pero no hay una escritura'):
+            self.assertPresupuestoRutas(parametros={'recurso': 'x'}, por_ruta={**por_ruta, 'grado-list': {}})
+        por_ruta = self.escrituras('-2', date(2025, 5, 1))
+        por_ruta['grado-list']['data'] = {}
+        with self.assertRaisesMessage(AssertionError, 'indicadores:grado-list: POST /api/grados/ respondió 400'):
+            self.assertPresupuestoRutas(parametros={'recurso': 'x'}, por_ruta=por_ruta)
+        # Los comodines de lectura no cubren las escrituras
+        self.assertIsNone(presupuesto_consultas.presupuesto('indicadores:pasar_lista', {'indicadores:*': 5}, 'POST'))
+        self.assertEqual(
+            presupuesto_consultas.presupuesto('indicadores:pasar_lista', {'POST indicadores:*': 20, '*': 5}, 'post'),
+            {'consultas': 20}
+        )
+
+    def test_rutas_sin_presupuesto_o_excedidas_fallan(self):
+        with self.assertRaisesMessage(AssertionError, 'indicadores:grado-list: sin presupuesto'):
+            self.assertPresupuestoRutas(parametros={'recurso': 'x'}, presupuestos={'indicadores:dashboard': 50})
+        with self.assertRaisesMessage(AssertionError, 'indicadores:cursos_list: GET /cursos/ consultas'):
+            self.assertPresupuestoRutas(parametros={'recurso': 'x'}, presupuestos={'*': 1})
+        # Un GET que responde un error se mide por su camino corto: no cuenta
+        with self.assertRaisesMessage(AssertionError, 'indicadores:estudiante-detail: GET /api/estudiantes/0/ respondió 404'):
+            self.assertPresupuestoRutas(parametros={'recurso': 'estudiantes'}, por_ruta={'estudiante-detail': {'pk': 0}})
+
+    def test_medicion_duplicadas_y_similares(self):
+        with presupuesto_consultas.medir_consultas() as medicion:
+            for curso in self.cursos + self.cursos[:1]:
+                list(Inscripcion.objects.filter(curso=curso))
+        self.assertEqual((medicion.total, medicion.duplicadas, medicion.similares), (3, 1, 2))
+        self.assertEqual(presupuesto_consultas.excesos(medicion, {'consultas': 2, 'duplicadas': 1}), ['consultas 3 > 2'])
+
+    @override_settings(
+        PRESUPUESTO_CONSULTAS_ACTIVO=True,
+        PRESUPUESTO_CONSULTAS={'indicadores:grado-list': 1, '*': 100},
+    )
+    def test_middleware(self):
+        self.client.logout()
+        with self.assertLogs('indicadores.presupuesto_consultas', 'WARNING') as logs:
+            response = self.client.get('/api/grados/')
+        self.assertEqual(response['X-DB-Consultas'], '2')
+        self.assertEqual(response['X-DB-Duplicadas'], '0')
+        self.assertEqual(response['X-DB-Presupuesto'], 'consultas=1')
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('GET /api/grados/ (indicadores:grado-list) excede', logs.output[0])
+        with override_settings(PRESUPUESTO_CONSULTAS_ESTRICTO=True):
+            with self.assertRaises(presupuesto_consultas.PresupuestoExcedido):
+                self.client.get('/api/grados/')
+        self.assertEqual(self.client.get('/api/cursos/')['X-DB-Consultas'], '2')
+        # El presupuesto de lectura de la ruta no se aplica a sus escrituras
+        self.assertNotIn('X-DB-Presupuesto', self.client.post('/api/grados/', {'nombre': 'X'}))
+
+        with override_settings(PRESUPUESTO_CONSULTAS_ACTIVO=False):
+            self.assertNotIn('X-DB-Consultas', self.client.get('/api/grados/'))
+
+
+class GenerarDatosTests(IndicadoresTestCase):
+    """generar_datos: datos reproducibles por semilla y derivados consistentes"""
+
+    def generar(self, **opciones):
+        call_command('generar_datos', reset=True, students=40, days=3, stdout=StringIO(), **opciones)
+        return list(Asistencia.objects.order_by('id').values_list(
+            'estudiante__ci', 'curso__seccion', 'fecha', 'estado'
+        )), list(Calificacion.objects.order_by('id').values_list('estudiante__ci', 'nota'))
+
+    def test_misma_semilla_mismos_datos(self):
+        crear_datos(n_estudiantes=2)
+        datos = self.generar(seed=7)
+        self.assertFalse(Estudiante.objects.filter(ci__startswith='CI').exists())
+        self.assertEqual(self.generar(seed=7), datos)
+        self.assertNotEqual(self.generar(seed=8), datos)
+
+        # 40 estudiantes en 6 grados de una sección, cada uno en 7 cursos
+        self.assertEqual(Curso.objects.count(), 42)
+        self.assertEqual(Inscripcion.objects.count(), 40 * 7)
+        self.assertEqual(Asistencia.objects.count(), 40 * 7 * 3)
+        self.assertEqual(Calificacion.objects.count(), 40 * 7 * 3)
+        self.assertEqual(EstudianteApoderado.objects.count(), 40)
+        self.assertEqual(resumenes.verificar(), [])
+        self.assertEqual(NotaFinal.objects.count(), 40 * 7)
+        self.assertEqual(busqueda.buscar('estudiante', '10000000'), [Estudiante.objects.get(ci='10000000').pk])
+
+    def test_sin_reset_no_duplica(self):
+        self.generar(seed=7)
+        call_command('generar_datos', students=40, days=3, seed=7, stdout=StringIO())
+        self.assertEqual(Evaluacion.objects.count(), 42 * 3)
+        self.assertEqual(Asistencia.objects.count(), 40 * 7 * 3)
+
+    def test_secciones_y_profesores(self):
+        self.assertEqual([generar_datos._seccion(i) for i in (0, 25, 26, 27, 702)], ['A', 'Z', 'AA', 'AB', 'AAA'])
+        # 31 estudiantes en 1° (i % 6 == 0): dos secciones; 7 cursos por asignatura, 2 profesores cada una
+        call_command('generar_datos', reset=True, students=6 * 30 + 1, days=1, batch=100, stdout=StringIO())
+        self.assertEqual(list(Curso.objects.filter(seccion='B').order_by().values_list('grado__nombre', flat=True).distinct()), ['1° Primaria'])
+        self.assertEqual(Curso.objects.count(), 7 * 7)
+        self.assertEqual(Profesor.objects.count(), 7 * 2)
+        self.assertEqual(Inscripcion.objects.filter(curso__seccion='B').count(), 7)
+        with self.assertRaisesMessage(CommandError, 'días hábiles'):
+            call_command('generar_datos', students=10, days=1000, stdout=StringIO())
+
+
+class MigracionesTests(TransactionTestCase):
+    """Las migraciones que crean tablas derivadas las llenan con los datos existentes"""
+
+    def migrar(self, migracion=None):
+        """Lleva la app a `migracion` (la última por defecto) y devuelve sus modelos históricos"""
+        executor = MigrationExecutor(connection)
+        destino = [('indicadores', migracion)] if migracion else executor.loader.graph.leaf_nodes('indicadores')
+        executor.migrate(destino)
+        executor.loader.build_graph()
+        return executor.loader.project_state(destino).apps
+
+    def tearDown(self):
+        self.migrar()
+        super().tearDown()
+
+    def crear_hechos(self, apps):
+        """Un curso con dos estudiantes, sus notas y asistencia, con los modelos históricos de `apps`"""
+        modelo = lambda nombre: apps.get_model('indicadores', nombre).objects
+        periodo = modelo('PeriodoAcademico').create(nombre='2025', fecha_inicio=date(2025, 2, 1), fecha_fin=date(2025, 7, 31))
+        curso = modelo('Curso').create(
+            grado=modelo('Grado').create(nombre='1°'),
+            asignatura=modelo('Asignatura').create(nombre='Matemática', codigo='MAT'),
+            profesor=modelo('Profesor').create(nombres='Ana', apellidos='Vega', email='ana@test.edu'),
+            periodo_academico=periodo,
+        )
+        evaluacion = modelo('Evaluacion').create(curso=curso, nombre='Examen', fecha=date(2025, 3, 1), ponderacion=Decimal('50'))
+        for i, (nota, estado) in enumerate([(Decimal('40.10'), 'ausente'), (Decimal('95.20'), 'presente')]):
+            estudiante = modelo('Estudiante').create(
+                nombres=f'Est{i}', apellidos='Paz', ci=f'CI{i}', fecha_nacimiento=date(2015, 1, 1)
+            )
+            modelo('Inscripcion').create(estudiante=estudiante, curso=curso)
+            modelo('Calificacion').create(evaluacion=evaluacion, estudiante=estudiante, nota=nota)
+            modelo('Asistencia').create(estudiante=estudiante, curso=curso, fecha=date(2025, 3, 3), estado=estado)
+        return curso
+
+    def test_resumenes(self):
+        curso = self.crear_hechos(self.migrar('0001_initial'))
+        self.migrar()
+        self.assertAlmostEqual(kpis.promedio_general(), Decimal('67.65'))
+        resumen = ResumenCurso.objects.get(curso_id=curso.pk)
+        self.assertEqual((resumen.total_notas, resumen.total_asistencias, resumen.total_ausencias), (2, 2, 1))
+        self.assertEqual(ResumenEstudiante.objects.count(), 2)
+        self.assertEqual(ResumenPeriodo.objects.get().suma_notas, Decimal('135.30'))
+
+    def test_rangos_de_notas(self):
+        curso = self.crear_hechos(self.migrar('0001_initial'))
+        self.migrar('0008_indices_opciones')
+        self.migrar()
+        resumen = ResumenCurso.objects.get(curso_id=curso.pk)
+        self.assertEqual((resumen.notas_excelentes, resumen.notas_insuficientes), (1, 1))
+        self.assertEqual(kpis.resumen_calificaciones()['aprobados'], 1)
+        self.assertEqual(resumenes.verificar(), [])
+
+    def test_resumenes_mensuales(self):
+        curso = self.crear_hechos(self.migrar('0002_resumenes_kpi'))
+        self.migrar()
+        # La asistencia de marzo de 2025; las notas, en el mes de su registro
+        marzo = ResumenMensualCurso.objects.get(curso_id=curso.pk, mes=date(2025, 3, 1))
+        self.assertEqual((marzo.total_asistencias, marzo.total_ausentes), (2, 1))
+        self.assertEqual(sum(mes['total_notas'] for mes in kpis.tendencia_mensual(date(2025, 1, 1))), 2)
+        mensuales = [d for d in resumenes.DIMENSIONES if 'mes' in d.claves]
+        self.assertEqual(resumenes.verificar(mensuales), [])
+
+    def test_indice_de_busqueda(self):
+        apps = self.migrar('0006_lotes_procesados')
+        estudiante = apps.get_model('indicadores', 'Estudiante').objects.create(
+            nombres='José', apellidos='Núñez', ci='7788', fecha_nacimiento=date(2015, 1, 1)
+        )
+        apps.get_model('indicadores', 'Profesor').objects.create(nombres='Ana', apellidos='Peña', email='ana@test.edu')
+        self.migrar()
+        self.assertEqual(busqueda.buscar('estudiante', 'nunez jo'), [estudiante.pk])
+        self.assertEqual(busqueda.buscar('estudiante', '778'), [estudiante.pk])
+        self.assertEqual(len(busqueda.buscar('profesor', 'pena')), 1)
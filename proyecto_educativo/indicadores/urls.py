@@ -24,7 +24,9 @@ router.register(r'estudiante-apoderado', views.EstudianteApoderadoViewSet)
 router.register(r'evaluaciones', views.EvaluacionViewSet)
 router.register(r'calificaciones', views.CalificacionViewSet)
 router.register(r'asistencia', views.AsistenciaViewSet)
+router.register(r'notas-finales', views.NotaFinalViewSet)
 router.register(r'dashboard', views.DashboardAPIViewSet, basename='dashboard')
+router.register(r'opciones', views.OpcionesAPIViewSet, basename='opciones')
 
 app_name = 'indicadores'
 
@@ -52,9 +54,11 @@ urlpatterns = [
     
     # Registro de Calificaciones
     path('registrar-calificacion/', views.registrar_calificacion_view, name='registrar_calificacion'),
+    path('planilla-calificaciones/', views.planilla_calificaciones_view, name='planilla_calificaciones'),
     
     # Registro de Asistencia
     path('registrar-asistencia/', views.registrar_asistencia_view, name='registrar_asistencia'),
+    path('pasar-lista/', views.pasar_lista_view, name='pasar_lista'),
     
     # Gestión de Apoderados
     path('apoderados/', views.apoderados_list_view, name='apoderados_list'),
@@ -4,7 +4,9 @@ Views para la API REST y Frontend de Indicadores Educativos
 """
 
 from django.shortcuts import render, redirect
-from django.db.models import Avg, Count, Q
+from django.urls import reverse
+from django.db.models import Count, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import datetime, timedelta
 
@@ -16,21 +18,174 @@ from django_filters.rest_framework import DjangoFilterBackend
 from .models import (
     Grado, Asignatura, PeriodoAcademico, Profesor, Estudiante, 
     Apoderado, Curso, Inscripcion, EstudianteApoderado, 
-    Evaluacion, Calificacion, Asistencia
+    Evaluacion, Calificacion, Asistencia, NotaFinal, LoteProcesado
 )
 
 from .serializers import (
     GradoSerializer, AsignaturaSerializer, PeriodoAcademicoSerializer,
     ProfesorSerializer, EstudianteSerializer, ApoderadoSerializer,
     CursoSerializer, InscripcionSerializer, EstudianteApoderadoSerializer,
-    EvaluacionSerializer, CalificacionSerializer, AsistenciaSerializer,
-    EstudianteConPromedioSerializer, CursoConEstadisticasSerializer
+    EvaluacionSerializer, CalificacionSerializer, CalificacionLoteSerializer,
+    AsistenciaSerializer, AsistenciaLoteSerializer, NotaFinalSerializer, EstudianteConPromedioSerializer, CursoConEstadisticasSerializer
 )
 
+from . import busqueda, exportaciones, kpis, listados, listas_rapidas, lotes, opciones, paginacion, plan_consultas
+from .cache_kpis import cachear_respuesta, obtener_o_calcular
+from .resumenes import expresion_promedio
+from .riesgo import calcular_estudiantes_riesgo
+
+# ============================================
+# PLAN DE CONSULTAS DE LOS VIEWSETS
+# ============================================
+
+def relaciones_curso(prefijo='curso'):
+    """Rutas select_related para serializar `<prefijo>.__str__` sin consultas extra"""
+    return [prefijo] + [f'{prefijo}__{relacion}' for relacion in Curso.RELACIONES_STR]
+
+class PlanConsultasMixin:
+    """
+    Aplica a `get_queryset()` las relaciones que recorre el serializer.
+    
+    Cada viewset declara `select_relaciones` (FK, un JOIN) y
+    `prefetch_relaciones` (relaciones inversas o M2M, una consulta extra),
+    de modo que el número de consultas no depende del tamaño de página.
+    Con ?fields= / ?omit= en list y retrieve solo se conservan las
+    relaciones y columnas (only()) que usan los campos pedidos.
+    """
+    select_relaciones = []
+    prefetch_relaciones = []
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select, prefetch = self.select_relaciones, self.prefetch_relaciones
+        campos = self.campos_dispersos()
+        if campos is not None:
+            modelo = queryset.model
+            select = plan_consultas.relaciones_necesarias(select, modelo, campos)
+            prefetch = plan_consultas.relaciones_necesarias(prefetch, modelo, campos)
+            columnas = plan_consultas.columnas_necesarias(modelo, campos, select)
+            if columnas is not None:
+                # Los campos de orden se leen para la paginación por clave
+                orden = [campo.lstrip('-') for campo in self.ordering or [] if '__' not in campo]
+                queryset = queryset.only(*columnas, *(c for c in orden if c not in columnas))
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+    
+    def campos_dispersos(self):
+        """Campos del serializer tras ?fields= / ?omit= (None si no se pidieron)"""
+        if getattr(self, 'action', None) not in ('list', 'retrieve'):
+            return None
+        if plan_consultas.campos_solicitados(self.request) == (None, None):
+            return None
+        return self.get_serializer().fields
+
+class ListaRapidaMixin:
+    """
+    Listado de solo lectura sin serializer por fila (ver listas_rapidas.py).
+    
+    Los viewsets que lo activan declaran `lista_rapida`; el JSON es idéntico
+    al del serializer. Detalle y escrituras siguen usando el serializer.
+    """
+    lista_rapida = None
+    
+    def list(self, request, *args, **kwargs):
+        # Con campos dispersos el serializer (con JOINs recortados) es más barato
+        if self.lista_rapida is None or self.campos_dispersos() is not None:
+            return super().list(request, *args, **kwargs)
+        filas = self.filter_queryset(self.get_queryset()).values(*self.lista_rapida.campos)
+        page = self.paginate_queryset(filas)
+        if page is not None:
+            return self.get_paginated_response(self.lista_rapida.construir(page))
+        return Response(self.lista_rapida.construir(list(filas)))
+
+class ExportacionMixin:
+    """
+    Acción `exportar`: todas las filas filtradas en CSV o NDJSON, en streaming.
+    
+    Acepta los mismos filtros y búsqueda que el listado y usa `lista_rapida`
+    para construir las filas (ver exportaciones.py).
+    """
+    
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """Exporta en streaming las filas filtradas (?formato=csv|ndjson)"""
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in exportaciones.FORMATOS:
+            return Response(
+                {'error': f"'formato' debe ser uno de {list(exportaciones.FORMATOS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.filter_queryset(self.get_queryset()).order_by(*self.ordering)
+        return exportaciones.respuesta_exportacion(
+            exportaciones.filas_exportacion(queryset, self.lista_rapida),
+            list(self.get_serializer().fields), formato, self.basename
+        )
+
+class BusquedaIndexadaFilter(filters.SearchFilter):
+    """
+    ?search= sobre el índice de búsqueda (busqueda.py) en lugar de icontains.
+    
+    Se aplica a los viewsets que declaran `tipo_busqueda`; cada palabra debe
+    ser prefijo de un nombre, apellido, CI o email de la persona.
+    """
+    
+    def filter_queryset(self, request, queryset, view):
+        tipo = getattr(view, 'tipo_busqueda', None)
+        if tipo is None:
+            return super().filter_queryset(request, queryset, view)
+        filas = busqueda.coincidencias(tipo, request.query_params.get(self.search_param, ''))
+        if filas is None:
+            return queryset
+        return queryset.filter(id__in=filas.values('objeto_id'))
+
+class AutocompletarMixin:
+    """Acción `autocompletar` sobre el índice de búsqueda (requiere `tipo_busqueda`)"""
+    tipo_busqueda = None
+    limite_autocompletar = 50
+    
+    @action(detail=False, methods=['get'])
+    def autocompletar(self, request):
+        """Personas que mejor coinciden con ?q= (mejor primero, ?limite= hasta 50)"""
+        try:
+            limite = max(1, min(int(request.query_params.get('limite', 10)), self.limite_autocompletar))
+        except ValueError:
+            return Response({'error': "'limite' debe ser un entero"}, status=status.HTTP_400_BAD_REQUEST)
+        ids = busqueda.buscar(self.tipo_busqueda, request.query_params.get('q', ''), limite)
+        objetos = self.get_queryset().order_by().in_bulk(ids)
+        return Response([{'id': pk, 'texto': str(objetos[pk])} for pk in ids if pk in objetos])
+
 # ============================================
 # VIEWSETS PARA API REST (Backend)
 # ============================================
 
+def _orden_anotado(request, permitidos, defecto):
+    """Campos de ?ordering= (separados por coma, con '-' opcional) validados contra `permitidos`"""
+    valor = request.query_params.get('ordering')
+    if not valor:
+        return list(defecto)
+    orden = [campo.strip() for campo in valor.split(',') if campo.strip()]
+    invalidos = [campo for campo in orden if campo.lstrip('-') not in permitidos]
+    if invalidos:
+        raise ValueError(f"No se puede ordenar por {', '.join(invalidos)}; use {', '.join(permitidos)}")
+    return orden
+
+def _rango_anotado(request, campo, nombre):
+    """Filtros ?<nombre>_min= y ?<nombre>_max= sobre un campo anotado"""
+    rango = {}
+    for sufijo, lookup in (('min', 'gte'), ('max', 'lte')):
+        parametro = f'{nombre}_{sufijo}'
+        valor = request.query_params.get(parametro)
+        if valor in (None, ''):
+            continue
+        try:
+            rango[f'{campo}__{lookup}'] = float(valor)
+        except ValueError:
+            raise ValueError(f"El parámetro '{parametro}' debe ser numérico")
+    return rango
+
 class GradoViewSet(viewsets.ModelViewSet):
     """API ViewSet para Grados"""
     queryset = Grado.objects.all()
@@ -56,43 +211,66 @@ class PeriodoAcademicoViewSet(viewsets.ModelViewSet):
     search_fields = ['nombre']
     ordering = ['-fecha_inicio']
 
-class ProfesorViewSet(viewsets.ModelViewSet):
+class ProfesorViewSet(AutocompletarMixin, viewsets.ModelViewSet):
     """API ViewSet para Profesores"""
     queryset = Profesor.objects.all()
     serializer_class = ProfesorSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, BusquedaIndexadaFilter]
     filterset_fields = ['activo', 'especialidad']
-    search_fields = ['nombres', 'apellidos', 'email']
+    tipo_busqueda = 'profesor'
     ordering = ['apellidos', 'nombres']
 
-class EstudianteViewSet(viewsets.ModelViewSet):
+CAMPOS_ORDEN_CON_PROMEDIO = ['promedio_general', 'total_evaluaciones', 'apellidos', 'nombres', 'ci']
+
+class EstudianteViewSet(AutocompletarMixin, viewsets.ModelViewSet):
     """API ViewSet para Estudiantes"""
     queryset = Estudiante.objects.all()
     serializer_class = EstudianteSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, BusquedaIndexadaFilter]
     filterset_fields = ['activo']
-    search_fields = ['nombres', 'apellidos', 'ci', 'email']
+    tipo_busqueda = 'estudiante'
     ordering = ['apellidos', 'nombres']
     
     @action(detail=False, methods=['get'])
     def con_promedio(self, request):
-        """Endpoint para estudiantes con promedio calculado"""
-        estudiantes = self.get_queryset()
-        serializer = EstudianteConPromedioSerializer(estudiantes, many=True)
-        return Response(serializer.data)
+        """
+        Estudiantes con promedio calculado (paginado).
+        
+        Promedio y total de evaluaciones se anotan desde ResumenEstudiante;
+        admite ?ordering= y ?promedio_min= / ?promedio_max=.
+        """
+        try:
+            orden = _orden_anotado(request, CAMPOS_ORDEN_CON_PROMEDIO, self.ordering)
+            rango = _rango_anotado(request, 'promedio_general', 'promedio')
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        estudiantes = self.filter_queryset(self.get_queryset()).annotate(
+            promedio_general=Coalesce(expresion_promedio('resumen__'), Value(0.0)),
+            total_evaluaciones=Coalesce('resumen__total_notas', 0)
+        ).filter(**rango).order_by(*orden, 'id')
+        page = self.paginate_queryset(estudiantes)
+        serializer = EstudianteConPromedioSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
 
-class ApoderadoViewSet(viewsets.ModelViewSet):
+class ApoderadoViewSet(AutocompletarMixin, viewsets.ModelViewSet):
     """API ViewSet para Apoderados"""
     queryset = Apoderado.objects.all()
     serializer_class = ApoderadoSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, BusquedaIndexadaFilter]
     filterset_fields = ['parentesco']
-    search_fields = ['nombres', 'apellidos', 'ci']
+    tipo_busqueda = 'apoderado'
     ordering = ['apellidos', 'nombres']
 
-class CursoViewSet(viewsets.ModelViewSet):
+CAMPOS_ORDEN_CON_ESTADISTICAS = [
+    'promedio_curso', 'total_estudiantes', 'total_evaluaciones',
+    'grado__nombre', 'asignatura__codigo', 'seccion'
+]
+
+class CursoViewSet(PlanConsultasMixin, viewsets.ModelViewSet):
     """API ViewSet para Cursos"""
-    queryset = Curso.objects.select_related('grado', 'asignatura', 'profesor', 'periodo_academico')
+    queryset = Curso.objects.all()
+    select_relaciones = Curso.RELACIONES_STR + ['periodo_academico']
     serializer_class = CursoSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['grado', 'asignatura', 'profesor', 'periodo_academico', 'seccion']
@@ -101,208 +279,381 @@ class CursoViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def con_estadisticas(self, request):
-        """Endpoint para cursos con estadísticas calculadas"""
-        cursos = self.get_queryset()
-        serializer = CursoConEstadisticasSerializer(cursos, many=True)
-        return Response(serializer.data)
+        """
+        Cursos con estadísticas calculadas (paginado).
+        
+        Inscritos, evaluaciones y promedio se anotan en la misma consulta
+        (ver kpis.anotar_estadisticas_cursos); admite ?ordering=.
+        """
+        try:
+            orden = _orden_anotado(request, CAMPOS_ORDEN_CON_ESTADISTICAS, self.ordering)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        cursos = kpis.anotar_estadisticas_cursos(
+            self.filter_queryset(self.get_queryset())
+        ).order_by(*orden, 'id')
+        page = self.paginate_queryset(cursos)
+        serializer = CursoConEstadisticasSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
 
-class InscripcionViewSet(viewsets.ModelViewSet):
+class InscripcionViewSet(ExportacionMixin, ListaRapidaMixin, PlanConsultasMixin, viewsets.ModelViewSet):
     """API ViewSet para Inscripciones"""
-    queryset = Inscripcion.objects.select_related('estudiante', 'curso')
+    queryset = Inscripcion.objects.all()
+    select_relaciones = ['estudiante'] + relaciones_curso()
     serializer_class = InscripcionSerializer
+    lista_rapida = listas_rapidas.INSCRIPCIONES
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['activa', 'curso', 'estudiante']
     search_fields = ['estudiante__nombres', 'estudiante__apellidos', 'estudiante__ci']
-    ordering = ['-fecha_inscripcion']
+    ordering = ['-fecha_inscripcion', 'id']
 
-class EstudianteApoderadoViewSet(viewsets.ModelViewSet):
+class EstudianteApoderadoViewSet(PlanConsultasMixin, viewsets.ModelViewSet):
     """API ViewSet para relación Estudiante-Apoderado"""
-    queryset = EstudianteApoderado.objects.select_related('estudiante', 'apoderado')
+    queryset = EstudianteApoderado.objects.order_by('id')
+    select_relaciones = ['estudiante', 'apoderado']
     serializer_class = EstudianteApoderadoSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['es_principal', 'activa', 'estudiante', 'apoderado']
     ordering = ['estudiante__apellidos']
 
-class EvaluacionViewSet(viewsets.ModelViewSet):
+class EvaluacionViewSet(PlanConsultasMixin, viewsets.ModelViewSet):
     """API ViewSet para Evaluaciones"""
-    queryset = Evaluacion.objects.select_related('curso')
+    queryset = Evaluacion.objects.all()
+    select_relaciones = relaciones_curso()
     serializer_class = EvaluacionSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['tipo', 'curso', 'fecha']
     search_fields = ['nombre', 'curso__asignatura__nombre']
     ordering = ['-fecha']
+    
+    @action(detail=True, methods=['get', 'post'])
+    def planilla(self, request, pk=None):
+        """
+        Planilla de notas de la evaluación.
+        
+        GET: estudiantes inscritos con su nota (null si no la tienen), en una
+        consulta. POST: lista de {estudiante, nota, observaciones?} que se
+        inserta o actualiza en lote (ver lotes.registrar_calificaciones).
+        """
+        evaluacion = self.get_object()
+        if request.method == 'POST':
+            if not isinstance(request.data, list):
+                return Response({'error': 'Se espera una lista de notas'}, status=status.HTTP_400_BAD_REQUEST)
+            serializer = CalificacionLoteSerializer(
+                data=[dict(item, evaluacion=evaluacion.id) if isinstance(item, dict) else item for item in request.data],
+                many=True, allow_empty=False, max_length=lotes.TAMANO_MAXIMO_LOTE
+            )
+            serializer.is_valid(raise_exception=True)
+            try:
+                return Response(lotes.registrar_calificaciones(serializer.validated_data))
+            except lotes.ErrorLote as e:
+                return Response(e.errores, status=status.HTTP_400_BAD_REQUEST)
+        
+        nota = CalificacionSerializer().fields['nota'].to_representation
+        return Response({
+            'evaluacion': evaluacion.id,
+            'evaluacion_nombre': evaluacion.nombre,
+            'curso_info': str(evaluacion.curso),
+            'estudiantes': [
+                {
+                    'estudiante': fila['id'],
+                    'estudiante_nombre': f"{fila['nombres']} {fila['apellidos']}",
+                    'estudiante_ci': fila['ci'],
+                    'nota': None if fila['nota'] is None else nota(fila['nota']),
+                    'observaciones': fila['observaciones'],
+                }
+                for fila in lotes.planilla_calificaciones(evaluacion)
+            ],
+        })
 
-class CalificacionViewSet(viewsets.ModelViewSet):
+class CalificacionViewSet(ExportacionMixin, ListaRapidaMixin, PlanConsultasMixin, viewsets.ModelViewSet):
     """API ViewSet para Calificaciones"""
-    queryset = Calificacion.objects.select_related('evaluacion', 'estudiante')
+    queryset = Calificacion.objects.all()
+    select_relaciones = ['estudiante'] + relaciones_curso('evaluacion__curso')
     serializer_class = CalificacionSerializer
+    lista_rapida = listas_rapidas.CALIFICACIONES
+    pagination_class = paginacion.PaginacionCalificaciones
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['evaluacion', 'estudiante', 'evaluacion__curso']
     search_fields = ['estudiante__nombres', 'estudiante__apellidos', 'evaluacion__nombre']
-    ordering = ['-fecha_registro']
+    ordering = ['-fecha_registro', 'id']
+    
+    def create(self, request, *args, **kwargs):
+        """Con una lista en el cuerpo crea todas las calificaciones en lote (ver lotes.py)"""
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        serializer = CalificacionLoteSerializer(
+            data=request.data, many=True, allow_empty=False, max_length=lotes.TAMANO_MAXIMO_LOTE
+        )
+        serializer.is_valid(raise_exception=True)
+        try:
+            ids = lotes.crear_calificaciones(serializer.validated_data)
+        except lotes.ErrorLote as e:
+            return Response(e.errores, status=status.HTTP_400_BAD_REQUEST)
+        filas = Calificacion.objects.filter(id__in=ids).order_by('id').values(*self.lista_rapida.campos)
+        return Response(self.lista_rapida.construir(list(filas)), status=status.HTTP_201_CREATED)
 
-class AsistenciaViewSet(viewsets.ModelViewSet):
+class AsistenciaViewSet(ExportacionMixin, ListaRapidaMixin, PlanConsultasMixin, viewsets.ModelViewSet):
     """API ViewSet para Asistencia"""
-    queryset = Asistencia.objects.select_related('estudiante', 'curso')
+    queryset = Asistencia.objects.all()
+    select_relaciones = ['estudiante'] + relaciones_curso()
     serializer_class = AsistenciaSerializer
+    lista_rapida = listas_rapidas.ASISTENCIA
+    pagination_class = paginacion.PaginacionAsistencia
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['estado', 'curso', 'estudiante', 'fecha']
     search_fields = ['estudiante__nombres', 'estudiante__apellidos']
-    ordering = ['-fecha']
+    ordering = ['-fecha', 'id']
+    
+    @action(detail=False, methods=['post'])
+    def lote(self, request):
+        """
+        Upsert idempotente de una lista de registros por (estudiante, curso, fecha).
+        
+        Con la cabecera Idempotency-Key, un reintento del mismo lote devuelve
+        el resultado original sin escribir (Idempotent-Replayed: true).
+        """
+        serializer = AsistenciaLoteSerializer(
+            data=request.data, many=True, allow_empty=False, max_length=lotes.TAMANO_MAXIMO_LOTE
+        )
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data
+        clave = request.headers.get('Idempotency-Key')
+        if clave and len(clave) > LoteProcesado._meta.get_field('clave').max_length:
+            return Response({'error': 'Idempotency-Key demasiado larga'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            if clave:
+                resultado, repetido = lotes.procesar_una_vez(
+                    'asistencia', clave, items, lambda: lotes.registrar_asistencia(items)
+                )
+            else:
+                resultado, repetido = lotes.registrar_asistencia(items), False
+        except lotes.ErrorLote as e:
+            return Response(e.errores, status=status.HTTP_400_BAD_REQUEST)
+        except lotes.ClaveReutilizada:
+            return Response(
+                {'error': 'La clave de idempotencia ya se usó con otro lote'},
+                status=status.HTTP_409_CONFLICT
+            )
+        response = Response(resultado)
+        if repetido:
+            response['Idempotent-Replayed'] = 'true'
+        return response
+
+class NotaFinalViewSet(PlanConsultasMixin, viewsets.ReadOnlyModelViewSet):
+    """API ViewSet para Notas Finales ponderadas (recalculables en lote)"""
+    queryset = NotaFinal.objects.all()
+    select_relaciones = ['estudiante', 'curso__grado', 'curso__asignatura']
+    serializer_class = NotaFinalSerializer
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_fields = ['curso', 'estudiante', 'curso__periodo_academico', 'curso__grado']
+    search_fields = ['estudiante__nombres', 'estudiante__apellidos', 'estudiante__ci']
+    ordering = ['curso', '-nota_final']
+    
+    @action(detail=False, methods=['post'])
+    def recalcular(self, request):
+        """Recalcula en lote las notas finales de un período (opcional: curso, grado, faltantes)"""
+        from .notas_finales import FALTANTES, refrescar_notas_finales
+        
+        try:
+            filtros = _filtros_dashboard(request, ['periodo', 'curso', 'grado'])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if 'periodo' not in filtros:
+            return Response({'error': "El parámetro 'periodo' es obligatorio"}, status=status.HTTP_400_BAD_REQUEST)
+        faltantes = request.query_params.get('faltantes', 'cero')
+        if faltantes not in FALTANTES:
+            return Response({'error': f"'faltantes' debe ser uno de {FALTANTES}"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        total = refrescar_notas_finales(faltantes=faltantes, **filtros)
+        return Response({'notas_finales': total})
 
 # ============================================
 # VIEWS PARA DASHBOARD Y KPIs
 # ============================================
 
+def _filtros_dashboard(request, nombres):
+    """Lee filtros numéricos opcionales (ids) desde los query params"""
+    filtros = {}
+    for nombre in nombres:
+        valor = request.query_params.get(nombre)
+        if valor in (None, ''):
+            continue
+        try:
+            filtros[nombre] = int(valor)
+        except ValueError:
+            raise ValueError(f"El parámetro '{nombre}' debe ser un id numérico")
+    return filtros
+
 class DashboardAPIViewSet(viewsets.ViewSet):
-    """API especializada para KPIs del Dashboard"""
+    """API especializada para KPIs del Dashboard (respuestas en caché versionada)"""
     
     @action(detail=False, methods=['get'])
+    @cachear_respuesta('kpis_generales')
     def kpis_generales(self, request):
         """KPIs generales del sistema"""
-        data = {
-            'total_estudiantes': Estudiante.objects.filter(activo=True).count(),
-            'total_profesores': Profesor.objects.filter(activo=True).count(),
-            'total_cursos': Curso.objects.count(),
-            'total_evaluaciones': Evaluacion.objects.count(),
-            'promedio_general': Calificacion.objects.aggregate(Avg('nota'))['nota__avg'] or 0,
-        }
+        data = kpis.totales_generales()
+        data['promedio_general'] = kpis.promedio_general() or 0
         return Response(data)
     
     @action(detail=False, methods=['get'])
+    @cachear_respuesta('estudiantes_riesgo')
     def estudiantes_riesgo(self, request):
-        """Estudiantes en riesgo académico"""
+        """Estudiantes en riesgo académico (filtros opcionales: periodo, grado, curso)"""
         # Estudiantes con promedio < 60 o ausentismo > 20%
-        estudiantes_riesgo = []
+        try:
+            filtros = _filtros_dashboard(request, ['periodo', 'grado', 'curso'])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        for estudiante in Estudiante.objects.filter(activo=True):
-            # Calcular promedio
-            calificaciones = Calificacion.objects.filter(estudiante=estudiante)
-            if calificaciones.exists():
-                promedio = calificaciones.aggregate(Avg('nota'))['nota__avg']
-                
-                # Calcular ausentismo
-                total_asistencias = Asistencia.objects.filter(estudiante=estudiante).count()
-                ausencias = Asistencia.objects.filter(
-                    estudiante=estudiante, 
-                    estado__in=['ausente', 'tardanza']
-                ).count()
-                
-                porcentaje_ausentismo = (ausencias / total_asistencias * 100) if total_asistencias > 0 else 0
-                
-                # Determinar nivel de riesgo
-                if promedio < 60 or porcentaje_ausentismo > 20:
-                    nivel = 'ALTO' if (promedio < 50 or porcentaje_ausentismo > 30) else 'MEDIO'
-                    estudiantes_riesgo.append({
-                        'id': estudiante.id,
-                        'nombre_completo': estudiante.nombre_completo,
-                        'ci': estudiante.ci,
-                        'promedio': round(promedio, 2),
-                        'ausentismo': round(porcentaje_ausentismo, 2),
-                        'nivel_riesgo': nivel
-                    })
-        
-        return Response(estudiantes_riesgo)
+        return Response(calcular_estudiantes_riesgo(**filtros))
     
     @action(detail=False, methods=['get'])
+    @cachear_respuesta('promedio_por_curso')
     def promedio_por_curso(self, request):
-        """Promedio de notas por curso"""
-        cursos_data = []
-        
-        for curso in Curso.objects.all():
-            evaluaciones = Evaluacion.objects.filter(curso=curso)
-            if evaluaciones.exists():
-                promedio = Calificacion.objects.filter(
-                    evaluacion__in=evaluaciones
-                ).aggregate(Avg('nota'))['nota__avg']
-                
-                cursos_data.append({
-                    'curso_id': curso.id,
-                    'grado': curso.grado.nombre,
-                    'asignatura': curso.asignatura.nombre,
-                    'seccion': curso.seccion,
-                    'profesor': curso.profesor.nombre_completo,
-                    'promedio': round(promedio, 2) if promedio else 0,
-                    'total_estudiantes': curso.inscripcion_set.filter(activa=True).count()
-                })
+        """Promedio de notas por curso (filtros opcionales: periodo, grado; paginado con ?page=)"""
+        try:
+            filtros = _filtros_dashboard(request, ['periodo', 'grado'])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response(cursos_data)
+        return self._respuesta_cursos(
+            request, kpis.promedio_por_curso(**filtros), kpis.formatear_promedio_curso
+        )
     
     @action(detail=False, methods=['get'])
+    @cachear_respuesta('ausentismo_por_curso')
     def ausentismo_por_curso(self, request):
-        """Tasa de ausentismo por curso"""
-        ausentismo_data = []
+        """Tasa de ausentismo por curso (filtros opcionales: periodo, grado; paginado con ?page=)"""
+        try:
+            filtros = _filtros_dashboard(request, ['periodo', 'grado'])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        for curso in Curso.objects.all():
-            total_registros = Asistencia.objects.filter(curso=curso).count()
-            ausencias = Asistencia.objects.filter(
-                curso=curso, 
-                estado__in=['ausente', 'tardanza']
-            ).count()
-            
-            porcentaje_ausentismo = (ausencias / total_registros * 100) if total_registros > 0 else 0
-            
-            ausentismo_data.append({
-                'curso_id': curso.id,
-                'grado': curso.grado.nombre,
-                'asignatura': curso.asignatura.nombre,
-                'seccion': curso.seccion,
-                'total_registros': total_registros,
-                'ausencias': ausencias,
-                'porcentaje_ausentismo': round(porcentaje_ausentismo, 2)
-            })
+        return self._respuesta_cursos(
+            request, kpis.ausentismo_por_curso(**filtros), kpis.formatear_ausentismo_curso
+        )
+    
+    @action(detail=False, methods=['get'])
+    @cachear_respuesta('tendencia_mensual')
+    def tendencia_mensual(self, request):
+        """Promedio y ausentismo por mes (parámetros opcionales: meses, grado, curso)"""
+        try:
+            filtros = _filtros_dashboard(request, ['grado', 'curso', 'meses'])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response(ausentismo_data)
+        meses = filtros.pop('meses', 6)
+        desde = timezone.localdate() - timedelta(days=30 * meses)
+        data = [
+            {
+                'mes': item['mes'].strftime('%Y-%m'),
+                'promedio': round(item['promedio'], 2) if item['promedio'] is not None else None,
+                'total_notas': item['total_notas'],
+                'total_asistencias': item['total_asistencias'],
+                'porcentaje_ausentismo': round(item['porcentaje_ausentismo'], 2),
+            }
+            for item in kpis.tendencia_mensual(desde, **filtros)
+        ]
+        return Response(data)
+    
+    def _respuesta_cursos(self, request, queryset, formatear):
+        """Lista completa, o página de resultados si se envía ?page="""
+        if 'page' not in request.query_params:
+            return Response([formatear(fila) for fila in queryset])
+        
+        paginator = paginacion.PaginacionConteoAproximado()
+        pagina = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response([formatear(fila) for fila in pagina])
+
+class OpcionesAPIViewSet(viewsets.ViewSet):
+    """
+    Opciones de los selects remotos de los formularios (widgets.SelectRemoto)
+
+    GET /api/opciones/<recurso>/?q=&cursor= devuelve {next, previous,
+    results: [{id, texto}]} con paginación keyset en el orden del recurso
+    (ver opciones.py); ?page_size= hasta 50.
+    """
+    lookup_field = 'recurso'
+    lookup_value_regex = '[a-z]+'
+
+    def list(self, request):
+        """Recursos disponibles y su URL"""
+        return Response({
+            recurso: reverse('indicadores:opciones-detail', args=[recurso])
+            for recurso in opciones.RECURSOS
+        })
+
+    def retrieve(self, request, recurso=None):
+        if recurso not in opciones.RECURSOS:
+            return Response({'error': f"Recurso desconocido: '{recurso}'"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            queryset = opciones.opciones(recurso, request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = paginacion.PaginacionKeyset()
+        paginator.ordering = opciones.RECURSOS[recurso].orden
+        paginator.max_page_size = opciones.MAXIMO_POR_PAGINA
+        pagina = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response([{'id': objeto.pk, 'texto': str(objeto)} for objeto in pagina])
 
 # ============================================
 # VIEWS PARA FRONTEND DJANGO (Templates)
 # ============================================
 
 def dashboard_view(request):
-    """Vista principal del dashboard con KPIs mejorados"""
-    from django.db.models import Avg, Count, Q, Case, When, IntegerField
+    """
+    Vista principal del dashboard con KPIs mejorados
+    
+    El contexto se sirve desde la caché versionada de KPIs (`?refrescar=1`
+    fuerza el recálculo). Al calcularlo se ejecutan como máximo
+    `kpis.DASHBOARD_MAX_CONSULTAS` consultas, sin importar el volumen de
+    calificaciones, asistencias o estudiantes (verificado en tests.py).
+    """
+    context = obtener_o_calcular('dashboard', request, _contexto_dashboard)
+    return render(request, 'dashboard/index.html', context)
+
+def _contexto_dashboard():
+    """Calcula el contexto del dashboard con listas ya evaluadas (cacheables)"""
+    from django.db.models import (
+        Count, IntegerField, FloatField, F, Sum, OuterRef, Subquery, ExpressionWrapper
+    )
+    from django.db.models.functions import Cast, Coalesce
     import json
     from datetime import date, timedelta
-    from django.db.models.functions import TruncMonth
     
     # ============================================
     # ESTADÍSTICAS GENERALES
     # ============================================
-    total_estudiantes = Estudiante.objects.filter(activo=True).count()
-    total_profesores = Profesor.objects.filter(activo=True).count()
-    total_cursos = Curso.objects.count()
-    total_evaluaciones = Evaluacion.objects.count()
+    # Totales en una consulta
+    totales = kpis.totales_generales()
     
-    # Promedio general de calificaciones
-    promedio_general = Calificacion.objects.aggregate(Avg('nota'))['nota__avg']
+    # Promedio, aprobación y distribución de notas en una sola pasada
+    calificaciones = kpis.resumen_calificaciones()
+    promedio_general = calificaciones['promedio']
     
     # ============================================
     # NUEVO KPI: TASA DE APROBACIÓN
     # ============================================
-    total_calificaciones = Calificacion.objects.count()
-    aprobados = Calificacion.objects.filter(nota__gte=51).count()
-    tasa_aprobacion = round((aprobados / total_calificaciones * 100), 1) if total_calificaciones > 0 else 0
+    tasa_aprobacion = calificaciones['tasa_aprobacion']
     
     # ============================================
     # NUEVO KPI: TOP 5 ESTUDIANTES
     # ============================================
     top_estudiantes = Estudiante.objects.filter(
         activo=True,
-        calificacion__isnull=False
+        resumen__total_notas__gte=3
     ).annotate(
-        promedio=Avg('calificacion__nota'),
-        total_notas=Count('calificacion')
-    ).filter(total_notas__gte=3).order_by('-promedio')[:5]
+        promedio=expresion_promedio('resumen__'),
+        total_notas=F('resumen__total_notas')
+    ).order_by('-promedio')[:5]
     
     # ============================================
     # NUEVO KPI: DISTRIBUCIÓN DE NOTAS
     # ============================================
-    distribucion_notas = {
-        'excelente': Calificacion.objects.filter(nota__gte=90).count(),
-        'bueno': Calificacion.objects.filter(nota__gte=70, nota__lt=90).count(),
-        'regular': Calificacion.objects.filter(nota__gte=51, nota__lt=70).count(),
-        'insuficiente': Calificacion.objects.filter(nota__lt=51).count(),
-    }
+    distribucion_notas = {rango: calificaciones[rango] for rango in kpis.RANGOS_NOTAS}
     
     distribucion_notas_json = json.dumps({
         'labels': ['Excelente (90-100)', 'Bueno (70-89)', 'Regular (51-69)', 'Insuficiente (0-50)'],
@@ -317,15 +668,10 @@ def dashboard_view(request):
     # ============================================
     # NUEVO KPI: TENDENCIA MENSUAL
     # ============================================
-    # Últimos 6 meses de promedios
+    # Últimos 6 meses, leídos de ResumenMensual (una fila por mes)
     fecha_inicio = date.today() - timedelta(days=180)
-    tendencia_mensual = Calificacion.objects.filter(
-        fecha_registro__gte=fecha_inicio
-    ).annotate(
-        mes=TruncMonth('fecha_registro')
-    ).values('mes').annotate(
-        promedio=Avg('nota')
-    ).order_by('mes')
+    meses = kpis.tendencia_mensual(fecha_inicio)
+    tendencia_mensual = [item for item in meses if item['promedio'] is not None]
     
     tendencia_mensual_json = json.dumps({
         'labels': [item['mes'].strftime('%B %Y') for item in tendencia_mensual],
@@ -335,30 +681,29 @@ def dashboard_view(request):
     # ============================================
     # NUEVO KPI: AUSENTISMO MENSUAL
     # ============================================
-    ausentismo_mensual = Asistencia.objects.filter(
-        fecha__gte=fecha_inicio
-    ).annotate(
-        mes=TruncMonth('fecha')
-    ).values('mes').annotate(
-        total=Count('id'),
-        ausentes=Count(Case(When(estado='ausente', then=1), output_field=IntegerField()))
-    ).order_by('mes')
+    ausentismo_mensual = [item for item in meses if item['total_asistencias'] > 0]
     
     ausentismo_mensual_json = json.dumps({
         'labels': [item['mes'].strftime('%B %Y') for item in ausentismo_mensual],
-        'data': [round((item['ausentes'] / item['total'] * 100), 1) if item['total'] > 0 else 0 
-                 for item in ausentismo_mensual]
+        'data': [round(item['porcentaje_ausentes'], 1) for item in ausentismo_mensual]
     })
     
     # ============================================
     # NUEVO KPI: PROFESORES DESTACADOS
     # ============================================
+    inscripciones_profesor = Inscripcion.objects.filter(
+        curso__profesor=OuterRef('pk')
+    ).order_by().values('curso__profesor').annotate(total=Count('id')).values('total')
+    
     profesores_destacados = Profesor.objects.filter(
         activo=True,
-        curso__evaluacion__calificacion__isnull=False
+        curso__resumen__total_notas__gt=0
     ).annotate(
-        promedio_curso=Avg('curso__evaluacion__calificacion__nota'),
-        total_estudiantes=Count('curso__inscripcion', distinct=True)
+        promedio_curso=ExpressionWrapper(
+            Cast(Sum('curso__resumen__suma_notas'), FloatField()) / Sum('curso__resumen__total_notas'),
+            output_field=FloatField()
+        ),
+        total_estudiantes=Coalesce(Subquery(inscripciones_profesor, output_field=IntegerField()), 0)
     ).order_by('-promedio_curso')[:5]
     
     # ============================================
@@ -373,9 +718,9 @@ def dashboard_view(request):
     # ============================================
     estudiantes_riesgo = Estudiante.objects.filter(
         activo=True,
-        calificacion__isnull=False
+        resumen__total_notas__gt=0
     ).annotate(
-        promedio=Avg('calificacion__nota')
+        promedio=expresion_promedio('resumen__')
     ).filter(promedio__lt=51).order_by('promedio')[:5]
     
     # ============================================
@@ -385,13 +730,15 @@ def dashboard_view(request):
     evaluaciones_proximas = Evaluacion.objects.filter(
         fecha__gte=date.today(),
         fecha__lte=fecha_fin
-    ).select_related('curso', 'curso__asignatura', 'curso__grado').order_by('fecha')[:5]
+    ).select_related(
+        'curso', 'curso__asignatura', 'curso__grado', 'curso__profesor'
+    ).order_by('fecha')[:5]
     
     # ============================================
     # GRÁFICO: PROMEDIOS POR CURSO
     # ============================================
-    promedios_cursos = Curso.objects.annotate(
-        promedio=Avg('evaluacion__calificacion__nota')
+    promedios_cursos = Curso.objects.select_related('grado', 'asignatura').annotate(
+        promedio=expresion_promedio('resumen__')
     ).filter(promedio__isnull=False).order_by('-promedio')[:10]
     
     promedios_cursos_json = json.dumps({
@@ -402,38 +749,34 @@ def dashboard_view(request):
     # ============================================
     # GRÁFICO: DISTRIBUCIÓN ASISTENCIA HOY
     # ============================================
-    asistencia_stats = Asistencia.objects.filter(
-        fecha=date.today()
-    ).values('estado').annotate(total=Count('id'))
-    
-    asistencia_dict = {item['estado']: item['total'] for item in asistencia_stats}
+    asistencia_dict = kpis.distribucion_asistencia(date.today())
     asistencia_data_json = json.dumps({
         'labels': ['Presente', 'Ausente', 'Tardanza', 'Justificada'],
         'data': [
-            asistencia_dict.get('presente', 0),
-            asistencia_dict.get('ausente', 0),
-            asistencia_dict.get('tardanza', 0),
-            asistencia_dict.get('justificada', 0),
+            asistencia_dict['presente'],
+            asistencia_dict['ausente'],
+            asistencia_dict['tardanza'],
+            asistencia_dict['justificada'],
         ]
     })
     
-    context = {
+    return {
         'title': 'Dashboard de Indicadores Educativos',
         # KPIs básicos
-        'total_estudiantes': total_estudiantes,
-        'total_profesores': total_profesores,
-        'total_cursos': total_cursos,
-        'total_evaluaciones': total_evaluaciones,
+        'total_estudiantes': totales['total_estudiantes'],
+        'total_profesores': totales['total_profesores'],
+        'total_cursos': totales['total_cursos'],
+        'total_evaluaciones': totales['total_evaluaciones'],
         'promedio_general': promedio_general,
         # Nuevos KPIs
         'tasa_aprobacion': tasa_aprobacion,
-        'top_estudiantes': top_estudiantes,
+        'top_estudiantes': list(top_estudiantes),
         'distribucion_notas': distribucion_notas,
-        'profesores_destacados': profesores_destacados,
-        'evaluaciones_proximas': evaluaciones_proximas,
+        'profesores_destacados': list(profesores_destacados),
+        'evaluaciones_proximas': list(evaluaciones_proximas),
         # Tablas
-        'calificaciones_recientes': calificaciones_recientes,
-        'estudiantes_riesgo': estudiantes_riesgo,
+        'calificaciones_recientes': list(calificaciones_recientes),
+        'estudiantes_riesgo': list(estudiantes_riesgo),
         # JSON para gráficos
         'promedios_cursos_json': promedios_cursos_json,
         'asistencia_data_json': asistencia_data_json,
@@ -441,10 +784,9 @@ def dashboard_view(request):
         'tendencia_mensual_json': tendencia_mensual_json,
         'ausentismo_mensual_json': ausentismo_mensual_json,
     }
-    return render(request, 'dashboard/index.html', context)
 
 def estudiantes_list_view(request):
-    """Vista para listar y registrar estudiantes"""
+    """Vista para listar (paginado, ?q=, ?curso=, ?orden=) y registrar estudiantes"""
     from .forms import EstudianteForm
     from django.contrib import messages
     
@@ -457,9 +799,18 @@ def estudiantes_list_view(request):
     else:
         form = EstudianteForm()
     
-    estudiantes = Estudiante.objects.filter(activo=True).order_by('apellidos', 'nombres')
+    listado = listados.Listado(
+        request, Estudiante.objects.filter(activo=True),
+        ordenes={
+            'apellidos': ['apellidos', 'nombres', 'id'],
+            'ci': ['ci'],
+            'fecha_nacimiento': ['fecha_nacimiento', 'id'],
+        },
+        filtrar=opciones.RECURSOS['estudiantes'].filtrar,
+    )
     return render(request, 'estudiantes/list.html', {
-        'estudiantes': estudiantes,
+        'estudiantes': listado.pagina,
+        'listado': listado,
         'form': form
     })
 
@@ -487,6 +838,52 @@ def registrar_calificacion_view(request):
         'ultimas_calificaciones': ultimas_calificaciones
     })
 
+def planilla_calificaciones_view(request):
+    """
+    Vista de planilla: todas las notas de una evaluación en una sola página
+    
+    Carga estudiantes inscritos y notas existentes en una consulta y guarda
+    la planilla completa con un único upsert (`lotes.registrar_calificaciones`),
+    validando inscripciones y duplicados para todo el lote a la vez.
+    """
+    from .forms import PlanillaCalificacionesForm
+    from django.contrib import messages
+    from urllib.parse import urlencode
+    
+    datos = request.POST if request.method == 'POST' else request.GET
+    evaluacion = None
+    if datos.get('evaluacion', '').isdigit():
+        evaluacion = Evaluacion.objects.select_related(
+            *relaciones_curso()
+        ).filter(pk=datos['evaluacion']).first()
+    
+    if request.method == 'POST':
+        form = PlanillaCalificacionesForm(request.POST, evaluacion=evaluacion)
+        if form.is_valid():
+            registros = form.registros()
+            if not registros:
+                messages.info(request, 'No se ingresó ninguna nota.')
+            else:
+                try:
+                    resultado = lotes.registrar_calificaciones(registros)
+                except lotes.ErrorLote:
+                    messages.error(request, 'Las inscripciones del curso cambiaron; revise la planilla y vuelva a guardar.')
+                else:
+                    messages.success(
+                        request,
+                        f"Planilla guardada: {resultado['insertadas']} notas nuevas, "
+                        f"{resultado['actualizadas']} modificadas, {resultado['sin_cambios']} sin cambios."
+                    )
+            consulta = urlencode({'evaluacion': form.cleaned_data['evaluacion'].id})
+            return redirect(f"{reverse('indicadores:planilla_calificaciones')}?{consulta}")
+    else:
+        form = PlanillaCalificacionesForm(evaluacion=evaluacion, initial={'evaluacion': evaluacion})
+    
+    return render(request, 'calificaciones/planilla.html', {
+        'form': form,
+        'evaluacion': evaluacion,
+    })
+
 def registrar_asistencia_view(request):
     """Vista para registrar asistencia"""
     from .forms import AsistenciaForm
@@ -521,12 +918,60 @@ def registrar_asistencia_view(request):
         'resumen_hoy': resumen_data if sum(resumen_data.values()) > 0 else None
     })
 
+def pasar_lista_view(request):
+    """
+    Vista para pasar lista a todo un curso en una fecha
+    
+    Usa AsistenciaMasivaForm (un estado por estudiante inscrito, precargado
+    con lo ya registrado ese día) y guarda la lista completa con un único
+    upsert (`lotes.registrar_asistencia`), así el número de consultas no
+    depende del tamaño del curso.
+    """
+    from .forms import AsistenciaMasivaForm
+    from django.contrib import messages
+    from django.utils.dateparse import parse_date
+    from urllib.parse import urlencode
+    
+    datos = request.POST if request.method == 'POST' else request.GET
+    curso = None
+    if datos.get('curso', '').isdigit():
+        curso = Curso.objects.select_related(*Curso.RELACIONES_STR).filter(pk=datos['curso']).first()
+    try:
+        fecha = parse_date(datos.get('fecha', '')) or timezone.localdate()
+    except ValueError:
+        fecha = timezone.localdate()
+    
+    if request.method == 'POST':
+        form = AsistenciaMasivaForm(request.POST, curso=curso, fecha=fecha)
+        if form.is_valid():
+            try:
+                resultado = lotes.registrar_asistencia(form.registros())
+            except lotes.ErrorLote:
+                # Algún estudiante dejó de estar inscrito mientras se pasaba lista
+                messages.error(request, 'La lista cambió mientras se editaba; revísela y vuelva a guardar.')
+            else:
+                messages.success(
+                    request,
+                    f"Asistencia guardada: {resultado['insertadas']} nuevos, "
+                    f"{resultado['actualizadas']} modificados, {resultado['sin_cambios']} sin cambios."
+                )
+            consulta = urlencode({'curso': form.cleaned_data['curso'].id, 'fecha': form.cleaned_data['fecha']})
+            return redirect(f"{reverse('indicadores:pasar_lista')}?{consulta}")
+    else:
+        form = AsistenciaMasivaForm(curso=curso, fecha=fecha, initial={'curso': curso, 'fecha': fecha})
+    
+    return render(request, 'asistencia/pasar_lista.html', {
+        'form': form,
+        'curso': curso,
+        'fecha': fecha,
+    })
+
 # ============================================
 # NUEVAS VIEWS PARA FORMULARIOS FALTANTES
 # ============================================
 
 def profesores_list_view(request):
-    """Vista para listar y registrar profesores"""
+    """Vista para listar (paginado, ?q=, ?orden=) y registrar profesores"""
     from .forms import ProfesorForm
     from django.contrib import messages
     
@@ -539,14 +984,24 @@ def profesores_list_view(request):
     else:
         form = ProfesorForm()
     
-    profesores = Profesor.objects.filter(activo=True).order_by('apellidos', 'nombres')
+    # El filtro de opciones remotas ya limita a profesores activos
+    listado = listados.Listado(
+        request, Profesor.objects.all(),
+        ordenes={
+            'apellidos': ['apellidos', 'nombres', 'id'],
+            'nombres': ['nombres', 'apellidos', 'id'],
+            'especialidad': ['especialidad', 'apellidos', 'id'],
+        },
+        filtrar=opciones.RECURSOS['profesores'].filtrar,
+    )
     return render(request, 'profesores/list.html', {
-        'profesores': profesores,
+        'profesores': listado.pagina,
+        'listado': listado,
         'form': form
     })
 
 def cursos_list_view(request):
-    """Vista para listar y crear cursos"""
+    """Vista para listar (paginado, ?q=, ?periodo=, ?orden=) y crear cursos"""
     from .forms import CursoForm
     from django.contrib import messages
     
@@ -561,10 +1016,21 @@ def cursos_list_view(request):
     
     cursos = Curso.objects.select_related(
         'grado', 'asignatura', 'profesor', 'periodo_academico'
-    ).order_by('grado__nombre', 'asignatura__codigo')
+    ).annotate(alumnos=listados.conteo_relacionado(Inscripcion.objects.all(), 'curso'))
+    listado = listados.Listado(
+        request, cursos,
+        ordenes={
+            'grado': ['grado__nombre', 'asignatura__codigo', 'seccion', 'id'],
+            'asignatura': ['asignatura__nombre', 'grado__nombre', 'id'],
+            'periodo': ['-periodo_academico__fecha_inicio', 'grado__nombre', 'id'],
+            'alumnos': ['-alumnos', 'id'],
+        },
+        filtrar=opciones.RECURSOS['cursos'].filtrar,
+    )
     
     return render(request, 'cursos/list.html', {
-        'cursos': cursos,
+        'cursos': listado.pagina,
+        'listado': listado,
         'form': form
     })
 
@@ -592,7 +1058,7 @@ def inscripciones_list_view(request):
     })
 
 def evaluaciones_list_view(request):
-    """Vista para listar y crear evaluaciones"""
+    """Vista para listar (paginado, ?q=, ?curso=, ?orden=) y crear evaluaciones"""
     from .forms import EvaluacionForm
     from django.contrib import messages
     
@@ -607,15 +1073,25 @@ def evaluaciones_list_view(request):
     
     evaluaciones = Evaluacion.objects.select_related(
         'curso', 'curso__asignatura', 'curso__grado', 'curso__profesor'
-    ).order_by('-fecha')[:30]
+    ).annotate(calificaciones=listados.conteo_relacionado(Calificacion.objects.all(), 'evaluacion'))
+    listado = listados.Listado(
+        request, evaluaciones,
+        ordenes={
+            'fecha': ['-fecha', '-id'],
+            'nombre': ['nombre', 'id'],
+            'calificaciones': ['-calificaciones', 'id'],
+        },
+        filtrar=opciones.RECURSOS['evaluaciones'].filtrar,
+    )
     
     return render(request, 'evaluaciones/list.html', {
-        'evaluaciones': evaluaciones,
+        'evaluaciones': listado.pagina,
+        'listado': listado,
         'form': form
     })
 
 def apoderados_list_view(request):
-    """Vista para listar y registrar apoderados"""
+    """Vista para listar (paginado, ?q=, ?orden=) y registrar apoderados"""
     from .forms import ApoderadoForm
     from django.contrib import messages
     
@@ -628,9 +1104,21 @@ def apoderados_list_view(request):
     else:
         form = ApoderadoForm()
     
-    apoderados = Apoderado.objects.all().order_by('apellidos', 'nombres')
+    apoderados = Apoderado.objects.annotate(
+        estudiantes=listados.conteo_relacionado(EstudianteApoderado.objects.all(), 'apoderado')
+    )
+    listado = listados.Listado(
+        request, apoderados,
+        ordenes={
+            'apellidos': ['apellidos', 'nombres', 'id'],
+            'ci': ['ci'],
+            'estudiantes': ['-estudiantes', 'id'],
+        },
+        filtrar=opciones.RECURSOS['apoderados'].filtrar,
+    )
     return render(request, 'apoderados/list.html', {
-        'apoderados': apoderados,
+        'apoderados': listado.pagina,
+        'listado': listado,
         'form': form
     })
 
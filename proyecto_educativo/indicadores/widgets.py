@@ -0,0 +1,59 @@
+"""
+Widgets de formularios
+======================
+"""
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+
+class SelectRemoto(forms.Select):
+    """
+    Select de un ModelChoiceField que no recorre su queryset al renderizar.
+
+    Solo emite la opción vacía y la(s) elegida(s) (una consulta por pk), de
+    modo que el HTML y las consultas no dependen del tamaño de la tabla. El
+    script de includes/opciones_remotas.html (en base.html) busca el resto
+    en /api/opciones/<recurso>/ (ver opciones.py). `depende_de` nombra campos
+    del mismo formulario cuyo valor se envía como filtro (p. ej. 'curso').
+    La validación sigue a cargo del queryset del campo.
+    """
+
+    def __init__(self, recurso, depende_de=(), attrs=None):
+        super().__init__(attrs)
+        self.recurso = recurso
+        self.depende_de = tuple(depende_de)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        attrs = context['widget']['attrs']
+        attrs['data-opciones-url'] = reverse('indicadores:opciones-detail', args=[self.recurso])
+        if self.depende_de:
+            attrs['data-depende-de'] = ','.join(self.depende_de)
+        return context
+
+    def use_required_attribute(self, initial):
+        # Select lo decide iterando las opciones (una consulta sobre toda la tabla)
+        return forms.Widget.use_required_attribute(self, initial) and self.choices.field.empty_label is not None
+
+    def optgroups(self, name, value, attrs=None):
+        campo = self.choices.field
+        opciones = []
+        if campo.empty_label is not None:
+            opciones.append(('', campo.empty_label))
+        elegidos = [v for v in value if v]
+        if elegidos:
+            try:
+                objetos = list(self.choices.queryset.filter(pk__in=elegidos))
+            except (ValueError, TypeError, ValidationError):
+                objetos = []
+            opciones.extend(self.choices.choice(objeto) for objeto in objetos)
+
+        grupos = []
+        for indice, (valor, etiqueta) in enumerate(opciones):
+            seleccionado = str(valor) in value
+            grupos.append((None, [self.create_option(
+                name, valor, etiqueta, seleccionado, indice, attrs=attrs
+            )], indice))
+        return grupos
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero, para medir también sesión y autenticación (solo con PRESUPUESTO_CONSULTAS_ACTIVO)
+    'indicadores.presupuesto_consultas.PresupuestoConsultasMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -102,6 +106,80 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# LocMem sirve para un solo proceso. Con varios workers usar un backend
+# compartido para que la invalidación de KPIs llegue a todos, por ejemplo:
+#   'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#   'LOCATION': 'redis://127.0.0.1:6379/1',
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'indicadores',
+    }
+}
+
+# Caché del dashboard y de /api/dashboard/ (ver indicadores/cache_kpis.py)
+KPIS_CACHE_ALIAS = 'default'
+KPIS_CACHE_TIMEOUT = 300  # segundos
+
+# Conteos de los listados paginados (ver indicadores/paginacion.py): por
+# encima de este número de filas se usa una estimación o un conteo cacheado
+PAGINACION_CONTEO_EXACTO_HASTA = 100_000
+PAGINACION_CONTEO_CACHE_TIMEOUT = 300  # segundos
+
+# Presupuesto de consultas por petición (ver indicadores/presupuesto_consultas.py).
+# Con PRESUPUESTO_CONSULTAS_ACTIVO=1 en el entorno el middleware agrega
+# cabeceras X-DB-* y advierte en el log las rutas que exceden su presupuesto
+# (con ESTRICTO, la petición falla); tests.py verifica estos presupuestos
+# para todas las rutas de la app, con y sin escritura.
+# Por nombre de ruta o patrón; vale la primera coincidencia exacta y si no,
+# el primer patrón en este orden. Las claves sin método son de lectura; cada
+# ruta que atiende POST declara el suyo ('POST <ruta>'). Incluyen holgura
+# para sesión y usuario.
+PRESUPUESTO_CONSULTAS_ACTIVO = os.environ.get('PRESUPUESTO_CONSULTAS_ACTIVO', '').lower() in ('1', 'true', 'si', 'sí')
+PRESUPUESTO_CONSULTAS_ESTRICTO = False
+PRESUPUESTO_CONSULTAS = {
+    'indicadores:dashboard': {'consultas': 12, 'duplicadas': 0},  # kpis.DASHBOARD_MAX_CONSULTAS
+    'indicadores:cursos_list': {'consultas': 8, 'duplicadas': 0},
+    'indicadores:dashboard-*': {'consultas': 4, 'duplicadas': 0},
+    'indicadores:*-detail': {'consultas': 3, 'duplicadas': 0},
+    'indicadores:*': {'consultas': 5, 'duplicadas': 0},
+    # Escrituras: altas de la API (una nota o asistencia suma un upsert por tabla de resumen)
+    'POST indicadores:grado-list': {'consultas': 4, 'duplicadas': 0},
+    'POST indicadores:asignatura-list': {'consultas': 5, 'duplicadas': 0},
+    'POST indicadores:periodoacademico-list': {'consultas': 4, 'duplicadas': 0},
+    'POST indicadores:profesor-list': {'consultas': 8, 'duplicadas': 0},
+    'POST indicadores:estudiante-list': {'consultas': 8, 'duplicadas': 0},
+    'POST indicadores:apoderado-list': {'consultas': 8, 'duplicadas': 0},
+    'POST indicadores:curso-list': {'consultas': 8, 'duplicadas': 0},
+    'POST indicadores:inscripcion-list': {'consultas': 9, 'duplicadas': 0},
+    'POST indicadores:estudianteapoderado-list': {'consultas': 6, 'duplicadas': 0},
+    'POST indicadores:evaluacion-list': {'consultas': 7, 'duplicadas': 0},
+    'POST indicadores:calificacion-list': {'consultas': 16, 'duplicadas': 0},
+    'POST indicadores:asistencia-list': {'consultas': 16, 'duplicadas': 0},
+    # Lotes y recálculo: constantes, no dependen del tamaño del lote o del curso
+    'POST indicadores:asistencia-lote': {'consultas': 13, 'duplicadas': 0},
+    'POST indicadores:evaluacion-planilla': {'consultas': 15, 'duplicadas': 0},
+    'POST indicadores:notafinal-recalcular': {'consultas': 9, 'duplicadas': 0},
+    'POST indicadores:pasar_lista': {'consultas': 15, 'duplicadas': 0},
+    'POST indicadores:planilla_calificaciones': {'consultas': 15, 'duplicadas': 0},
+    # Formularios de alta
+    'POST indicadores:estudiantes_list': {'consultas': 6, 'duplicadas': 0},
+    'POST indicadores:profesores_list': {'consultas': 6, 'duplicadas': 0},
+    'POST indicadores:cursos_list': {'consultas': 10, 'duplicadas': 0},
+    'POST indicadores:inscripciones_list': {'consultas': 7, 'duplicadas': 0},
+    'POST indicadores:evaluaciones_list': {'consultas': 3, 'duplicadas': 0},
+    'POST indicadores:apoderados_list': {'consultas': 7, 'duplicadas': 0},
+    'POST indicadores:vincular_apoderado': {'consultas': 7, 'duplicadas': 0},
+    'POST indicadores:registrar_calificacion': {'consultas': 15, 'duplicadas': 0},
+    'POST indicadores:registrar_asistencia': {'consultas': 13, 'duplicadas': 0},
+    '*': {'consultas': 30, 'duplicadas': 5},
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -153,15 +231,18 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'indicadores.paginacion.PaginacionConteoAproximado',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    # JSON con orjson (mismos bytes que JSONRenderer) y MessagePack si está
+    # instalado (Accept: application/msgpack)
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'indicadores.renderers.JSONRapidoRenderer',
+        *(['indicadores.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
         'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 }
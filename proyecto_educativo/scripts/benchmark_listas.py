@@ -0,0 +1,121 @@
+"""
+Benchmark de los listados rápidos (indicadores/listas_rapidas.py)
+=================================================================
+Compara, para calificaciones, asistencia e inscripciones, el tiempo de
+consultar + serializar + renderizar una página de N filas con el
+ModelSerializer y con la lista rápida, y verifica que el JSON sea idéntico.
+
+Crea una base de datos de prueba temporal (no toca la base de desarrollo).
+
+Uso:
+    python scripts/benchmark_listas.py [--filas 1000] [--repeticiones 5]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'proyecto_educativo.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from indicadores import listas_rapidas, views  # noqa: E402
+from indicadores.models import (  # noqa: E402
+    Grado, Asignatura, PeriodoAcademico, Profesor, Estudiante,
+    Curso, Inscripcion, Evaluacion, Calificacion, Asistencia
+)
+
+
+def poblar(filas):
+    """Crea al menos `filas` calificaciones, asistencias e inscripciones"""
+    periodo = PeriodoAcademico.objects.create(
+        nombre='Bench', fecha_inicio=date(2025, 2, 1), fecha_fin=date(2025, 12, 1), activo=True
+    )
+    grado = Grado.objects.create(nombre='Bench')
+    profesor = Profesor.objects.create(nombres='Ana', apellidos='Vega', email='bench@test.edu')
+    cursos = [
+        Curso.objects.create(
+            grado=grado, profesor=profesor, periodo_academico=periodo, seccion=str(i),
+            asignatura=Asignatura.objects.create(nombre=f'Asignatura {i}', codigo=f'B{i}')
+        )
+        for i in range(10)
+    ]
+    por_curso = filas // len(cursos) + 1
+    estudiantes = Estudiante.objects.bulk_create([
+        Estudiante(nombres=f'Est{i}', apellidos=f'Apellido{i}', ci=f'B{i}', fecha_nacimiento=date(2015, 1, 1))
+        for i in range(por_curso)
+    ])
+    Inscripcion.objects.bulk_create([Inscripcion(estudiante=e, curso=c) for c in cursos for e in estudiantes])
+    evaluaciones = Evaluacion.objects.bulk_create([
+        Evaluacion(curso=c, nombre='Examen', fecha=date(2025, 3, 1), ponderacion=Decimal('50')) for c in cursos
+    ])
+    Calificacion.objects.bulk_create([
+        Calificacion(evaluacion=ev, estudiante=e, nota=Decimal(i % 100))
+        for ev in evaluaciones for i, e in enumerate(estudiantes)
+    ])
+    Asistencia.objects.bulk_create([
+        Asistencia(estudiante=e, curso=c, fecha=date(2025, 3, 3) + timedelta(days=i % 5), estado='presente')
+        for c in cursos for i, e in enumerate(estudiantes)
+    ])
+
+
+def medir(funcion, repeticiones):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--filas', type=int, default=1000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        poblar(args.filas)
+        renderer = JSONRenderer()
+        casos = [
+            ('calificaciones', views.CalificacionViewSet, listas_rapidas.CALIFICACIONES),
+            ('asistencia', views.AsistenciaViewSet, listas_rapidas.ASISTENCIA),
+            ('inscripciones', views.InscripcionViewSet, listas_rapidas.INSCRIPCIONES),
+        ]
+        print(f"{'endpoint':<16}{'serializer':>14}{'rápida':>14}{'aceleración':>14}")
+        for nombre, viewset, lista in casos:
+            vista = viewset()
+            queryset = vista.get_queryset()[:args.filas]
+
+            def con_serializer():
+                return renderer.render(viewset.serializer_class(queryset.all(), many=True).data)
+
+            def con_lista_rapida():
+                return renderer.render(lista.construir(list(queryset.values(*lista.campos))))
+
+            lento, esperado = medir(con_serializer, args.repeticiones)
+            rapido, obtenido = medir(con_lista_rapida, args.repeticiones)
+            if esperado != obtenido:
+                raise SystemExit(f'{nombre}: el JSON de la lista rápida difiere del serializer')
+            print(
+                f'{nombre:<16}{args.filas / lento:>10.0f} f/s{args.filas / rapido:>10.0f} f/s'
+                f'{lento / rapido:>13.1f}x'
+            )
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark de renderers de la API (indicadores/renderers.py)
+===========================================================
+Obtiene `response.data` de varios endpoints existentes y compara el tiempo
+de renderizado y el tamaño de la respuesta con JSONRenderer (DRF),
+JSONRapidoRenderer (orjson) y MessagePackRenderer.
+
+Crea una base de datos de prueba temporal (no toca la base de desarrollo).
+
+Uso:
+    python scripts/benchmark_renderers.py [--filas 1000] [--repeticiones 20]
+"""
+import argparse
+import time
+
+from benchmark_listas import poblar  # configura Django
+
+from django.db import connection
+from django.test.utils import setup_test_environment
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from indicadores.renderers import JSONRapidoRenderer, MessagePackRenderer, msgpack, orjson
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--filas', type=int, default=1000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    renderers = {'JSONRenderer': JSONRenderer()}
+    if orjson is not None:
+        renderers['JSONRapido'] = JSONRapidoRenderer()
+    if msgpack is not None:
+        renderers['MessagePack'] = MessagePackRenderer()
+
+    setup_test_environment()
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        poblar(args.filas)
+        client = APIClient()
+        endpoints = [
+            f'/api/calificaciones/?page_size={args.filas}',
+            f'/api/asistencia/?page_size={args.filas}',
+            '/api/inscripciones/',
+            '/api/cursos/con_estadisticas/',
+            '/api/dashboard/promedio_por_curso/',
+        ]
+        print(f"{'endpoint':<42}" + ''.join(f'{nombre:>22}' for nombre in renderers))
+        for url in endpoints:
+            data = client.get(url, HTTP_ACCEPT='application/json').data
+            columnas = []
+            for renderer in renderers.values():
+                mejor = float('inf')
+                for _ in range(args.repeticiones):
+                    inicio = time.perf_counter()
+                    contenido = renderer.render(data)
+                    mejor = min(mejor, time.perf_counter() - inicio)
+                columnas.append(f'{mejor * 1000:8.2f} ms {len(contenido) / 1024:7.1f} KB')
+            print(f'{url:<42}' + ''.join(f'{columna:>22}' for columna in columnas))
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()